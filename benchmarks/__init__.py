@@ -0,0 +1,23 @@
+"""====================================================
+                    DESCRIPTION
+
+Benchmarks for the hot paths of bricknet. Not part of the installed package.
+
+Micro benchmarks time single calls (layer forward/back passes, activation
+functions, negative sampling, training on one window), and end to end
+benchmarks measure the training throughput (words/sec) of the CBOW and
+skip-gram models on a synthetic corpus with Zipf distributed word counts.
+
+Run them from the root of the repository with:
+
+    python -m benchmarks --out results.json
+    python -m benchmarks --out new.json --compare results.json
+
+Results are saved as JSON, along with the versions of python, numpy and
+bricknet they were run with, so that runs can be compared across versions.
+=======================================================
+"""
+__author__ = 'ronny'
+
+from .timing import time_it, environment_info, save_results, load_results, \
+    compare_results
@@ -0,0 +1,66 @@
+"""====================================================
+                    DESCRIPTION
+
+Command line interface for running the benchmarks:
+
+    python -m benchmarks [--suite {micro,end_to_end,all}] [--quick]
+                         [--out FILE] [--compare BASELINE] [--threshold 0.1]
+=======================================================
+"""
+__author__ = 'ronny'
+
+import sys
+import argparse
+
+from . import micro, end_to_end
+from .timing import save_results, load_results, compare_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Benchmarks for bricknet")
+    parser.add_argument("--suite", default="all",
+                        choices=["micro", "end_to_end", "all"])
+    parser.add_argument("--quick", action="store_true",
+                        help="tiny sizes, just to check that it all runs")
+    parser.add_argument("--out", help="json file to save the results to")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="json file of earlier results to compare to")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="slowdown fraction that counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = []
+    if args.suite in ("micro", "all"):
+        results += micro.run(quick=args.quick)
+    if args.suite in ("end_to_end", "all"):
+        results += end_to_end.run(quick=args.quick)
+
+    for r in results:
+        if "words_per_sec" in r:
+            value = "{:>12.0f} words/sec".format(r["words_per_sec"])
+        else:
+            value = "{:>12.3f} us".format(r["best"] * 1e6)
+        print("{:<32} {}  {}".format(r["name"], value,
+                                     sorted(r["params"].items())))
+
+    if args.out:
+        save_results(results, args.out)
+
+    if args.compare:
+        comparison = compare_results(load_results(args.compare),
+                                     {"results": results},
+                                     threshold=args.threshold)
+        regressions = [c for c in comparison if c["regression"]]
+        for c in comparison:
+            print("{:<32} {:>6.2f}x {}  {}".format(
+                c["name"], c["slowdown"],
+                "REGRESSION" if c["regression"] else "",
+                sorted(c["params"].items())))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
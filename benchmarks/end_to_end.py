@@ -0,0 +1,115 @@
+"""====================================================
+                    DESCRIPTION
+
+End to end benchmarks of the training throughput (words/sec) of the CBOW
+and skip-gram models, on a synthetic corpus with Zipf distributed words.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import timeit
+
+import numpy as np
+
+from bricknet import config
+from bricknet.nlp import cbow_ngg, skipgram, corpus
+from bricknet.nlp.sampling import AliasSampler
+
+
+# ==============================================================================
+#                                                                    ZIPF_CORPUS
+# ==============================================================================
+def zipf_corpus(num_words=100000, vocab_size=10000, s=1.0,
+                mean_sentence_length=20, seed=0):
+    """
+    Creates a synthetic corpus, where the frequency of the word of rank r is
+    proportional to 1/r**s, like the words in natural language text.
+
+    :param num_words: {int} total number of words in the corpus.
+    :param vocab_size: {int} number of unique words to draw from.
+    :param s: {float}(default = 1.0) exponent of the Zipf distribution.
+    :param mean_sentence_length: {int}
+
+        The sentence lengths are drawn from a poisson distribution with this
+        mean (with at least one word per sentence).
+
+    :param seed: {int}
+    :return: {list of lists of strings} the sentences.
+    """
+    # ==========================================================================
+    random = np.random.RandomState(seed)
+    p = 1.0 / np.arange(1, vocab_size + 1) ** s
+    words = np.array(["w{}".format(i) for i in range(vocab_size)])
+    ids = random.choice(vocab_size, size=num_words, p=p / p.sum())
+
+    lengths = np.maximum(random.poisson(mean_sentence_length,
+                                        size=num_words), 1)
+    ends = np.cumsum(lengths)
+    ends = np.append(ends[ends < num_words], num_words)
+    starts = np.append(0, ends[:-1])
+    return [list(words[ids[a:b]]) for a, b in zip(starts, ends)]
+
+
+# ==============================================================================
+#                                                                            RUN
+# ==============================================================================
+def run(num_words=200000, vocab_size=10000, vec_size=100, window=5, k=5,
+        batch_size=1024, repeat=3, seed=0, quick=False):
+    """
+    Measures the words/sec of one pass over a Zipf corpus, for CBOW and
+    skip-gram with negative sampling (with an AliasSampler).
+
+    :param num_words: {int} number of words in the corpus.
+    :param vocab_size: {int} number of unique words.
+    :param vec_size: {int} size of the word vectors.
+    :param window: {int} context window size.
+    :param k: {int} number of negative samples.
+    :param batch_size: {int} windows per batch.
+    :param repeat: {int} number of passes to time. The fastest is kept.
+    :param seed: {int}
+    :param quick: {boolean}
+
+        Use a tiny corpus and a single pass. For checking that the
+        benchmarks work, rather than for comparing results.
+
+    :return: {list of dicts}
+    """
+    # ==========================================================================
+    if quick:
+        num_words, vocab_size, vec_size, repeat = 5000, 500, 20, 1
+
+    sentences = zipf_corpus(num_words, vocab_size, seed=seed)
+    vocab = cbow_ngg.create_vocab_df(sentences, window=window)
+    word_index = corpus.get_word_index(vocab)
+    tokens, offsets = corpus.encode_sentences(sentences, word_index)
+
+    params = {"num_words": len(tokens), "vocab_size": len(vocab),
+              "vec_size": vec_size, "window": window, "k": k,
+              "batch_size": batch_size, "dtype": config.get_dtype().name}
+
+    results = []
+    for name, trainer in [("cbow.train_corpus", cbow_ngg.train_corpus),
+                          ("skipgram.train_corpus", skipgram.train_corpus)]:
+        times = []
+        for i in range(repeat):
+            np.random.seed(seed + i)
+            W_in = cbow_ngg.words_matrix(len(vocab), vec_size, "rows",
+                                         scale=1.0 / vec_size)
+            W_out = np.zeros_like(W_in)
+            sampler = AliasSampler.from_vocab(vocab, seed=seed + i)
+
+            start = timeit.default_timer()
+            trainer(tokens, offsets, W_in, W_out, vocab, window=window, k=k,
+                    alpha=0.025, batch_size=batch_size, sampler=sampler,
+                    seed=seed + i)
+            times.append(timeit.default_timer() - start)
+
+        best = min(times)
+        results.append({"name": name,
+                        "params": params,
+                        "best": best,
+                        "median": float(np.median(times)),
+                        "repeat": repeat,
+                        "words_per_sec": len(tokens) / best,
+                        })
+    return results
@@ -0,0 +1,214 @@
+"""====================================================
+                    DESCRIPTION
+
+Micro benchmarks of single calls to the hot paths of bricknet.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+
+from bricknet import activations, config
+from bricknet.layers.LSigmoid import LSigmoid
+from bricknet.classifiers.CSoftmax import CSoftmax
+from bricknet.nlp import cbow_ngg
+from bricknet.nlp.sampling import AliasSampler
+
+from .timing import time_it
+
+
+def _result(name, params, fn, **kwargs):
+    result = {"name": name, "params": params}
+    result.update(time_it(fn, **kwargs))
+    return result
+
+
+# ==============================================================================
+#                                                                         LAYERS
+# ==============================================================================
+def bench_layers(batch_sizes=(1, 32, 256), layer_sizes=(64, 256, 1024),
+                 num_classes=(10, 1000), seed=0, **kwargs):
+    """
+    Times the forward and back passes of LSigmoid and CSoftmax layers.
+
+    :param batch_sizes: {list of ints} number of inputs per pass.
+    :param layer_sizes: {list of ints} in and out sizes of LSigmoid layers.
+    :param num_classes: {list of ints} out sizes of CSoftmax layers.
+    :param seed: {int} seed for the weights and inputs.
+    :param kwargs: other arguments for time_it()
+    :return: {list of dicts}
+    """
+    # ==========================================================================
+    random = np.random.RandomState(seed)
+    dtype = config.get_dtype()
+    results = []
+    for batch in batch_sizes:
+        for size in layer_sizes:
+            params = {"batch": batch, "in": size, "out": size,
+                      "dtype": dtype.name}
+            layer = LSigmoid(size, size)
+            x = random.randn(batch, size).astype(dtype)
+            errors = random.randn(batch, size).astype(dtype)
+            results.append(_result("LSigmoid.forward", params,
+                                   lambda: layer.forward(x), **kwargs))
+            layer.forward(x)
+            results.append(_result("LSigmoid.back", params,
+                                   lambda: layer.back(errors, x), **kwargs))
+
+        for classes in num_classes:
+            size = layer_sizes[-1]
+            params = {"batch": batch, "in": size, "out": classes,
+                      "dtype": dtype.name}
+            layer = CSoftmax(size, classes)
+            x = random.randn(batch, size).astype(dtype)
+            y = np.zeros((batch, classes), dtype=bool)
+            y[np.arange(batch), random.randint(0, classes, batch)] = True
+            results.append(_result("CSoftmax.forward", params,
+                                    lambda: layer.forward(x), **kwargs))
+            layer.forward(x)
+            results.append(_result("CSoftmax.back", params,
+                                   lambda: layer.back(x, y), **kwargs))
+    return results
+
+
+# ==============================================================================
+#                                                                    ACTIVATIONS
+# ==============================================================================
+def bench_activations(shape=(256, 1024), seed=0, **kwargs):
+    """
+    Times the activation functions on an array of the given shape.
+
+    :param shape: {tuple of ints}
+    :param seed: {int} seed for the input values.
+    :param kwargs: other arguments for time_it()
+    :return: {list of dicts}
+    """
+    # ==========================================================================
+    random = np.random.RandomState(seed)
+    dtype = config.get_dtype()
+    z = (random.randn(*shape) * 3).astype(dtype)
+    out = np.empty_like(z)
+    y = random.randint(0, shape[-1], shape[0])
+    functions = [("sigmoid", lambda: activations.sigmoid(z)),
+                 ("sigmoid[out]", lambda: activations.sigmoid(z, out=out)),
+                 ("sigmoid_prime", lambda: activations.sigmoid_prime(z)),
+                 ("sigmoid_and_log", lambda: activations.sigmoid_and_log(z)),
+                 ("tanh", lambda: activations.tanh(z)),
+                 ("tanh_prime", lambda: activations.tanh_prime(z)),
+                 ("softmax", lambda: activations.softmax(z)),
+                 ("log_softmax", lambda: activations.log_softmax(z)),
+                 ("softmax_cross_entropy",
+                  lambda: activations.softmax_cross_entropy(z, y, out=out)),
+                 ]
+    params = {"shape": list(shape), "dtype": dtype.name}
+    return [_result("activations." + name, params, fn, **kwargs)
+            for name, fn in functions]
+
+
+# ==============================================================================
+#                                                                       SAMPLING
+# ==============================================================================
+def _zipf_vocab(vocab_size, s=1.0):
+    """ Vocabulary dataframe with Zipf distributed counts """
+    import pandas as pd
+    counts = 1e6 / np.arange(1, vocab_size + 1) ** s
+    p = cbow_ngg.get_sampling_distribution(pd.Series(counts))
+    return pd.DataFrame({"counts": counts, "p": np.asarray(p),
+                         "i": np.arange(vocab_size)},
+                        index=["w{}".format(i) for i in range(vocab_size)])
+
+
+def bench_sampling(vocab_sizes=(1000, 100000), k=5, batch=1024, seed=0,
+                   **kwargs):
+    """
+    Times get_sample_indices(), with and without an AliasSampler.
+
+    :param vocab_sizes: {list of ints}
+    :param k: {int} negative samples per window.
+    :param batch: {int} windows per batch, for the AliasSampler.
+    :param seed: {int}
+    :param kwargs: other arguments for time_it()
+    :return: {list of dicts}
+    """
+    # ==========================================================================
+    np.random.seed(seed)
+    results = []
+    for vocab_size in vocab_sizes:
+        vocab = _zipf_vocab(vocab_size)
+        sampler = AliasSampler.from_vocab(vocab, seed=seed)
+        results.append(_result("get_sample_indices",
+                               {"vocab_size": vocab_size, "k": k},
+                               lambda: cbow_ngg.get_sample_indices(vocab, k),
+                               **kwargs))
+        results.append(_result("get_sample_indices[sampler]",
+                               {"vocab_size": vocab_size, "k": k,
+                                "batch": batch},
+                               lambda: cbow_ngg.get_sample_indices(
+                                   vocab, (batch, k), sampler=sampler),
+                               **kwargs))
+    return results
+
+
+# ==============================================================================
+#                                                               TRAIN_ONE_WINDOW
+# ==============================================================================
+def bench_train_one_window(vocab_size=10000, vec_size=100, window=8, k=5,
+                           seed=0, **kwargs):
+    """
+    Times cbow_ngg.train_one_window() (which works on the global W_in, W_out
+    and vocab of the cbow_ngg module).
+
+    :param vocab_size: {int}
+    :param vec_size: {int}
+    :param window: {int} number of context words.
+    :param k: {int} negative samples.
+    :param seed: {int}
+    :param kwargs: other arguments for time_it()
+    :return: {list of dicts}
+    """
+    # ==========================================================================
+    np.random.seed(seed)
+    cbow_ngg.vocab = _zipf_vocab(vocab_size)
+    cbow_ngg.W_in = cbow_ngg.words_matrix(vocab_size, vec_size, "cols",
+                                          scale=0.1)
+    cbow_ngg.W_out = cbow_ngg.words_matrix(vocab_size, vec_size, "rows",
+                                           scale=0.1)
+    words = list(cbow_ngg.vocab.index[np.random.randint(0, vocab_size,
+                                                        window + 1)])
+    params = {"vocab_size": vocab_size, "vec_size": vec_size,
+              "window": window, "k": k}
+    return [_result("train_one_window", params,
+                    lambda: cbow_ngg.train_one_window(words[:-1], words[-1],
+                                                      k=k),
+                    **kwargs)]
+
+
+# ==============================================================================
+#                                                                            RUN
+# ==============================================================================
+def run(quick=False, **kwargs):
+    """
+    Runs all the micro benchmarks.
+
+    :param quick: {boolean}
+
+        Only run the smallest sizes, with fewer repeats. For checking that
+        the benchmarks work, rather than for comparing results.
+
+    :param kwargs: other arguments for time_it()
+    :return: {list of dicts}
+    """
+    # ==========================================================================
+    if quick:
+        kwargs.setdefault("repeat", 1)
+        kwargs.setdefault("min_time", 0.01)
+        return (bench_layers(batch_sizes=(32,), layer_sizes=(64,),
+                             num_classes=(10,), **kwargs)
+                + bench_activations(shape=(32, 64), **kwargs)
+                + bench_sampling(vocab_sizes=(1000,), **kwargs)
+                + bench_train_one_window(vocab_size=1000, vec_size=20,
+                                         **kwargs))
+    return (bench_layers(**kwargs)
+            + bench_activations(**kwargs)
+            + bench_sampling(**kwargs)
+            + bench_train_one_window(**kwargs))
@@ -0,0 +1,174 @@
+"""====================================================
+                    DESCRIPTION
+
+Helpers for timing functions, and for saving and comparing the results.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import os
+import sys
+import json
+import platform
+import multiprocessing
+import timeit
+
+import numpy as np
+
+
+# ==============================================================================
+#                                                                        TIME_IT
+# ==============================================================================
+def time_it(fn, repeat=5, number=None, min_time=0.2):
+    """
+    Times how long a function takes to run.
+
+    The function is called `number` times in a row, and that is repeated
+    `repeat` times. The best of the repeats is the least affected by other
+    things running on the machine, so it is the one to compare across runs.
+
+    :param fn: {function} function taking no arguments.
+    :param repeat: {int}(default = 5) number of repeats.
+    :param number: {int}(optional)
+
+        Number of calls per repeat. By default, it is picked so that each
+        repeat takes at least min_time seconds.
+
+    :param min_time: {float}(default = 0.2) seconds, see number.
+
+    :return: {dict}
+
+        with the time per call (in seconds) of the "best", "median" and "mean"
+        repeat, along with the "number" and "repeat" used.
+    """
+    # ==========================================================================
+    timer = timeit.Timer(fn)
+    if number is None:
+        number = 1
+        while True:
+            if timer.timeit(number) >= min_time or number >= 10**6:
+                break
+            number *= 10
+
+    times = np.array(timer.repeat(repeat=repeat, number=number)) / number
+    return {"best": float(times.min()),
+            "median": float(np.median(times)),
+            "mean": float(times.mean()),
+            "number": number,
+            "repeat": repeat,
+            }
+
+
+# ==============================================================================
+#                                                               ENVIRONMENT_INFO
+# ==============================================================================
+def environment_info():
+    """
+    Returns the versions of python, numpy and bricknet, and details about the
+    machine, to save with the results.
+
+    :return: {dict}
+    """
+    # ==========================================================================
+    version_file = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                                "bricknet", "VERSION")
+    try:
+        with open(version_file) as f:
+            bricknet_version = f.read().strip()
+    except IOError:
+        bricknet_version = None
+
+    return {"bricknet": bricknet_version,
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": multiprocessing.cpu_count(),
+            }
+
+
+# ==============================================================================
+#                                                                   SAVE_RESULTS
+# ==============================================================================
+def save_results(results, file):
+    """
+    Saves a list of benchmark results to a json file, along with the
+    environment_info() of this machine.
+
+    :param results: {list of dicts}
+
+        Each one with a "name" (eg "LSigmoid.forward"), the "params" it was
+        run with, and its timings.
+
+    :param file: {str} path of the json file.
+    """
+    # ==========================================================================
+    with open(file, "w") as f:
+        json.dump({"environment": environment_info(), "results": results},
+                  f, indent=2, sort_keys=True)
+
+
+# ==============================================================================
+#                                                                   LOAD_RESULTS
+# ==============================================================================
+def load_results(file):
+    """
+    Loads a json file saved by save_results().
+
+    :param file: {str}
+    :return: {dict} with "environment" and "results" keys.
+    """
+    # ==========================================================================
+    with open(file) as f:
+        return json.load(f)
+
+
+def _result_key(result):
+    """ Key that identifies the same benchmark across different runs """
+    return (result["name"], json.dumps(result["params"], sort_keys=True))
+
+
+# ==============================================================================
+#                                                                COMPARE_RESULTS
+# ==============================================================================
+def compare_results(old, new, threshold=0.1):
+    """
+    Compares two sets of results (as returned by load_results()), and
+    returns the benchmarks that are in both of them.
+
+    Time benchmarks compare the "best" time per call. Throughput benchmarks
+    (the ones with a "words_per_sec") compare the throughput, so a slowdown
+    is always a ratio above 1.
+
+    :param old: {dict} the baseline results.
+    :param new: {dict} the results to compare against the baseline.
+    :param threshold: {float}(default = 0.1)
+
+        Slowdowns by more than this fraction are flagged as regressions.
+
+    :return: {list of dicts}
+
+        With the "name", "params", "old" and "new" values, the "slowdown"
+        ratio (new time / old time), and whether it is a "regression".
+    """
+    # ==========================================================================
+    old_results = {_result_key(r): r for r in old["results"]}
+    comparison = []
+    for r in new["results"]:
+        o = old_results.get(_result_key(r))
+        if o is None:
+            continue
+        if "words_per_sec" in r:
+            old_val, new_val = o["words_per_sec"], r["words_per_sec"]
+            slowdown = old_val / new_val
+        else:
+            old_val, new_val = o["best"], r["best"]
+            slowdown = new_val / old_val
+        comparison.append({"name": r["name"],
+                           "params": r["params"],
+                           "old": old_val,
+                           "new": new_val,
+                           "slowdown": slowdown,
+                           "regression": slowdown > 1 + threshold,
+                           })
+    return comparison
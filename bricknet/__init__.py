@@ -1,10 +1,16 @@
-import matplotlib.pyplot as plt
 from numpy import array
 import numpy as np
-import activations
-import layers
-import classifiers
-import eval
+from . import config
+from . import activations
+from . import layers
+from .layers import Layer, LSigmoid
+from . import classifiers
+from .classifiers import CSoftmax
+from . import eval
+from . import optimizers
+from .minibatch import iter_minibatches
+from . import callbacks
+from .callbacks import Monitor
 
 ################################################################################
 #                                                           NEURAL_NETWORK CLASS
@@ -21,24 +27,245 @@ class Neural_Network(object):
     object, with potentially very different activation  functions, and
     different ways of propagating forward and backwards.
 
+    The network is a sequential stack of the layers. The last one is the
+    output layer (eg, a CSoftmax), which provides the cost() and back(input,
+    y) methods. All the others are hidden layers, whose back() takes the error
+    gradients WRT their outputs. Every call works on a whole mini-batch (one
+    example per row) at a time, so each layer does one matrix product per
+    pass, and the inputs to each layer are the output buffers of the layer
+    below it (no copies).
+
+    Example:
+
+        net = Neural_Network([784, 100, 10], learning_rate=0.1)
+        cost = net.fit(X, Y, epochs=10, batch_size=64)
+        net.forward(X_test)
     """
-    def __init__(self, layers=[2,3,1]):
+    def __init__(self, layers=[2,3,1], memory=None, learning_rate=0.01,
+                 optimizer=None, dtype=None):
         """
 
-        :param layers: {list of ints} (default=[2,3,1])
+        :param layers: {list of ints, or list of Layer objects}
+                       (default=[2,3,1])
 
             A list containing the size of each layer (including input and
-            output layers)
+            output layers). Creates LSigmoid hidden layers, and a CSoftmax
+            output layer.
+
+            Or, a list of already created Layer objects, in order from the
+            input to the output, with the last one being the output layer.
+
+        :param memory: {str} (default=None)
+
+            What each layer stores from the forward pass: "both" (fastest),
+            "activated" (half the memory, recomputes the preactivations when
+            training), or "none" (inference only). See layers.Layer.
+            By default, layers created from sizes use "both", and Layer
+            objects keep their own setting.
+
+        :param learning_rate: {float} (default=0.01)
+
+            Learning rate for the layers created from sizes.
+
+        :param optimizer: {Optimizer} (default=None)
+
+            An optimizer to use for all the layers, eg, optimizers.Adam().
+            By default, layers created from sizes use plain SGD with the
+            learning_rate, and Layer objects keep their own optimizers.
+
+        :param dtype: {numpy dtype} (default=None)
+
+            Data type for the layers created from sizes. Defaults to the
+            global dtype in bricknet.config
         """
+        if all(isinstance(layer, Layer) for layer in layers):
+            self.layers = list(layers)
+        else:
+            sizes = layers
+            self.layers = [LSigmoid(sizes[i], sizes[i + 1],
+                                    learning_rate=learning_rate, dtype=dtype)
+                           for i in range(len(sizes) - 2)]
+            self.layers.append(CSoftmax(sizes[-2], sizes[-1],
+                                        learning_rate=learning_rate,
+                                        dtype=dtype))
+
+        if optimizer is not None:
+            for layer in self.layers:
+                layer.optimizer = optimizer
+
+        self.memory = memory
+        if memory is not None:
+            self.set_memory(memory)
+
         # Layers
-        self.layerSizes = layers
+        self.layerSizes = [self.layers[0].in_size] + \
+                          [layer.out_size for layer in self.layers]
         self.numlayers = len(self.layerSizes)
+        self.in_size = self.layerSizes[0]
+        self.out_size = self.layerSizes[-1]
+
+        # The inputs fed to each layer in the last forward pass
+        self.inputs = [None] * len(self.layers)
+
+    # ==========================================================================
+    #                                                                 SET_MEMORY
+    # ==========================================================================
+    def set_memory(self, memory):
+        """
+        Sets the memory mode of every layer.
+
+        :param memory: {str} One of "both", "activated", or "none".
+        """
+        # ======================================================================
+        for layer in self.layers:
+            layer.set_memory(memory)
+        self.memory = memory
+
+    # ==========================================================================
+    #                                                                    FORWARD
+    # ==========================================================================
+    def forward(self, input, return_val=True):
+        """
+        Forward propagation through all the layers.
+
+        :param input: {array}
+
+            A single example of shape (in_size,), or a mini-batch of shape
+            (batch, in_size).
+
+        :param return_val: {Boolean}
+
+            Should it return the output of the output layer?
+
+        :return: {array}
+
+            Whatever the output layer's forward() returns, eg, the one hot
+            classifications for a CSoftmax. The probabilities are in
+            self.layers[-1].activated_vals
+        """
+        # ======================================================================
+        a = input
+        for i, layer in enumerate(self.layers[:-1]):
+            self.inputs[i] = a
+            layer.forward(a, return_val=False)
+            a = layer.activated_vals
+        self.inputs[-1] = a
+        return self.layers[-1].forward(a, return_val=return_val)
+
+    # ==========================================================================
+    #                                                                       BACK
+    # ==========================================================================
+    def back(self, input_vals, y, update_weights=True):
+        """
+        Back propagation through all the layers, from the output layer down,
+        using the values stored by the last call to forward().
+
+        :param input_vals: {array}
+
+            The inputs that were fed to the network on the last forward pass.
+
+        :param y: {array}
+
+            The correct outputs, eg, one hot vectors of booleans (one row per
+            example for a mini-batch).
+
+        :param update_weights: {boolean}
+
+            Should the weights of every layer get updated?
+
+        :return: {array}
+
+            error gradients WRT the inputs of the network.
+        """
+        # ======================================================================
+        self.inputs[0] = input_vals
+        errors = self.layers[-1].back(self.inputs[-1], y,
+                                      update_weights=update_weights)
+        for i in range(len(self.layers) - 2, -1, -1):
+            errors = self.layers[i].back(errors, self.inputs[i],
+                                         update_weights=update_weights)
+        return errors
+
+    # ==========================================================================
+    #                                                                       COST
+    # ==========================================================================
+    def cost(self, y):
+        """
+        The cost of each example from the last forward pass, from the output
+        layer's cost function.
+
+        :param y: {array} The correct outputs.
+        :return: {array}
+        """
+        # ======================================================================
+        return self.layers[-1].cost(y)
+
+    # ==========================================================================
+    #                                                                        FIT
+    # ==========================================================================
+    def fit(self, X, Y, epochs=1, batch_size=32, shuffle=True, seed=None,
+            verbose=False, callbacks=None):
+        """
+        Trains the network with mini-batch gradient descent.
+
+        :param X: {2D array} inputs, one example per row.
+        :param Y: {2D array} correct outputs, eg, one hot rows of booleans.
+        :param epochs: {int}(default = 1) number of passes over the data.
+        :param batch_size: {int}(default = 32)
+        :param shuffle: {boolean}(default = True)
+
+            Shuffle the examples at the start of each epoch?
+
+        :param seed: {int}(optional) seed for the shuffling.
+        :param verbose: {boolean}(default = False)
+
+            Print the average cost after each epoch?
+
+        :param callbacks: {list of Callback objects}(optional)
+
+            Callbacks to report the progress, throughput, loss, learning rate
+            (of the output layer), and the time spent on the "batching",
+            "forward" and "backward" (including the weight updates) phases
+            to, after every mini-batch. See the bricknet.callbacks module.
+
+        :return: {array}
+
+            The average cost of each mini-batch, over all the epochs.
+        """
+        # ======================================================================
+        X = np.asarray(X)
+        Y = np.asarray(Y)
+        random = np.random.RandomState(seed)
+        buffers = (np.empty_like(X), np.empty_like(Y)) if shuffle else None
+        num_batches = (len(X) + batch_size - 1) // batch_size
+        output_optimizer = self.layers[-1].optimizer
+
+        monitor = Monitor(callbacks)
+        monitor.begin(total_batches=epochs * num_batches, epochs=epochs,
+                      batch_size=batch_size, layers=self.layerSizes)
+        timer = monitor.timer
 
-        # Initialised Weights as random values between 0 and 1
-        # TODO: add Layer objects instead.
-        # TODO: maybe include a gradient checking method build in
-        self.Weights = [np.random.rand(self.layerSizes[i], \
-                                       self.layerSizes[i+1]) \
-                        for i in range(self.numlayers - 1)]
+        cost = []
+        for epoch in range(epochs):
+            for X_batch, Y_batch in iter_minibatches(X, Y,
+                                                     batch_size=batch_size,
+                                                     shuffle=shuffle,
+                                                     seed=random,
+                                                     out=buffers):
+                timer.lap("batching")
+                # Every batch updates each layer once
+                lr = output_optimizer.get_learning_rate(len(cost))
+                self.forward(X_batch, return_val=False)
+                cost.append(self.cost(Y_batch).mean())
+                timer.lap("forward")
+                self.back(X_batch, Y_batch, update_weights=True)
+                timer.lap("backward")
+                monitor.batch_end(cost[-1], examples=len(X_batch),
+                                  learning_rate=lr)
 
+            if verbose:
+                print("Epoch {}: average cost {:0.6f}".format(
+                    epoch + 1, np.mean(cost[-num_batches:])))
 
+        monitor.end()
+        return np.array(cost)
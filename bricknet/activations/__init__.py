@@ -5,4 +5,7 @@
 """
 __author__ = 'ronny'
 
-from tanh import tanh, tanh_prime
\ No newline at end of file
+from .tanh import tanh, tanh_prime
+from .sigmoid import sigmoid, sigmoid_prime, sigmoid_and_log
+from .softmax import softmax, softmax_prime, log_softmax, \
+    softmax_cross_entropy
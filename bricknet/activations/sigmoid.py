@@ -0,0 +1,72 @@
+__author__ = 'ronny'
+
+import numpy as np
+
+
+# ==============================================================================
+#                                                                        SIGMOID
+# ==============================================================================
+def sigmoid(z, out=None):
+    """
+    Sigmoid function on input
+
+    :param z: {numeric value, or array-like object}
+    :param out: {array}(optional)
+
+        Array to store the result in (can be z itself), instead of allocating
+        new ones for every step.
+
+    :return:
+    """
+    if out is None:
+        return 1.0 / (1 + np.exp(-z))
+    np.negative(z, out=out)
+    np.exp(out, out=out)
+    out += 1
+    return np.reciprocal(out, out=out)
+
+
+# ==============================================================================
+#                                                                  SIGMOID_PRIME
+# ==============================================================================
+def sigmoid_prime(z, out=None):
+    """
+    derivative of Sigmoid Function
+    return np.exp(-z) / ((1 + np.exp(-z)) ** 2)
+
+    :param z:
+    :param out: {array}(optional) Array to store the result in.
+    :return:
+    """
+    # More computationally efficient version.
+    if out is None:
+        sig = sigmoid(z)
+        return sig * (1 - sig)
+    sig = sigmoid(z, out=out)
+    sig *= 1 - sig
+    return sig
+
+
+# ==============================================================================
+#                                                                SIGMOID_AND_LOG
+# ==============================================================================
+def sigmoid_and_log(z):
+    """
+    Returns both sigmoid(z) and log(sigmoid(z)), calculated as
+
+        log(sigmoid(z)) = min(z, 0) - log(1 + exp(-|z|))
+        sigmoid(z)      = exp(log(sigmoid(z)))
+
+    so neither of them overflows, or takes the log of 0, for large values
+    of z.
+
+    Useful for the negative sampling cost, where the cost is
+    -log(sigmoid(z)), and the gradient is 1 - sigmoid(z).
+
+    :param z: {array-like}
+    :return: {tuple of arrays} (sigmoid(z), log(sigmoid(z)))
+    """
+    z = np.asarray(z)
+    log_s = np.minimum(z, 0) - np.log(1 + np.exp(-np.abs(z)))
+    return np.exp(log_s), log_s
+
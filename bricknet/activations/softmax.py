@@ -0,0 +1,155 @@
+__author__ = 'ronny'
+
+import numpy as np
+
+
+def _as_float(z):
+    """
+    z as a floating point array, since the results are calculated in place
+    in an array of the same dtype. Integers (and lists of them) become the
+    smallest float type that holds them, and floats are left as they are.
+    """
+    z = np.asarray(z)
+    if z.dtype.kind != "f":
+        z = z.astype(np.result_type(z.dtype, np.float32))
+    return z
+
+
+# ==============================================================================
+#                                                                        SOFTMAX
+# ==============================================================================
+def softmax(z, out=None):
+    """
+    Returns the softmax probabulities fot the elements of z.
+
+    The maximum of each row is subtracted before taking the exponent, so it
+    does not overflow for large values of z.
+
+    :param z: {array-like}
+
+        An array of values. If it is a 2D array of shape (batch, classes), then
+        the softmax is calculated separately for each row.
+
+    :param out: {array}(optional)
+
+        Array to store the result in (can be z itself), instead of allocating
+        a new one.
+
+    :return: {array}
+
+        An  array of the softmax probabilities of the input values.
+    """
+    z = _as_float(z)
+    out = np.subtract(z, z.max(axis=-1, keepdims=True), out=out)
+    np.exp(out, out=out)
+    out /= out.sum(axis=-1, keepdims=True)
+    return out
+
+
+# ==============================================================================
+#                                                                    LOG_SOFTMAX
+# ==============================================================================
+def log_softmax(z, out=None):
+    """
+    Returns the log of the softmax probabilities of the elements of z,
+    calculated as z - logsumexp(z), which stays finite even when the
+    probabilities themselves underflow to 0.
+
+    :param z: {array-like}
+
+        An array of values. For a 2D array, each row is done separately.
+
+    :param out: {array}(optional) Array to store the result in.
+    :return: {array}
+    """
+    z = _as_float(z)
+    out = np.subtract(z, z.max(axis=-1, keepdims=True), out=out)
+    out -= np.log(np.exp(out).sum(axis=-1, keepdims=True))
+    return out
+
+
+# ==============================================================================
+#                                                          SOFTMAX_CROSS_ENTROPY
+# ==============================================================================
+def softmax_cross_entropy(z, y, out=None):
+    """
+    Fused, numerically stable softmax and negative log likelihood cost.
+    Returns the cost and its gradient WRT z together, calculated in a single
+    buffer (the shifted values of z are turned into the gradient in place):
+
+        cost     = logsumexp(z) - z[y]
+        gradient = softmax(z) - one_hot(y)
+
+    :param z: {array}
+
+        Preactivations of the output layer, of shape (classes,) or
+        (batch, classes).
+
+    :param y: {array}
+
+        The correct class, either as a one-hot vector, of booleans or numbers
+        (one row per example for a batch), or as the integer index of the
+        correct class (an array of them for a batch). Any y with the same
+        shape as z is taken to be one-hot.
+
+    :param out: {array}(optional)
+
+        Array of the same shape as z to store the gradient in, instead of
+        allocating a new one. Can be z itself, if z is no longer needed.
+
+    :return: {tuple}
+
+        (cost, gradient). The cost is a float for a single example, or an
+        array with the cost of each example for a batch.
+    """
+    # ==========================================================================
+    z = _as_float(z)
+    y = np.asarray(y)
+    if y.shape == z.shape:
+        y = y.argmax(axis=-1)
+
+    if z.ndim == 1:
+        correct = (Ellipsis, y)
+    else:
+        correct = (np.arange(z.shape[0]), y)
+
+    z_max = z.max(axis=-1, keepdims=True)
+    z_correct = z[correct] - z_max[..., 0]      # before z gets overwritten
+
+    grad = np.subtract(z, z_max, out=out)
+    np.exp(grad, out=grad)
+    sums = grad.sum(axis=-1, keepdims=True)
+    grad /= sums
+    grad[correct] -= 1
+
+    cost = np.log(sums[..., 0]) - z_correct
+    return cost, grad
+
+
+# ==============================================================================
+#                                                                  SOFTMAX_PRIME
+# ==============================================================================
+def softmax_prime(z, selected_output):
+    """
+    Returns the the values of the derivative of the softmax function for the
+    selected output element, WRT the input values.
+
+    :param z: {array-like}
+
+        An array of values
+
+    :param selected_output: {array-like}
+
+        A one hot vector specifying the element that is selected from the output
+        of the softmax function.
+
+    :return: {array}
+
+        Gradients of the sofmtax function curve at the input values.
+    """
+    # TODO: Check that this is even working properly.
+    h_y_is_c = softmax(z*selected_output)
+    hc = softmax(z)
+    hy = hc * selected_output
+
+    return h_y_is_c  - hy*hc
@@ -1,27 +1,35 @@
 __author__ = 'ronny'
 
+import numpy as np
+
 
 # ==============================================================================
 #                                                                           TANH
 # ==============================================================================
-def tanh(z):
+def tanh(z, out=None):
     """
     :param z: {array-like}
 
         the array representing the pre-activation values vector.
 
+    :param out: {array}(optional)
+
+        Array to store the result in (can be z itself).
+
     :return:
 
         Post activation values using the tanh activation function.
     """
     # ==========================================================================
-    return (z > 0) * z
+    if out is None:
+        return (z > 0) * z
+    return np.maximum(z, 0, out=out)
 
 
 # ==============================================================================
 #                                                                           TANH
 # ==============================================================================
-def tanh_prime(z, as_int=True):
+def tanh_prime(z, as_int=False):
     """
     :param z: {numpy array}
 
@@ -29,18 +37,22 @@ def tanh_prime(z, as_int=True):
 
     :param as_int: {boolean}
 
-        returns an array of integers (3.88 times faster than returning array of
-        floats). Since the gradients will always be 0 or 1 for the tanh
-        function, then there is no loss of information.
+        returns an array of integers instead. Since the gradients will always
+        be 0 or 1 for the tanh function, then there is no loss of information,
+        but multiplying them with float32 errors upcasts the result to
+        float64.
 
-        default = True
+        default = False
 
-        If False, return array of floats.
+        If False, return an array of the same floating point type as z.
 
     :return:
 
         Gradient of the tanh activation function evaluated at the values in z.
     """
     # ==========================================================================
-    return (z > 0).astype(int) if as_int else (z > 0).astype(float)
-
+    if as_int:
+        return (z > 0).astype(int)
+    z = np.asarray(z)
+    dtype = z.dtype if z.dtype.kind == "f" else float
+    return (z > 0).astype(dtype)
@@ -0,0 +1,364 @@
+"""====================================================
+                    DESCRIPTION
+
+Instrumentation of the training loops. The trainers (cbow_ngg.train_corpus,
+skipgram.train_corpus, hogwild.train_parallel, cbow.SoftmaxCBOW.fit,
+word2vec.Word2Vec.fit, and Neural_Network.fit) take a list of callbacks, and
+report to them after every batch, with the throughput (words/sec,
+examples/sec), the time spent in each phase of training (eg, sampling,
+forward, backward, update), the loss (smoothed over the recent batches), and
+the learning rate.
+
+    log = JSONLinesLogger("train_log.jsonl", every=100)
+    history = History()
+    cbow_ngg.train_corpus(..., callbacks=[log, history, ProgressPrinter()])
+=======================================================
+"""
+__author__ = 'ronny'
+
+import json
+import timeit
+
+_now = timeit.default_timer
+
+
+################################################################################
+#                                                              PHASE TIMER CLASS
+################################################################################
+class PhaseTimer(object):
+    """
+    Accumulates the time spent in each phase of a training loop. Each call
+    to lap(phase) adds the time since the previous lap to that phase, so the
+    code being timed just needs one call at the end of each phase:
+
+        timer.lap("sampling")
+        ...
+        timer.lap("forward")
+    """
+    def __init__(self):
+        self.totals = {}
+        self._last = _now()
+
+    def start(self):
+        """ Starts timing the next phase from now """
+        self._last = _now()
+
+    def lap(self, phase):
+        """ Adds the time since the last lap to `phase` """
+        now = _now()
+        self.totals[phase] = self.totals.get(phase, 0.0) + (now - self._last)
+        self._last = now
+
+
+################################################################################
+#                                                                  MONITOR CLASS
+################################################################################
+class Monitor(object):
+    """
+    Used by the trainers to keep track of the progress of training, and to
+    pass the stats on to the callbacks.
+
+    The stats passed to the callbacks are a dict with:
+
+        name             : name of the trainer (eg, the worker, for hogwild)
+        batch            : number of batches done so far
+        examples         : number of examples (eg, windows) done so far
+        words            : number of words done so far (None if not text)
+        elapsed          : seconds since the start of training
+        examples_per_sec : average throughput since the start of training
+        words_per_sec    : average throughput since the start of training
+        progress         : fraction done, (None if the total is not known)
+        loss             : average loss of the latest batch
+        smoothed_loss    : exponential moving average of the batch losses
+        learning_rate    : learning rate used for the latest batch
+        phases           : {dict} seconds spent in each phase so far
+    """
+    # ==========================================================================
+    #                                                                   __INIT__
+    # ==========================================================================
+    def __init__(self, callbacks=None, name="", smoothing=0.98):
+        """
+        :param callbacks: {list of Callback objects}(optional)
+        :param name: {str} included in the stats, to tell trainers apart.
+        :param smoothing: {float}(default = 0.98)
+
+            Weight of the past batches in the smoothed loss. Higher values
+            average over more batches.
+        """
+        # ======================================================================
+        self.callbacks = list(callbacks or [])
+        self.name = name
+        self.smoothing = smoothing
+        self.total_batches = None
+        self._reset()
+
+    def _reset(self):
+        self.timer = PhaseTimer()
+        self.batch = 0
+        self.examples = 0
+        self.words = None
+        self.loss = None
+        self.learning_rate = None
+        self._loss_avg = 0.0
+        self._start = _now()
+
+    # ==========================================================================
+    #                                                                      BEGIN
+    # ==========================================================================
+    def begin(self, total_batches=None, **info):
+        """
+        Call at the start of training.
+
+        :param total_batches: {int}(optional) for reporting the progress.
+        :param info: any other json serialisable details about the training
+                     run (eg, the hyperparameters) to pass to the callbacks.
+        """
+        # ======================================================================
+        self._reset()
+        self.total_batches = total_batches
+        info = dict(info, name=self.name, total_batches=total_batches)
+        for callback in self.callbacks:
+            callback.on_train_begin(info)
+        self.timer.start()
+
+    # ==========================================================================
+    #                                                                  BATCH_END
+    # ==========================================================================
+    def batch_end(self, loss, examples, words=None, learning_rate=None):
+        """
+        Call at the end of each batch.
+
+        :param loss: {float} average loss of the batch.
+        :param examples: {int} number of examples in the batch.
+        :param words: {int}(optional) number of words in the batch.
+        :param learning_rate: {float}(optional)
+        """
+        # ======================================================================
+        self.batch += 1
+        self.examples += examples
+        if words is not None:
+            self.words = (self.words or 0) + words
+        self.loss = float(loss)
+        self.learning_rate = (None if learning_rate is None
+                              else float(learning_rate))
+        self._loss_avg = (self.smoothing * self._loss_avg
+                          + (1 - self.smoothing) * self.loss)
+
+        if self.callbacks:
+            stats = self.stats()
+            for callback in self.callbacks:
+                callback.on_batch_end(stats)
+            self.timer.lap("callbacks")
+
+    # ==========================================================================
+    #                                                                        END
+    # ==========================================================================
+    def end(self):
+        """
+        Call at the end of training.
+
+        :return: {dict} the final stats.
+        """
+        # ======================================================================
+        stats = self.stats()
+        for callback in self.callbacks:
+            callback.on_train_end(stats)
+        return stats
+
+    # ==========================================================================
+    #                                                                      STATS
+    # ==========================================================================
+    def stats(self):
+        """
+        :return: {dict} the stats so far (see the class docstring).
+        """
+        # ======================================================================
+        elapsed = _now() - self._start
+        rate = 1.0 / elapsed if elapsed > 0 else 0.0
+        smoothed = None
+        if self.batch > 0:
+            # Corrects the bias of the moving average towards its start at 0
+            smoothed = self._loss_avg / (1 - self.smoothing ** self.batch)
+        progress = None
+        if self.total_batches:
+            progress = self.batch / float(self.total_batches)
+
+        return {"name": self.name,
+                "batch": self.batch,
+                "examples": self.examples,
+                "words": self.words,
+                "elapsed": elapsed,
+                "examples_per_sec": self.examples * rate,
+                "words_per_sec": (None if self.words is None
+                                  else self.words * rate),
+                "progress": progress,
+                "loss": self.loss,
+                "smoothed_loss": smoothed,
+                "learning_rate": self.learning_rate,
+                "phases": dict(self.timer.totals),
+                }
+
+
+################################################################################
+#                                                                 CALLBACK CLASS
+################################################################################
+class Callback(object):
+    """
+    A template for callbacks. Subclasses override the methods for the events
+    they are interested in.
+
+    :param every: {int}(default = 1)
+
+        Only handle every this many batches. Subclasses can check
+        self.is_due(stats) in on_batch_end().
+    """
+    def __init__(self, every=1):
+        self.every = every
+
+    def is_due(self, stats):
+        return stats["batch"] % self.every == 0
+
+    def on_train_begin(self, info):
+        """ :param info: {dict} details about the training run. """
+        pass
+
+    def on_batch_end(self, stats):
+        """ :param stats: {dict} as returned by Monitor.stats() """
+        pass
+
+    def on_train_end(self, stats):
+        """ :param stats: {dict} the final stats. """
+        pass
+
+
+################################################################################
+#                                                                  HISTORY CLASS
+################################################################################
+class History(Callback):
+    """
+    Keeps the stats of every `every` batches in memory, in self.stats, and the
+    final stats in self.final.
+
+    NOTE: When used with hogwild.train_parallel(), each worker process fills
+          in its own copy, so use a JSONLinesLogger instead.
+    """
+    def __init__(self, every=1):
+        Callback.__init__(self, every=every)
+        self.stats = []
+        self.final = None
+
+    def on_batch_end(self, stats):
+        if self.is_due(stats):
+            self.stats.append(stats)
+
+    def on_train_end(self, stats):
+        self.final = stats
+
+
+################################################################################
+#                                                        JSON LINES LOGGER CLASS
+################################################################################
+class JSONLinesLogger(Callback):
+    """
+    Writes the stats to a file, as one json object per line, with an "event"
+    key of "begin", "batch" or "end".
+
+    To keep the overhead low, lines are buffered, and written to the file
+    buffer_size lines at a time, in a single write. The file is only opened
+    at the start of training, and it is appended to by default, so the same
+    logger can be passed to all the worker processes of
+    hogwild.train_parallel() (the "name" of each line tells them apart).
+    """
+    # ==========================================================================
+    #                                                                   __INIT__
+    # ==========================================================================
+    def __init__(self, file, every=1, buffer_size=100, mode="a"):
+        """
+        :param file: {str} path of the file to write to.
+        :param every: {int}(default = 1) log every this many batches.
+        :param buffer_size: {int}(default = 100)
+
+            number of lines to hold in memory before writing them out.
+
+        :param mode: {str}(default = "a")
+
+            "a" to append to the file, or "w" to overwrite it.
+        """
+        # ======================================================================
+        Callback.__init__(self, every=every)
+        self.file = file
+        self.buffer_size = buffer_size
+        self.mode = mode
+        self._buffer = []
+        self._f = None
+
+    def _write(self, event, record):
+        record = dict(record, event=event)
+        self._buffer.append(json.dumps(record))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """ Writes out any buffered lines """
+        if self._buffer and self._f is not None:
+            self._f.write("\n".join(self._buffer) + "\n")
+            self._f.flush()
+        self._buffer = []
+
+    def on_train_begin(self, info):
+        if self._f is None:
+            self._f = open(self.file, self.mode)
+        self._write("begin", info)
+
+    def on_batch_end(self, stats):
+        if self.is_due(stats):
+            self._write("batch", stats)
+
+    def on_train_end(self, stats):
+        self._write("end", stats)
+        self.flush()
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def __getstate__(self):
+        # Open files can not be passed to other processes. Each process opens
+        # its own.
+        state = self.__dict__.copy()
+        state["_f"] = None
+        state["_buffer"] = []
+        return state
+
+
+################################################################################
+#                                                         PROGRESS PRINTER CLASS
+################################################################################
+class ProgressPrinter(Callback):
+    """
+    Prints a line with the progress, throughput, smoothed loss and learning
+    rate every `every` batches, and a summary with the time spent in each
+    phase at the end of training.
+    """
+    def on_batch_end(self, stats):
+        if not self.is_due(stats):
+            return
+        if stats["progress"] is None:
+            done = "batch {}".format(stats["batch"])
+        else:
+            done = "{:0.0f} % complete".format(100 * stats["progress"])
+        if stats["words_per_sec"] is None:
+            speed = "{:0.0f} examples/sec".format(stats["examples_per_sec"])
+        else:
+            speed = "{:0.0f} words/sec".format(stats["words_per_sec"])
+        lr = stats["learning_rate"]
+        print("   {}{}, {}, loss {:0.6f}{}".format(
+            stats["name"], done, speed, stats["smoothed_loss"],
+            "" if lr is None else ", alpha {:0.6f}".format(lr)))
+
+    def on_train_end(self, stats):
+        total = sum(stats["phases"].values()) or 1.0
+        phases = ", ".join("{} {:0.1f}%".format(phase, 100 * t / total)
+                           for phase, t in sorted(stats["phases"].items(),
+                                                  key=lambda x: -x[1]))
+        print("   {}done {} batches in {:0.2f} sec ({})".format(
+            stats["name"], stats["batch"], stats["elapsed"], phases))
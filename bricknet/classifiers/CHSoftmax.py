@@ -0,0 +1,196 @@
+"""====================================================
+    DESCRIPTION
+
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+from ..layers.Layer import Layer
+from ..nlp.huffman import HuffmanTree, hierarchical_softmax, \
+                          hierarchical_softmax_probs
+
+
+class CHSoftmax(Layer):
+    """
+    Hierarchical softmax output layer. A drop in replacement for CSoftmax for
+    when there are a very large number of classes (eg, a vocabulary of words).
+
+    The classes are the leaves of a Huffman tree built from the class counts,
+    and there is one row of weights for each inner node of the tree (instead
+    of one per class). Training only visits the O(log(num_classes)) nodes
+    along the path of the correct class, and frequent classes get the
+    shortest paths.
+
+    NOTE: forward() still calculates the full distribution over all classes
+          (eg, for inference and gradient checking), but back() does not
+          depend on it, so it can be skipped during training.
+
+    NOTE: With memory = "activated" or "none", the values of the inner nodes
+          are calculated into the start of the buffer of the probabilities,
+          which then overwrite them, so only the one buffer is kept.
+    """
+    def __init__(self, in_size=3, counts=None, weights=None,
+                 learning_rate=0.01, memory="both", optimizer=None,
+                 dtype=None):
+        """
+
+        :param in_size:
+        :param counts: {array-like}
+
+            The number of times each class appears in the training data. Used
+            to build the Huffman tree. The number of classes is len(counts).
+
+        :param weights:
+
+            pre-baked weights for the inner nodes of the tree, of shape
+            (len(counts) - 1, in_size)
+
+        :param learning_rate:
+        :param memory: {str} "both", "activated" or "none" (see Layer)
+        :param optimizer: {Optimizer} (see Layer)
+        :param dtype: {numpy dtype} (see Layer)
+        :return:
+        """
+        if counts is None:
+            counts = np.ones(3)
+        self.tree = HuffmanTree(counts)
+        Layer.__init__(self, in_size, self.tree.num_inner, weights,
+                       learning_rate, memory=memory, optimizer=optimizer,
+                       dtype=dtype)
+
+        # The outputs of the layer are the class probabilities, not the values
+        # of the inner nodes.
+        self.out_size = self.tree.num_classes
+        self.activated_vals = np.zeros(self.out_size, dtype=self.dtype)
+        self.classification = np.zeros(self.out_size, dtype=bool)
+        self.gradient_rows = np.zeros(0, dtype=np.intp)
+
+    # ==========================================================================
+    # FORWARD
+    # ==========================================================================
+    def forward(self, input, return_val=True):
+        """
+        Performs forward propagation, calculating the probabilities of all the
+        classes.
+
+        :param input: {array like object}
+
+            The values to use as inputs to this layer. Either a single example
+            of shape (in_size,) or a mini-batch of shape (batch, in_size).
+
+        :param return_val: {Boolean}
+
+            Should it return the output values? If False, then it updates the
+            values silently.
+
+        :return:{array}
+            A one hot vector of the predicted class, or one such vector per row
+            for a mini-batch (only if return_val = True).
+        """
+        # ======================================================================
+        input = np.asarray(input, dtype=self.dtype)
+        batch_shape = input.shape[:-1]
+        nodes_shape = batch_shape + (self.tree.num_inner,)
+        shape = batch_shape + (self.out_size,)
+        dtype = self.dtype
+
+        if self.memory == "both":
+            agg = self.aggregate(input, out=self._buffer("preactivated",
+                                                         nodes_shape, dtype))
+            self.preactivated_vals = agg
+            self.activated_vals = self.activate(
+                agg, out=self._buffer("activated", shape, dtype))
+        else:
+            # A single buffer. The values of the inner nodes take up the
+            # start of it, and get overwritten by the probabilities.
+            buffer = self._buffer("activated", shape, dtype)
+            nodes = buffer.reshape(-1)[:int(np.prod(nodes_shape))]
+            agg = self.aggregate(input, out=nodes.reshape(nodes_shape))
+            self.preactivated_vals = None
+            self.activated_vals = self.activate(agg, out=buffer)
+
+        probs = self.activated_vals
+        self.classification = self._buffer("classification", probs.shape, bool)
+        self.classification.fill(False)
+        best = probs.argmax(axis=-1)
+        if probs.ndim == 1:
+            self.classification[best] = True
+        else:
+            self.classification[np.arange(probs.shape[0]), best] = True
+
+        if return_val:
+            return self.classification
+
+    def activate(self, agg, out=None):
+        """
+        Class probabilities from the values of the inner nodes of the tree.
+
+        :param agg:
+        :param out: buffer to store the result in (can share memory with agg)
+        :return:
+        """
+        return hierarchical_softmax_probs(agg, self.tree, out=out)
+
+    def cost(self, y):
+        """
+        Returns the cost function of the hypothesised value as:
+
+        -log(hypothesised_probability_for_the_correct_class)
+
+        :param y: {array of booleans}
+
+            one-hot vector of the correct class with elements as booleans. For
+            a mini-batch, a (batch, out_size) array with one one-hot row per
+            example.
+
+        :return:
+
+            The cost for each example.
+        """
+        return -np.log(self.activated_vals[y])
+
+    def back(self, input_vals, y, update_weights=True):
+        """
+        Back propagate the errors using the negative Log Likelihood Cost
+        Function, only visiting the inner nodes along the path of the correct
+        class of each example.
+
+        The gradients of the weights are sparse, so they are stored as
+        self.gradient_rows (the rows of the weights that have gradients, can
+        contain repeats) and self.weight_gradients (the gradients for each of
+        those rows).
+
+        :param input_vals:
+
+            The inputs that were fed to the layer, of shape (in_size,) or
+            (batch, in_size).
+
+        :param y:
+
+            The correct class. Either one-hot vectors of booleans (like for
+            CSoftmax), or the integer index of the correct class for each
+            example (much smaller for a large number of classes).
+
+        :param update_weights:
+        :return:
+
+            error gradients WRT the inputs of the layer.
+        """
+        self._check_trainable()
+        y = np.asarray(y)
+        if y.dtype == bool:
+            y = y.argmax(axis=-1)
+
+        single_example = np.ndim(input_vals) == 1
+        h = np.atleast_2d(np.asarray(input_vals, dtype=self.dtype))
+        J, errors_input, rows, G_rows = hierarchical_softmax(
+            h, np.atleast_1d(y), self.weights, self.tree)
+
+        self.gradient_rows = rows
+        self.weight_gradients = G_rows
+
+        if update_weights:
+            self.optimizer.update_rows(self.weights, rows, G_rows)
+
+        return errors_input[0] if single_example else errors_input
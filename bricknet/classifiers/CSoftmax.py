@@ -11,16 +11,22 @@ from ..layers.Layer import Layer
 
 
 class CSoftmax(Layer):
-    def __init__(self, in_size=3, out_size=3, weights=None):
+    def __init__(self, in_size=3, out_size=3, weights=None, learning_rate=0.01,
+                 memory="both", optimizer=None, dtype=None):
         """
 
         :param in_size:
         :param out_size:
         :param weights:
+        :param learning_rate:
+        :param memory: {str} "both", "activated" or "none" (see Layer)
+        :param optimizer: {Optimizer} (see Layer)
+        :param dtype: {numpy dtype} (see Layer)
         :return:
         """
-        Layer.__init__(self, in_size, out_size, weights)
-        self.classification = np.zeros(out_size)
+        Layer.__init__(self, in_size, out_size, weights, learning_rate, memory,
+                       optimizer, dtype)
+        self.classification = np.zeros(self.out_size, dtype=bool)
 
     # ==========================================================================
     # FORWARD
@@ -30,7 +36,8 @@ class CSoftmax(Layer):
         Performs forward propagation
         :param input: {array like object}
 
-            The values to use as inputs to this layer.
+            The values to use as inputs to this layer. Either a single example
+            of shape (in_size,) or a mini-batch of shape (batch, in_size).
 
         :param return_val: {Boolean}
 
@@ -38,18 +45,22 @@ class CSoftmax(Layer):
             values silently.
 
         :return:{array}
-            The Output value (only if return_val = True)
+            The Output value (only if return_val = True). A one hot vector of
+            the predicted class, or one such vector per row for a mini-batch.
         """
-        # TODO: currently using arrray.max() method may result in occasionally
-        #       one hot vectors that are NOT "one hot" in cases where there are
-        #       ties. Find a better solution to avoid this.
-
         # ======================================================================
-        self.preactivated_vals = self.aggregate(input)
-        agg = self.preactivated_vals
-        self.activated_vals = self.activate(agg)
-        # One hot vector of the class with the highest probability
-        self.classification = self.activated_vals == self.activated_vals.max()
+        Layer.forward(self, input, return_val=False)
+
+        # One hot vector of the class with the highest probability (taking
+        # the first one in the case of ties)
+        probs = self.activated_vals
+        self.classification = self._buffer("classification", probs.shape, bool)
+        self.classification.fill(False)
+        best = probs.argmax(axis=-1)
+        if probs.ndim == 1:
+            self.classification[best] = True
+        else:
+            self.classification[np.arange(probs.shape[0]), best] = True
 
         if return_val:
             if return_cost:
@@ -67,22 +78,33 @@ class CSoftmax(Layer):
 
         :param y: {array of booleans}
 
-            one-hot vector of the correct class with elements as booleans
+            one-hot vector of the correct class with elements as booleans (or
+            numbers). For a mini-batch, a (batch, out_size) array with one
+            one-hot row per example.
 
         :return:
+
+            The cost for each example.
         """
-        return -np.log(self.activated_vals[y])
+        y = np.asarray(y, dtype=bool)
+        # Calculated from the preactivations (as z - logsumexp(z)) rather than
+        # as the log of the probabilities, so it does not blow up to inf when
+        # the probability of the correct class underflows to 0.
+        if self.preactivated_vals is None:
+            return -np.log(self.activated_vals[y])
+        return -activations.log_softmax(self.preactivated_vals)[y]
 
 
-    def activate(selg, agg):
+    def activate(selg, agg, out=None):
         """
         Sigmoid Activation function
 
         :param selg:
         :param agg:
+        :param out: buffer to store the result in (can be agg itself)
         :return:
         """
-        return activations.softmax(agg)
+        return activations.softmax(agg, out=out)
 
     def back(self, input_vals, y, update_weights=True):
         """
@@ -90,28 +112,35 @@ class CSoftmax(Layer):
 
         :param input_vals:
 
+            The inputs that were fed to the layer, of shape (in_size,) or
+            (batch, in_size).
+
         :param y:{array-like object of Boolean elements}
-            An array of booleans, representing a one hot vector of the correct
-            class y.
+            An array of booleans (or numbers, eg, np.eye(out_size)[labels]),
+            representing a one hot vector of the correct class y. Or one such
+            row per example for a mini-batch. The integer index of the correct
+            class (one per example) also works, see
+            activations.softmax_cross_entropy()
         :param update_weights:
         :return:
+
+            error gradients WRT the inputs of the layer.
         """
 
-        # Gradient of errors WRT the preactivation of the layer.
-        # z = self.aggregate(input_vals)
+        # Gradient of Softmax for the correct class WRT preactivations,
+        # (activated_vals - y) calculated stably from z, into a buffer that
+        # gets reused on every call.
+        self._check_trainable()
+        errors_preactivation = self._buffer("errors_preactivation",
+                                            self.activated_vals.shape,
+                                            self.dtype)
         z = self.preactivated_vals
-
-        # Gradient of Softmax for the correct class WRT preactivations
-        errors_preactivation = self.activated_vals - y
-
-        errors_input = self.weights.transpose().dot(errors_preactivation)
-        errors_weights = np.outer(errors_preactivation, input_vals)
-
-        if update_weights:
-            self.weights = self.weights + errors_input
-
-        return errors_input
-
-
-
-
+        if z is None:
+            # Not stored (memory = "activated"), so recomputed from the
+            # inputs, into the buffer that the gradient then overwrites
+            input_vals = np.asarray(input_vals, dtype=self.dtype)
+            z = self.aggregate(input_vals, out=errors_preactivation)
+        activations.softmax_cross_entropy(z, y, out=errors_preactivation)
+
+        return self.back_from_preactivation(errors_preactivation, input_vals,
+                                            update_weights=update_weights)
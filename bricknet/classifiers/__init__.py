@@ -1 +1,2 @@
-from CSoftmax import CSoftmax
+from .CSoftmax import CSoftmax
+from .CHSoftmax import CHSoftmax
@@ -0,0 +1,55 @@
+"""====================================================
+                    DESCRIPTION
+
+Global settings for bricknet.
+
+The default floating point data type is used for the weights, word matrices,
+activations, gradients and buffers of any object that is not given its own
+dtype. It defaults to float32, which takes half the memory of float64, and
+runs the matrix products about twice as fast.
+
+    from bricknet import config
+    config.set_dtype(np.float64)     # eg, for gradient checking
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+
+_dtype = np.dtype(np.float32)
+
+
+# ==============================================================================
+#                                                                      GET_DTYPE
+# ==============================================================================
+def get_dtype(dtype=None):
+    """
+    Returns dtype as a numpy dtype, or the global default dtype if dtype is
+    None. Objects that take an optional dtype argument use this to resolve it.
+
+    :param dtype: {numpy dtype, or None}
+    :return: {numpy dtype}
+    """
+    # ==========================================================================
+    if dtype is None:
+        return _dtype
+    return np.dtype(dtype)
+
+
+# ==============================================================================
+#                                                                      SET_DTYPE
+# ==============================================================================
+def set_dtype(dtype):
+    """
+    Sets the global default floating point dtype. Only affects objects
+    created after the call.
+
+    :param dtype: {numpy dtype} eg, np.float32 or np.float64
+    """
+    # ==========================================================================
+    global _dtype
+    dtype = np.dtype(dtype)
+    if dtype.kind != "f":
+        raise ValueError("dtype must be a floating point type, not {}".format(
+            dtype))
+    _dtype = dtype
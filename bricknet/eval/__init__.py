@@ -5,4 +5,4 @@
 """
 __author__ = 'ronny'
 
-from gradient_check import gradient_check
+from .gradient_check import gradient_check, weight_gradient_check
@@ -1,9 +1,85 @@
-from .. import np
+import numpy as np
+
+
+# ==============================================================================
+#                                                                _SAMPLE_COORDS
+# ==============================================================================
+def _sample_coords(n, num_samples=None, seed=None):
+    """
+    Returns the (flat) indices of the coordinates to check. All n of them, or
+    a sorted random subset of num_samples of them.
+    """
+    # ==========================================================================
+    if num_samples is None or num_samples >= n:
+        return np.arange(n)
+    random = np.random.RandomState(seed)
+    return np.sort(random.choice(n, size=num_samples, replace=False))
+
+
+# ==============================================================================
+#                                                              _MANUAL_GRADIENTS
+# ==============================================================================
+def _manual_gradients(cost_fn, base, coords, steps, epsilon, batch_size=1024):
+    """
+    Calculates the manual gradients for all the coordinates using central
+    differences, with all the perturbations for a chunk of batch_size
+    coordinates stacked into a single batch of 2*batch_size rows:
+
+        rows 0 .. c-1   : base with coords[r] moved down by epsilon * steps[r]
+        rows c .. 2c-1  : base with coords[r] moved up by epsilon * steps[r]
+
+    so each chunk needs only one call to cost_fn.
+
+    :param cost_fn: {function}
+
+        Takes a 2D batch of perturbed versions of base, and returns the cost
+        for each row.
+
+    :param base: {1D array} the unperturbed values.
+    :param coords: {array of ints} indices of base to perturb.
+    :param steps: {array} how much to scale epsilon by for each coordinate.
+    :param epsilon: {float}
+    :param batch_size: {int} max number of coordinates per batch.
+    :return: {tuple}
+
+        (manual_gradients, dy), one value per coordinate, where dy is the
+        change in the cost between the two perturbations.
+    """
+    # ==========================================================================
+    dy = np.empty(len(coords))
+    for start in range(0, len(coords), batch_size):
+        chunk = coords[start: start + batch_size]
+        shift = epsilon * steps[start: start + batch_size]
+        c = len(chunk)
+        rows = np.arange(c)
+
+        batch = np.tile(base, (2 * c, 1))
+        batch[rows, chunk] -= shift
+        batch[c + rows, chunk] += shift
+
+        costs = cost_fn(batch)
+        dy[start: start + c] = costs[c:] - costs[:c]
+    return dy / (2 * epsilon), dy
+
+
+# ==============================================================================
+#                                                                   _PRINT_TABLE
+# ==============================================================================
+def _print_table(labels, builtin_gradients, manual_gradients, diff):
+    print("------------------------------------------------------------")
+    print("Builtin Gradients || Manual Gradients || Diff")
+    print("------------------------------------------------------------")
+    for label, builtin, manual, d in zip(labels, builtin_gradients,
+                                         manual_gradients, diff):
+        print("{0:+17.6f} || {1:+16.6f} || {2:+0.6f}   {3}".format(
+            builtin, manual, d, label))
+
 
 # ==============================================================================
 #                                                                 GRADIENT CHECK
 # ==============================================================================
-def gradient_check(net, y, epsilon=0.01, verbose=True, x=None):
+def gradient_check(net, y, epsilon=0.01, verbose=True, x=None,
+                   num_samples=None, seed=None, batch_size=1024):
     """
     Perform gradient checking of a neural network, (or just an output layer
     object)
@@ -20,15 +96,25 @@ def gradient_check(net, y, epsilon=0.01, verbose=True, x=None):
 
         (cost(x+epsilon) - cost(x-epsilon)) / (x+epsilon - x-epsilon)
 
+    All the +/- epsilon perturbations of x are stacked into a single
+    (2n, n) mini-batch, and run through one batched forward pass (in chunks
+    of batch_size inputs), rather than two forward passes per input.
+
+    NOTE: Layers default to float32 (see bricknet.config), which is too
+          coarse for the differences to get close to zero. Check layers
+          created with dtype=np.float64, or after
+          config.set_dtype(np.float64).
+
     :param net:{neural net object, or output layer object}
 
         The neural net (or output layer object) you want to test for correctness
-        of the gradient calculation method.
+        of the gradient calculation method. Its forward() and cost() methods
+        need to handle mini-batches.
 
 
     :param y:{array}
 
-        The correct output values
+        The correct output values (for a single example)
 
     :param epsilon: {float}
 
@@ -46,74 +132,161 @@ def gradient_check(net, y, epsilon=0.01, verbose=True, x=None):
         values to the neural net to test the gradients. But you can specify your
         own input values if you like.
 
-    :return:
+    :param num_samples: {int}(optional)
+
+        Only check a random subset of this many of the inputs. Useful for
+        large layers. By default, all the inputs are checked.
+
+    :param seed: {int}(optional) seed for picking the random subset.
+
+    :param batch_size: {int}(default = 1024)
+
+        Max number of inputs to perturb per batched forward pass (each one
+        adds two rows to the batch).
+
+    :return: {array}
+
+        The differences between the builtin and manual gradients for each
+        input. Inputs that were not checked (when using num_samples) are NaN.
     """
     # ==========================================================================
     # Calculate the gradients using the built in function we are testing
     # --------------------------------------------------------------------------
     if x is None:
         x = np.random.ranf(net.in_size)
+    x = np.asarray(x, dtype=float)
 
     net.forward(x)
     builtin_gradients = net.back(x, y, update_weights=False)
     if verbose:
-      print("=======================================")
-      print("Cost using x: {}".format(net.cost(y)[0]))
-      print("=======================================")
+        print("=======================================")
+        print("Cost using x: {}".format(np.ravel(net.cost(y))[0]))
+        print("=======================================")
 
     # --------------------------------------------------------------------------
-    # Calculate The gradients manually WRT each each input in turn
+    # Calculate The gradients manually WRT the inputs, in batches
     # --------------------------------------------------------------------------
-    manual_gradients = np.ones(len(x)) #Stores the manually calculated gradients
-
-    for i in range(len(x)):
-        # ----------------------------------------------------------------------
-        # Cost when we move input for element i by a tiny bit to the left
-        # ----------------------------------------------------------------------
-        x1 = x.copy()
-        x1[i] = x1[i] - epsilon
-        net.forward(x1)
-        cost_x1 = net.cost(y)
-
-        # ----------------------------------------------------------------------
-        # Cost when we move input for element i by a tiny bit to the right
-        # ----------------------------------------------------------------------
-        x2 = x.copy()
-        x2[i] = x2[i]+epsilon
-        net.forward(x2)
-        cost_x2 =net.cost(y)
-
-        # ----------------------------------------------------------------------
-        # Calculate gradient for the element i
-        # ----------------------------------------------------------------------
-        dy = (cost_x2- cost_x1)
-        manual_gradients[i] = dy/(2*epsilon)
-
-        # ----------------------------------------------------------------------
-        # Print the change in cost due to the element i
-        # ----------------------------------------------------------------------
-        if verbose:
-            print("DJ by changing x[{0}]: {1:+0.10f}".format(i, dy[0]))
+    def cost_fn(batch):
+        net.forward(batch)
+        return np.ravel(net.cost(np.tile(y, (len(batch), 1))))
 
+    coords = _sample_coords(len(x), num_samples, seed)
+    manual_gradients, dy = _manual_gradients(cost_fn, x, coords,
+                                             np.ones(len(coords)), epsilon,
+                                             batch_size=batch_size)
+
+    # Leave the net in the same state as for the unperturbed input
+    net.forward(x)
 
     # The differences between builtin and manually calculated gradients
-    diff = builtin_gradients - manual_gradients
+    diff = np.full(len(x), np.nan)
+    diff[coords] = builtin_gradients[coords] - manual_gradients
 
     # --------------------------------------------------------------------------
     # Print a table of the builtin gradients vs manually calculated gradients
     # --------------------------------------------------------------------------
     if verbose:
-        print("------------------------------------------------------------")
-        print("Builtin Gradients || Manual Gradients || Diff")
-        print("------------------------------------------------------------")
-        for i in range(len(x)):
-            print("{0:+17.6f} || {1:+16.6f} || {2:+0.6f}".format(
-                manual_gradients[i],
-                builtin_gradients[i],
-                diff[i]))
+        for i, dy_i in zip(coords, dy):
+            print("DJ by changing x[{0}]: {1:+0.10f}".format(i, dy_i))
+        _print_table(["x[{}]".format(i) for i in coords],
+                     builtin_gradients[coords], manual_gradients, diff[coords])
 
     # --------------------------------------------------------------------------
     # Return the differences between builtin and manually calculated gradients
     # --------------------------------------------------------------------------
     return diff
 
+
+# ==============================================================================
+#                                                          WEIGHT GRADIENT CHECK
+# ==============================================================================
+def weight_gradient_check(layer, y, epsilon=0.01, verbose=True, x=None,
+                          num_samples=None, seed=None, batch_size=1024):
+    """
+    Perform gradient checking of the weight gradients of an output layer
+    object (eg, CSoftmax, or CHSoftmax).
+
+    Moving weight W[i, j] by epsilon only moves the preactivation z[i] by
+    epsilon * x[j]. So rather than perturbing the weights themselves (one
+    forward pass per weight), the perturbed preactivations for all the
+    weights are stacked into a single batch, and only the activation and cost
+    are calculated for them.
+
+    :param layer: {output layer object}
+
+        Needs the forward(), activate(), cost() and back() methods, and to
+        store its weight gradients in layer.weight_gradients when back() is
+        called. Sparse gradients (layer.gradient_rows, as used by CHSoftmax)
+        are also supported.
+
+    :param y: {array} The correct output values (for a single example)
+    :param epsilon: {float}
+    :param verbose:{boolean}{optional}(default=True)
+    :param x:{array}(optional) (default=None)
+
+        Input values to use. Random values between 0 and 1 by default.
+
+    :param num_samples: {int}(optional)
+
+        Only check a random subset of this many of the weights.
+
+    :param seed: {int}(optional) seed for picking the random subset.
+    :param batch_size: {int}(default = 1024)
+
+        Max number of weights to perturb per batch.
+
+    :return: {array}
+
+        The differences between the builtin and manual gradients, the same
+        shape as the weights. Weights that were not checked are NaN.
+    """
+    # ==========================================================================
+    # Calculate the gradients using the built in function we are testing
+    # --------------------------------------------------------------------------
+    if x is None:
+        x = np.random.ranf(layer.in_size)
+    x = np.asarray(x, dtype=float)
+
+    layer.forward(x)
+    z = np.array(layer.get_preactivated_vals(x), dtype=float)
+    layer.back(x, y, update_weights=False)
+
+    gradient_rows = getattr(layer, "gradient_rows", None)
+    if gradient_rows is None:
+        builtin_gradients = np.asarray(layer.weight_gradients).ravel()
+    else:
+        dense = np.zeros(layer.weights.shape)
+        np.add.at(dense, gradient_rows, layer.weight_gradients)
+        builtin_gradients = dense.ravel()
+
+    if verbose:
+        print("=======================================")
+        print("Cost using x: {}".format(np.ravel(layer.cost(y))[0]))
+        print("=======================================")
+
+    # --------------------------------------------------------------------------
+    # Calculate the gradients manually WRT the weights, via the preactivations
+    # --------------------------------------------------------------------------
+    def cost_fn(batch):
+        layer.preactivated_vals = batch
+        layer.activated_vals = layer.activate(batch)
+        return np.ravel(layer.cost(np.tile(y, (len(batch), 1))))
+
+    coords = _sample_coords(layer.weights.size, num_samples, seed)
+    rows, cols = np.unravel_index(coords, layer.weights.shape)
+    manual_gradients, dy = _manual_gradients(cost_fn, z, rows, x[cols],
+                                             epsilon, batch_size=batch_size)
+
+    # Leave the layer in the same state as for the unperturbed input
+    layer.forward(x)
+
+    diff = np.full(layer.weights.size, np.nan)
+    diff[coords] = builtin_gradients[coords] - manual_gradients
+    diff = diff.reshape(layer.weights.shape)
+
+    if verbose:
+        _print_table(["W[{}, {}]".format(i, j) for i, j in zip(rows, cols)],
+                     builtin_gradients[coords], manual_gradients,
+                     diff[rows, cols])
+
+    return diff
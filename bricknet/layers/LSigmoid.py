@@ -6,29 +6,36 @@
 __author__ = 'ronny'
 import numpy as np
 from .. import activations
-from Layer import Layer
+from .Layer import Layer
 
 
 class LSigmoid(Layer):
-    def __init__(self, in_size=3, out_size=3, weights=None):
+    def __init__(self, in_size=3, out_size=3, weights=None, learning_rate=0.01,
+                 memory="both", optimizer=None, dtype=None):
         """
 
         :param in_size:
         :param out_size:
         :param weights:
+        :param learning_rate:
+        :param memory: {str} "both", "activated" or "none" (see Layer)
+        :param optimizer: {Optimizer} (see Layer)
+        :param dtype: {numpy dtype} (see Layer)
         :return:
         """
-        Layer.__init__(self, in_size, out_size, weights)
+        Layer.__init__(self, in_size, out_size, weights, learning_rate, memory,
+                       optimizer, dtype)
 
-    def activate(self, agg):
+    def activate(self, agg, out=None):
         """
         Sigmoid Activation function
 
         :param selg:
         :param agg:
+        :param out: buffer to store the result in (can be agg itself)
         :return:
         """
-        return activations.sigmoid(agg)
+        return activations.sigmoid(agg, out=out)
 
     def back(self, out_errors, input_vals, update_weights=True):
         """
@@ -36,23 +43,25 @@ class LSigmoid(Layer):
 
         :param out_errors: {arrray like}
 
-            error gradients at the post activation of the layer.
+            error gradients at the post activation of the layer. Of shape
+            (out_size,) for a single example, or (batch, out_size) for a
+            mini-batch.
         :param input_vals:
+
+            The inputs that were fed to the layer, of shape (in_size,) or
+            (batch, in_size).
         :param update_weights:
         :return:
+
+            error gradients WRT the inputs of the layer.
         """
 
         # Gradient of errors WRT the preactivation of the layer.
-        #z = self.aggregate(input_vals)
-        z = self.preactivated_vals
+        # (z gets recomputed from the inputs if it was not stored)
+        z = self.get_preactivated_vals(input_vals)
         errors_preactivation = out_errors * activations.sigmoid_prime(z)
 
-        errors_input = self.weights.transpose().dot(errors_preactivation)
-        errors_weights = np.outer(errors_preactivation,input_vals)
-
-        if update_weights:
-            self.weights = self.weights + errors_input
-
-        return errors_input
+        return self.back_from_preactivation(errors_preactivation, input_vals,
+                                            update_weights=update_weights)
 
 
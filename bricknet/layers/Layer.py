@@ -6,6 +6,8 @@
 __author__ = 'ronny'
 
 import numpy as np
+from .. import config
+from ..optimizers import SGD
 
 ################################################################################
 #                                                                    LAYER CLASS
@@ -20,29 +22,35 @@ class Layer(object):
     TODO: Consider having a saturation warning if activated values are too high
           for a given activation function.
 
-    ISSUE: The current implementation stores the post activated values in memory.
-           THis might potentially cause memory efficiency issues.
-           - COnsider maybe only storing these during the training phase, and
-             not storing them during normal usage.
+    MEMORY MODES: How much of the forward pass is kept around for back
+           propagation is set by the `memory` argument:
 
-           - Run some tests to see which is more computationally expensive to
-             compute, the post activations, or the aggregated values (z). Store
-             which ever one involves the most computational time.
+           - "both": Fastest. Stores both the preactivated values (z) and the
+             activated values (a), each in its own buffer.
 
-           - Or maybe consider having this as a setting. Letting the user decide
-            if they want to store these values (for gains in speed, but at the
-            expense of memory useage) or if they want to not store (for minimal
-            memory useage, but slower to compute)
-              -  This could be a speed setting:
-                 1. Fastest. Stores both z, and a.
-                 2. medium. Stores one of z or a
-                 3. Slowest. Stores nothing?
+           - "activated": Stores only the activated values. The activation is
+             done in place, over the buffer of the preactivated values, so it
+             uses half the memory. If back propagation needs z, it gets
+             recomputed from the inputs, with get_preactivated_vals().
+             The activated values are stored rather than z, since they are
+             the inputs to the next layer (which need to be kept around for
+             its weight gradients anyway).
 
+           - "none": Inference only. Same single buffer as "activated", but
+             back propagation is not allowed.
+
+           The buffers are allocated on the first forward pass, and reused in
+           place on every later call with the same batch shape, so the values
+           returned by forward() get overwritten by the next call. Copy them if
+           they need to be kept.
     """
+    MEMORY_MODES = ("both", "activated", "none")
+
     # ==========================================================================
     #                                                                   __INIT__
     # ==========================================================================
-    def __init__(self, in_size=3, out_size=3, weights=None):
+    def __init__(self, in_size=3, out_size=3, weights=None, learning_rate=0.01,
+                 memory="both", optimizer=None, dtype=None):
         """
 
         :param in_size: {int}{optional}(default = 3)
@@ -60,32 +68,107 @@ class Layer(object):
         :param weights:  {numpy array}{optional} (default = 3)
 
             You can use pre-baked weights if you like.
+
+        :param learning_rate: {float}{optional}(default = 0.01)
+
+            The step size used when the weights get updated during back
+            propagation. Only used for the default optimizer (plain SGD).
+
+        :param memory: {str}{optional}(default = "both")
+
+            What values to store from the forward pass. One of "both",
+            "activated", or "none". See the MEMORY MODES notes of the class.
+
+        :param optimizer: {Optimizer}{optional}(default = None)
+
+            The optimizer used to update the weights in place, eg,
+            optimizers.Adam(). One optimizer can be shared by many layers.
+            Defaults to plain SGD with the given learning_rate.
+
+        :param dtype: {numpy dtype}{optional}(default = None)
+
+            Floating point type of the weights, and of all the values
+            calculated by the layer. Defaults to the dtype of the pre-baked
+            weights, or else the global default (see bricknet.config), which
+            is float32.
         """
         # ======================================================================
+        if dtype is None and weights is not None \
+                and np.asarray(weights).dtype.kind == "f":
+            dtype = np.asarray(weights).dtype
+        self.dtype = config.get_dtype(dtype)
+
         if weights is None:
             # Initialise Layer Dimensions to values in arguments
             self.in_size = in_size
             self.out_size = out_size
 
             # Initialise Weights to random values between 0 and 1
-            self.weights = np.random.rand(out_size, in_size)
+            self.weights = np.random.rand(out_size, in_size).astype(self.dtype)
         else:
             # Initialise Layer Dimensions based on pre-baked weights
             self.in_size = weights.shape[1]
             self.out_size = weights.shape[0]
 
             # Initialise Weights to the pre-baked values that have been entered
-            self.weights = weights
+            self.weights = np.asarray(weights, dtype=self.dtype)
+
+        if optimizer is None:
+            optimizer = SGD(learning_rate)
+        self.optimizer = optimizer
+        self._buffers = {}
+        self.set_memory(memory)
 
         # Initialise Preactivations and Activations to zeroes
         #TODO: COnsider renaming activated_vals to post_activation_vals
-        self.activated_vals = np.zeros(out_size)
-        self.preactivated_vals = np.zeros(out_size)
+        self.activated_vals = np.zeros(self.out_size, dtype=self.dtype)
+        self.preactivated_vals = np.zeros(self.out_size, dtype=self.dtype)
+
+        # Gradients of the cost WRT the weights, from the last back propagation
+        self.weight_gradients = np.zeros_like(self.weights)
 
         # Initialise Errors Gradients of post-activation to zeroes
         #self.errors = np.zeros(out_size)
 
 
+    @property
+    def learning_rate(self):
+        """ The learning rate (or schedule) of the layer's optimizer """
+        return self.optimizer.learning_rate
+
+    @learning_rate.setter
+    def learning_rate(self, value):
+        self.optimizer.learning_rate = value
+
+    # ==========================================================================
+    #                                                                 SET_MEMORY
+    # ==========================================================================
+    def set_memory(self, memory):
+        """
+        Sets the memory mode of the layer, and frees any buffers that were
+        allocated for the previous mode.
+
+        :param memory: {str} One of "both", "activated", or "none".
+        """
+        # ======================================================================
+        if memory not in self.MEMORY_MODES:
+            raise ValueError("memory must be one of {}, not {!r}".format(
+                self.MEMORY_MODES, memory))
+        self.memory = memory
+        self._buffers = {}
+
+    def _buffer(self, name, shape, dtype):
+        """
+        Returns the preallocated buffer with the given name, only allocating
+        a new one if there is none yet, or if it has a different shape or
+        dtype (eg, for a different batch size).
+        """
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buffer
+        return buffer
+
     # ==========================================================================
     #                                                                    FORWARD
     # ==========================================================================
@@ -94,7 +177,9 @@ class Layer(object):
         Performs forward propagation
         :param input: {array like object}
 
-            The values to use as inputs to this layer.
+            The values to use as inputs to this layer. Either a single example
+            as a vector of shape (in_size,), or a mini-batch of examples as a
+            2D array of shape (batch, in_size), with one example per row.
 
         :param return_val: {Boolean}
 
@@ -102,38 +187,90 @@ class Layer(object):
             values silently.
 
         :return:{array}
-            The Output value (only if return_val = True)
+            The Output value (only if return_val = True). Has shape (out_size,)
+            for a single example, or (batch, out_size) for a mini-batch.
+
+            NOTE: This is the layer's own buffer, which gets overwritten by the
+                  next call to forward().
         """
         # ======================================================================
-        self.preactivated_vals = self.aggregate(input)
-        agg = self.preactivated_vals
-        self.activated_vals = self.activate(agg)
+        input = np.asarray(input, dtype=self.dtype)
+        shape = input.shape[:-1] + (self.out_size,)
+        dtype = self.dtype
+
+        if self.memory == "both":
+            agg = self.aggregate(input, out=self._buffer("preactivated", shape,
+                                                         dtype))
+            self.preactivated_vals = agg
+            self.activated_vals = self.activate(
+                agg, out=self._buffer("activated", shape, dtype))
+        else:
+            # A single buffer. Activated in place over the preactivations.
+            agg = self.aggregate(input, out=self._buffer("activated", shape,
+                                                         dtype))
+            self.preactivated_vals = None
+            self.activated_vals = self.activate(agg, out=agg)
 
         if return_val:
             return self.activated_vals
 
 
-    def aggregate(self, input):
+    def aggregate(self, input, out=None):
         """
         A function for aggregating the raw input values.
 
-        :param input:
-        :return:
+        For a mini-batch this is a single matrix-matrix product of the
+        (batch, in_size) inputs with the transposed weights.
+
+        :param input: {array} of shape (in_size,) or (batch, in_size)
+        :param out: {array}(optional) buffer to store the result in.
+        :return: {array} of shape (out_size,) or (batch, out_size)
         """
-        return self.weights.dot(input)
+        return np.dot(input, self.weights.T, out=out)
 
-    def activate(self, agg):
+    def activate(self, agg, out=None):
         """
         A function for handling how the aggregated values are then dealt with.
 
         :param agg: {array-like}
             the raw aggregated values.
 
+        :param out: {array}(optional)
+
+            buffer to store the result in. Can be agg itself.
+
         :return:{array}
 
             The activated values
         """
-        return agg
+        if out is None or out is agg:
+            return agg
+        out[...] = agg
+        return out
+
+    # ==========================================================================
+    #                                                      GET_PREACTIVATED_VALS
+    # ==========================================================================
+    def get_preactivated_vals(self, input_vals):
+        """
+        Returns the preactivated values from the last forward pass, for use in
+        back propagation. If they were not stored (memory = "activated"), then
+        they are recomputed from the inputs.
+
+        :param input_vals: {array} the inputs that were fed to the layer.
+        :return: {array}
+        """
+        # ======================================================================
+        if self.preactivated_vals is not None:
+            return self.preactivated_vals
+        self._check_trainable()
+        return self.aggregate(input_vals)
+
+    def _check_trainable(self):
+        if self.memory == "none":
+            raise ValueError("Cannot back propagate through a layer with "
+                             "memory='none' (inference only). Use "
+                             "set_memory('both') or set_memory('activated').")
 
     def back(self, input_vals, update_weights=True):
         """
@@ -143,4 +280,58 @@ class Layer(object):
         :param update_weights:
         :return:
         """
-        return np.zeros(self.in_size)
+        return np.zeros(np.shape(input_vals))
+
+    # ==========================================================================
+    #                                                    BACK_FROM_PREACTIVATION
+    # ==========================================================================
+    def back_from_preactivation(self, errors_preactivation, input_vals,
+                                update_weights=True):
+        """
+        The part of back propagation that is shared by all layers that
+        aggregate their inputs with `aggregate()`. Given the error gradients at
+        the preactivation of the layer, it calculates the gradients WRT the
+        inputs and the weights, and optionally updates the weights.
+
+        When working with a mini-batch, each of these is one matrix-matrix
+        product, and the weight gradients are summed over all the examples in
+        the batch.
+
+        :param errors_preactivation: {array}
+
+            error gradients at the preactivation of the layer, of shape
+            (out_size,) or (batch, out_size).
+
+        :param input_vals: {array}
+
+            The inputs that were fed to the layer, of shape (in_size,) or
+            (batch, in_size).
+
+        :param update_weights: {boolean}
+
+            Should the weights be updated using the calculated gradients?
+
+        :return: {array}
+
+            error gradients WRT the inputs of the layer, of shape (in_size,) or
+            (batch, in_size).
+        """
+        # ======================================================================
+        self._check_trainable()
+        errors_input = np.dot(errors_preactivation, self.weights)
+
+        # (out_size, batch) x (batch, in_size). For a single example this is
+        # the same as np.outer(errors_preactivation, input_vals). Calculated
+        # into a buffer that gets reused on every call.
+        errors_preactivation = np.atleast_2d(
+            np.asarray(errors_preactivation, dtype=self.dtype))
+        input_vals = np.atleast_2d(np.asarray(input_vals, dtype=self.dtype))
+        self.weight_gradients = np.dot(
+            errors_preactivation.T, input_vals,
+            out=self._buffer("weight_gradients", self.weights.shape,
+                             self.dtype))
+
+        if update_weights:
+            self.optimizer.update(self.weights, self.weight_gradients)
+
+        return errors_input
@@ -1 +1,2 @@
-from LSigmoid import LSigmoid
+from .Layer import Layer
+from .LSigmoid import LSigmoid
@@ -0,0 +1,59 @@
+"""====================================================
+                    DESCRIPTION
+
+Iterating over a dataset in (shuffled) mini-batches.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+
+
+# ==============================================================================
+#                                                               ITER_MINIBATCHES
+# ==============================================================================
+def iter_minibatches(X, Y, batch_size=32, shuffle=True, seed=None, out=None):
+    """
+    Generator that yields (X_batch, Y_batch) pairs, covering every example of
+    the dataset exactly once.
+
+    When shuffling, the whole dataset is permuted once, into a pair of
+    buffers, with a single np.take() each. The batches are then contiguous
+    slices (views) of those buffers, rather than a fancy indexed copy for
+    every batch.
+
+    :param X: {2D array} inputs, one example per row.
+    :param Y: {array} outputs, one example per row.
+    :param batch_size: {int}(default = 32)
+    :param shuffle: {boolean}(default = True)
+    :param seed: {int, or numpy RandomState}(optional)
+
+        Seed (or random number generator) used for shuffling.
+
+    :param out: {tuple of arrays}(optional)
+
+        A pair of arrays, the same shapes and dtypes as X and Y, to hold the
+        shuffled copies. Pass the same ones in every epoch to avoid allocating
+        new ones each time. Allocated when not given.
+
+    :return: {generator}
+
+        NOTE: The batches are views into the shuffled buffers, so they get
+              overwritten if the same buffers are reused for the next epoch.
+    """
+    # ==========================================================================
+    X = np.asarray(X)
+    Y = np.asarray(Y)
+    n = len(X)
+
+    if shuffle:
+        random = seed if isinstance(seed, np.random.RandomState) \
+            else np.random.RandomState(seed)
+        order = random.permutation(n)
+        if out is None:
+            out = (np.empty_like(X), np.empty_like(Y))
+        X = np.take(X, order, axis=0, out=out[0])
+        Y = np.take(Y, order, axis=0, out=out[1])
+
+    for start in range(0, n, batch_size):
+        yield X[start: start + batch_size], Y[start: start + batch_size]
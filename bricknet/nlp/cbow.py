@@ -1,12 +1,34 @@
 """====================================================
                     DESCRIPTION
 
+Continuous bag of words (CBOW) model, with a full softmax output layer over
+the whole vocabulary, trained one window at a time. Only practical for small
+vocabularies. See cbow_ngg for the negative sampling and hierarchical
+softmax versions, which scale to large vocabularies.
+
+    model = SoftmaxCBOW(vec_size=100, window=[4, 4], seed=234)
+    model.fit("/tmp/corpus")
+    model.plot_cost()
+
+Importing this module has no side effects. Running it as a script trains a
+model on a text file, and plots the results:
+
+    python -m bricknet.nlp.cbow /tmp/corpus
 =======================================================
 """
 __author__ = 'ronny'
 
+import numpy as np
 
+from .. import config
+from ..callbacks import Monitor, PhaseTimer, ProgressPrinter
+from .corpus import as_sentences, encode_sentences, get_context_windows, \
+    get_window_masks, window_sizes
+from ..activations import softmax, softmax_cross_entropy
 
+# Tokens added to the vocabulary on top of the words in the corpus
+SPECIAL_WORDS = ["START", "END", "DOUBLE-QUOTE", "QUOTE", "QUESTION",
+                 "EXCLAMATION"]
 
 
 # ==============================================================================
@@ -28,7 +50,6 @@ def get_vocab_from_string(s):
 
     # TODO: use a real word tokenisation function.
     words = set(s.split())
-    words =
 
     # Clean up words
     words = {word.replace(".", "") for word in words}       # remove full stops
@@ -52,6 +73,7 @@ def get_vocab_from_sentences_list(sl):
     :param sl: {iterable of iterables of strings}
 
         List containing sentences. Each sentences being a list of strings.
+        Can also be a lazy iterable, such as a CorpusReader.
 
     :return: {set}
 
@@ -62,15 +84,15 @@ def get_vocab_from_sentences_list(sl):
     # TODO: use a real word tokenisation function.
 
     vocab = set()
-    for sentence in sentences:
-        vocab = vocab.union([word for word in sentence])
+    for sentence in sl:
+        vocab.update(sentence)
 
     return vocab
 
 # ==============================================================================
 #                                                                 WORD_VECTOR_DF
 # ==============================================================================
-def word_vector_df(vocab, vec_size = 20, orientation="cols"):
+def word_vector_df(vocab, vec_size = 20, orientation="cols", dtype=None):
     """
     Creates a dataframe of word vectors from a list or set of words as the vocab.
 
@@ -88,315 +110,404 @@ def word_vector_df(vocab, vec_size = 20, orientation="cols"):
 
         "rows" = Each word vector is a row in the dataframe
 
+    :param dtype: {numpy dtype}(optional)
+
+        Defaults to the global dtype in bricknet.config
+
     :return: {dataframe}
 
     """
+    import pandas as pd
     # TODO: check the datatype of vocab, typecaset to set to be safe.
     # initialise the word vectors to random values
-
+    dtype = config.get_dtype(dtype)
     if orientation == "rows":
-        df = np.random.rand(len(vocab), vec_size)
+        df = np.random.rand(len(vocab), vec_size).astype(dtype)
         return pd.DataFrame(df, index=vocab)
     elif orientation == "cols":
-        df = np.random.rand(vec_size, len(vocab))
+        df = np.random.rand(vec_size, len(vocab)).astype(dtype)
         return pd.DataFrame(df, columns=vocab)
     else:
         # TODO: throw an exception, error message for incorrect value entered.
         return None
 
 
-# ==============================================================================
-#                                                              CALC_HIDDEN_LAYER
-# ==============================================================================
-def calc_hidden_layer(words):
-    """
-
-    :param words: The context words
-    :return:
-    """
-    # aggregate the inputs
-    num_input_words = len(words)
-    in_vecs = in_df[words]  # Input word vectors
-    return in_vecs.sum(axis=1) / num_input_words       # Hidden layer.
-
-
-# ==============================================================================
-#                                               CALC_PREACTIVATIONS_OUTPUT_LAYER
-# ==============================================================================
-def calc_preactivations_output_layer(a):
-    """
-
-    :param a: the hidden layer node values
-    :return:
-    """
-    return out_df.dot(a)
-
-
-# ==============================================================================
-#                                                                CALC_HYPOTHESES
-# ==============================================================================
-def calc_hypotheses(z):
+################################################################################
+#                                                             SOFTMAX CBOW CLASS
+################################################################################
+class SoftmaxCBOW(object):
     """
+    CBOW model with a full softmax output layer.
 
-    :param z: the preactivations of the output layer
-    :return:
+    W_in holds one input word vector per column, of shape (vec_size,
+    vocab_size), and W_out holds one output word vector per row, of shape
+    (vocab_size, vec_size). The word of column/row i is self.words[i].
     """
-    exp_z = np.exp(z)
-    return exp_z / exp_z.sum()
-
-
-# ==============================================================================
-#                                                             TRAIN_ONE_EXAMPLE
-# ==============================================================================
-def train_one_example(context, output, alpha=0.01):
-    """
-
-    :param context: {list of strings}
-    :param output: {string}
-    :param alpha: {float}
-    :return:
-    """
-    global out_df
-    global in_df
-    words = context
-    correct_output = output
-
-    # FOrward propagation
-    a = calc_hidden_layer(words)
-    z = calc_preactivations_output_layer(a)
-    h = calc_hypotheses(z)
-
-    cost = -np.log(h[correct_output])
-
-    # Back propagation
-    G_z = h.copy()
-    G_z[correct_output]  -= 1
-    G_a = out_df.transpose().dot(G_z)
-    G_W_out = np.outer(G_z, a)
-
-
-    # update the out word matrix
-    out_df += -alpha * G_W_out
-
-    # Update teh input word matrix
-    # TODO: find out what happens when you have the same word twice in a
-    #       context.
-    inputs_update = -(1.0/len(words)) * alpha * G_a
-    in_df[words] = in_df[words].add(inputs_update, axis="rows")
-
-    return cost
-
-
-
-def trainCBOW(iterations, alpha=0.01):
-    cost = [666]*iterations     # initialise the cost over time
-    window_dims = [4,4]  # Number of words on either side of the center word
-    c_left  = window_dims[0]    # Number of context words to the left of center word
-    c_right = window_dims[1]    # Number of context words to the right of center word
-
-    #sentence = "the one and the only jones the magnificent"
-    # list of indices of sampled sentences
-    sample_indices = np.random.randint(low=0, high=len(sentences), size=iterations)
-
-    for i in range(iterations):
-        sentence_list = sentences[sample_indices[i]]
-
-        # Skips empty sentences
-        if sentence_list == []:
-            cost[i] = 333
-            continue
-
-        # Add Start and end of sentence tokens
-        sentence_list = c_left * ["START"] + sentence_list + ["END"] * c_right
-
-        # Select a random word in the sentence to be the center word
-        center_word_index = np.random.randint(low=c_left,
-                                              high=len(sentence_list) - c_right,
-                                              size=1)
-
-        #center_word_index = 5
-        center_word = sentence_list[center_word_index]
-        context = sentence_list[center_word_index - c_left: center_word_index]
-        context += sentence_list[center_word_index +1 : center_word_index + c_right +1]
-
+    # ==========================================================================
+    #                                                                   __INIT__
+    # ==========================================================================
+    def __init__(self, vec_size=100, window=[4, 4], dynamic_window=False,
+                 alpha=0.025, optimizer=None, seed=None, dtype=None):
+        """
+        :param vec_size: {int}(default = 100) size of the word vectors.
+        :param window: {int or list of two ints}(default = [4, 4])
+
+            Number of words on either side of the center word.
+
+        :param dynamic_window: {boolean}(default = False)
+
+            Randomly shrink each window, as in word2vec, so that the closer
+            context words get used more often (see corpus.get_window_masks()).
+
+        :param alpha: {float}(default = 0.025) learning rate.
+        :param optimizer: {Optimizer}(optional)
+
+            Optimizer to update the word matrices with (eg,
+            optimizers.Adam()), instead of plain SGD with alpha.
+
+        :param seed: {int}(optional) seed for the initial word vectors, for
+                     the windows sampled by fit_random_windows(), and for
+                     the dynamic windows.
+        :param dtype: {numpy dtype}(optional)
+
+            Defaults to the global dtype in bricknet.config
+        """
+        # ======================================================================
+        self.vec_size = vec_size
+        self.c_left, self.c_right = window_sizes(window)
+        self.dynamic_window = dynamic_window
+        self.alpha = alpha
+        self.optimizer = optimizer
+        self.random = np.random.RandomState(seed)
+        self.dtype = config.get_dtype(dtype)
+
+        self.words = None
+        self.word_index = None
+        self.W_in = None
+        self.W_out = None
+        self.cost = None
+
+    # ==========================================================================
+    #                                                                BUILD_VOCAB
+    # ==========================================================================
+    def build_vocab(self, sentences):
+        """
+        Creates the vocabulary from the words in the sentences, plus the
+        SPECIAL_WORDS, and initialises the word matrices with random values
+        between 0 and 1.
+
+        :param sentences: {iterable of iterables of strings}
+        """
+        # ======================================================================
+        vocab = get_vocab_from_sentences_list(sentences)
+        vocab.update(SPECIAL_WORDS)
+
+        self.words = sorted(vocab)
+        self.word_index = {word: i for i, word in enumerate(self.words)}
+        self.start_index = self.word_index["START"]
+        self.end_index = self.word_index["END"]
+
+        vocab_size = len(self.words)
+        self.W_in = self.random.rand(self.vec_size,
+                                     vocab_size).astype(self.dtype)
+        self.W_out = self.random.rand(vocab_size,
+                                      self.vec_size).astype(self.dtype)
+
+    def _encode(self, corpus):
+        """
+        Builds the vocabulary (the first time only), and returns the integer
+        encoded corpus as (tokens, offsets).
+        """
+        sentences = as_sentences(corpus)
+        if self.words is None:
+            self.build_vocab(sentences)
+        return encode_sentences(sentences, self.word_index)
+
+    def _window_words(self, contexts):
+        """
+        The unique words of each context window, leaving out the words
+        beyond the randomly shrunk windows, if using dynamic windows.
+        """
         # TODO: this is a hack at the moment to stop dupicate words.
         #       because i dont know what duplicate words do. Need to test if it
         #       will behave properly with duplicates.
-        window_words = list(set(context))
-
-        cost[i] = train_one_example(window_words, center_word, alpha)
-
-    print "DOne training word vectors"
-    return cost
-
-
-
-
-
-def trainCBOW2(alpha=0.01):
-    cost = [666]*iterations     # initialise the cost over time
-    window_dims = [4,4]  # Number of words on either side of the center word
-    c_left  = window_dims[0]    # Number of context words to the left of center word
-    c_right = window_dims[1]    # Number of context words to the right of center word
-
-    num_sentences = len(sentences)
-
-    # A dictionary to keep track of percentage completed printout
-    # keys are the sentence number
-    # values are the percentage completed by that point
-    progress = np.linspace(0, num_sentences, num=101)
-    progress = {progress[i]: i for i in range(101)}
-    progress_keys = progress.keys()
-
-    for i in range(num_sentences):
-        # print progress
-        if i in progress_keys:
-            print "   {} % complete".format(progress[i])
-
-        sentence_list = sentences[i]
-
-        # Skips empty sentences
-        if sentence_list == []:
-            cost[i] = 333
-            continue
-
-        # Add Start and end of sentence tokens
-        sentence_list = c_left * ["START"] + sentence_list + ["END"] * c_right
-
-
-
-        for center_word_index in range(c_left, len(sentence_list) - c_right):
-            center_word = sentence_list[center_word_index]
-            context = sentence_list[center_word_index - c_left: center_word_index]
-            context += sentence_list[center_word_index +1 : center_word_index + c_right +1]
-
-            # TODO: this is a hack at the moment to stop dupicate words.
-            #       because i dont know what duplicate words do. Need to test if it
-            #       will behave properly with duplicates.
-            window_words = list(set(context))
-
-            # TODO: cost calculation is wrong. It is just giving the last
-            #       center word for the sentence. Should average the
-            #       cost for each sentence. 
-            cost[i] = train_one_example(window_words, center_word, alpha)
-
-    print "DOne training word vectors"
-    return cost
-
-
+        if not self.dynamic_window:
+            return [np.unique(context) for context in contexts]
+        masks = get_window_masks(len(contexts), self.c_left, self.c_right,
+                                 random_state=self.random)
+        return [np.unique(context[mask])
+                for context, mask in zip(contexts, masks)]
+
+    # ==========================================================================
+    #                                                          CALC_HIDDEN_LAYER
+    # ==========================================================================
+    def calc_hidden_layer(self, words):
+        """
+
+        :param words: {array of ints} The indices of the context words
+        :return:
+        """
+        # aggregate the inputs
+        num_input_words = len(words)
+        in_vecs = self.W_in[:, words]  # Input word vectors
+        return in_vecs.sum(axis=1) / num_input_words       # Hidden layer.
+
+    # ==========================================================================
+    #                                           CALC_PREACTIVATIONS_OUTPUT_LAYER
+    # ==========================================================================
+    def calc_preactivations_output_layer(self, a):
+        """
+
+        :param a: the hidden layer node values
+        :return:
+        """
+        return self.W_out.dot(a)
+
+    # ==========================================================================
+    #                                                            CALC_HYPOTHESES
+    # ==========================================================================
+    def calc_hypotheses(self, z):
+        """
+
+        :param z: the preactivations of the output layer
+        :return:
+        """
+        return softmax(z)
+
+    # ==========================================================================
+    #                                                          TRAIN_ONE_EXAMPLE
+    # ==========================================================================
+    def train_one_example(self, context, output, timer=None):
+        """
+
+        :param context: {array of ints} indices of the context words
+        :param output: {int} index of the correct output word
+        :param timer: {PhaseTimer}(optional)
+
+            If provided, the time spent on the "forward", "backward" and
+            "update" phases is added to it.
+        :return: {float} the cost
+        """
+        # ======================================================================
+        if timer is None:
+            timer = PhaseTimer()
+        W_in = self.W_in
+        W_out = self.W_out
+        words = context
+        correct_output = output
+
+        # FOrward propagation
+        a = self.calc_hidden_layer(words)
+        z = self.calc_preactivations_output_layer(a)
+
+        # Cost, and the gradient at the output layer (hypotheses - one hot of
+        # the correct output), calculated stably in place, in the buffer of z.
+        cost, G_z = softmax_cross_entropy(z, correct_output, out=z)
+        timer.lap("forward")
+
+        # Back propagation
+        G_a = W_out.transpose().dot(G_z)
+        G_W_out = np.outer(G_z, a)
+        timer.lap("backward")
+
+        if self.optimizer is not None:
+            # The optimizer updates in place. W_in has one word per column, so
+            # its words are the rows of the W_in.T view.
+            self.optimizer.update(W_out, G_W_out)
+            self.optimizer.update_rows(W_in.T, words,
+                                       np.tile(G_a / len(words),
+                                               (len(words), 1)))
+            timer.lap("update")
+            return cost
+
+        # update the out word matrix
+        W_out += -self.alpha * G_W_out
+
+        # Update teh input word matrix
+        # TODO: find out what happens when you have the same word twice in a
+        #       context.
+        inputs_update = -(1.0/len(words)) * self.alpha * G_a
+        W_in[:, words] += inputs_update[:, np.newaxis]
+        timer.lap("update")
+
+        return cost
+
+    # ==========================================================================
+    #                                                                        FIT
+    # ==========================================================================
+    def fit(self, corpus, callbacks=None):
+        """
+        Trains on every word of every sentence, one sentence at a time.
+
+        :param corpus: {str, or iterable of iterables of strings}
+
+            Path to a text file, or the sentences (each one a list of words).
+            The vocabulary is built from the corpus the first time the model
+            is fit, so the sentences need to be re-iterable (eg, a list).
+
+        :param callbacks: {list of Callback objects}(optional)
+
+            Reported to after every sentence (see the bricknet.callbacks
+            module). Defaults to printing the progress every 1% of the
+            sentences.
+
+        :return: {SoftmaxCBOW} self. The average cost of the words in each
+                 sentence (NaN for empty sentences) is kept in self.cost
+        """
+        # ======================================================================
+        tokens, offsets = self._encode(corpus)
+        num_sentences = len(offsets) - 1
+        cost = [np.nan]*num_sentences     # initialise the cost over time
+
+        if callbacks is None:
+            callbacks = [ProgressPrinter(every=max(num_sentences // 100, 1))]
+        monitor = Monitor(callbacks)
+        monitor.begin(total_batches=int(np.count_nonzero(np.diff(offsets))),
+                      num_words=len(tokens),
+                      window=[self.c_left, self.c_right],
+                      dynamic_window=self.dynamic_window)
+        timer = monitor.timer
+
+        for i in range(num_sentences):
+            # Positions of the words of this sentence in the tokens array
+            positions = np.arange(offsets[i], offsets[i+1])
+
+            # Skips empty sentences
+            if len(positions) == 0:
+                continue
+
+            # Context word indices for every center word in the sentence, with
+            # the start and end of sentence padding done by index arithmetic.
+            contexts = get_context_windows(tokens, offsets, positions,
+                                           self.c_left, self.c_right,
+                                           self.start_index, self.end_index)
+            windows = self._window_words(contexts)
+            timer.lap("windows")
+
+            sentence_cost = 0.0
+            for center_word, window_words in zip(tokens[positions], windows):
+                sentence_cost += self.train_one_example(window_words,
+                                                        center_word,
+                                                        timer=timer)
+            cost[i] = sentence_cost / len(positions)
+            lr = self.alpha if self.optimizer is None else None
+            monitor.batch_end(cost[i], examples=len(positions),
+                              words=len(positions), learning_rate=lr)
+
+        monitor.end()
+        self.cost = cost
+        return self
+
+    # ==========================================================================
+    #                                                         FIT_RANDOM_WINDOWS
+    # ==========================================================================
+    def fit_random_windows(self, corpus, iterations):
+        """
+        Trains on `iterations` windows, centered on randomly sampled words of
+        the corpus.
+
+        :param corpus: {str, or iterable of iterables of strings}
+        :param iterations: {int} number of windows to train on.
+        :return: {SoftmaxCBOW} self, with the cost of each window in self.cost
+        """
+        # ======================================================================
+        tokens, offsets = self._encode(corpus)
+        cost = [np.nan]*iterations     # initialise the cost over time
+
+        # Only sample from non-empty sentences
+        sentence_lengths = np.diff(offsets)
+        non_empty = np.flatnonzero(sentence_lengths)
+
+        # list of indices of sampled sentences
+        sample_indices = non_empty[self.random.randint(low=0,
+                                                       high=len(non_empty),
+                                                       size=iterations)]
+
+        # Select a random word in each sentence to be the center word
+        center_positions = offsets[sample_indices] + (
+            self.random.random_sample(iterations)
+            * sentence_lengths[sample_indices]).astype(int)
+
+        # Context word indices for all the sampled center words. Padding with
+        # the start and end of sentence tokens is done by index arithmetic.
+        contexts = get_context_windows(tokens, offsets, center_positions,
+                                       self.c_left, self.c_right,
+                                       self.start_index, self.end_index)
+
+        windows = self._window_words(contexts)
+
+        for i in range(iterations):
+            center_word = tokens[center_positions[i]]
+            cost[i] = self.train_one_example(windows[i], center_word)
+
+        self.cost = cost
+        return self
+
+    # ==========================================================================
+    #                                                                  PLOT_COST
+    # ==========================================================================
+    def plot_cost(self, ax=None):
+        """
+        Plots the cost over time (needs matplotlib).
+
+        :param ax: {matplotlib Axes}(optional) axes to plot on.
+        :return: {matplotlib Axes}
+        """
+        # ======================================================================
+        import matplotlib.pyplot as plt
+        if ax is None:
+            fig, ax = plt.subplots()
+        ax.plot(range(len(self.cost)), self.cost)
+        return ax
+
+    # ==========================================================================
+    #                                                                 PLOT_WORDS
+    # ==========================================================================
+    def plot_words(self, words, ax=None):
+        """
+        Plots the words in 2D, using the two directions of the biggest
+        singular values of the combined word vectors (needs matplotlib).
+
+        :param words: {list of strings} the words to plot.
+        :param ax: {matplotlib Axes}(optional) axes to plot on.
+        :return: {matplotlib Axes}
+        """
+        # ======================================================================
+        import matplotlib.pyplot as plt
+
+        # DIMENTIONSLITY REDUCTION
+        # The first two values of the U matrix correspond to the 2 biggest
+        # singlular values.
+        U, s, Vh = np.linalg.svd(self.W_out + self.W_in.transpose(),
+                                 full_matrices=False)
+        vals = U[[self.word_index[word] for word in words], :2]
+
+        if ax is None:
+            fig, ax = plt.subplots()
+        ax.scatter(vals[:, 0], vals[:, 1], c="#319fe5", s=100, alpha=0.7,
+                   linewidths=0)
+        for label, (x, y) in zip(words, vals):
+            ax.annotate(label, (x, y))
+        return ax
 
 
 # ##############################################################################
-#                                                                          SETUP
+#                                                                           MAIN
 # ##############################################################################
-file = "/tmp/corpus"
-
-with open(file, "r") as textFile:
-    corpus = textFile.read()
-
-
-# ------------------------------------------------------------------------------
-#                                                                 Clean up words
-# ------------------------------------------------------------------------------
-corpus = corpus.lower()  # lowercase
-corpus = corpus.replace(",", "")  # remove commas
-corpus = corpus.replace("!", "")  # remove exclamation
-corpus = corpus.replace("?", "")  # remove qmark
-corpus = corpus.replace(";", "")  # remove semi colon
-corpus = corpus.replace(":", "")  # remove colon
-corpus = corpus.replace(")", "")  # remove
-corpus = corpus.replace("(", "")  # remove
-corpus = corpus.replace("]", "")  # remove
-corpus = corpus.replace("[", "")  # remove
-corpus = corpus.replace("{", "")  # remove
-corpus = corpus.replace("}", "")  # remove
-corpus = corpus.replace("`", "")  # remove
-corpus = corpus.replace("?", " QUESTION ")  # remove
-corpus = corpus.replace("!", " EXCALMATION ")  # remove
-
-corpus = corpus.replace('"', " DOUBLE-QUOTE ")  # replace double quotes
-corpus = corpus.replace("'", " QUOTE ")  # replace single quotes
-print "Done cleaning up corpus"
-
-
-
-# ------------------------------------------------------------------------------
-#                                                          Sentence Segmentation
-# ------------------------------------------------------------------------------
-# Crude sentence segmentation.
-# TODO: use nltk to do a better job
-sentences = corpus.split(".")
-sentences = [sentence.split() for sentence in sentences]
-sentences  = [s for s in sentences if s != ""] # remove empty sentences
-
-print "done creating sentences list"
-
-
-
-# ------------------------------------------------------------------------------
-#                                                                   Create Vocab
-# ------------------------------------------------------------------------------
-vocab = get_vocab_from_sentences_list(sentences)
-vocab.add("START")
-vocab.add("END")
-vocab.add("DOUBLE-QUOTE")
-vocab.add("QUOTE")
-vocab.add("QUESTION")
-vocab.add("EXCLAMATION")
-print "done creating vocab"
-
-
-
-# ------------------------------------------------------------------------------
-#                                              Create the word vector dataframes
-# ------------------------------------------------------------------------------
-word_vec_size = 100
-np.random.seed(234)
-in_df = word_vector_df(vocab, word_vec_size, orientation="cols")
-out_df = word_vector_df(vocab, word_vec_size, orientation="rows")
-print "done initialising word dataframes"
-
-
-# ------------------------------------------------------------------------------
-#                                                                       Run CBOW
-# ------------------------------------------------------------------------------
-#cost = trainCBOW(10000, alpha=0.025)
-cost = trainCBOW2(alpha=0.025)
-
-
-# ------------------------------------------------------------------------------
-#                                                        Plot the Cost over time
-# ------------------------------------------------------------------------------
-import matplotlib.pyplot as plt
-
-fig, ax = plt.subplots()
-ax.plot(range(len(cost)), cost)
-
-
-# ------------------------------------------------------------------------------
-#                                                              PLOT WORD VECTORS
-# ------------------------------------------------------------------------------
-# DIMENTIONSLITY REDUCTION
-# The first two values of the U matrix correspond to the 2 biggest singlular values.
-U, s, Vh = np.linalg.svd(out_df + in_df.transpose(), full_matrices=False)
-#U, s, Vh = np.linalg.svd(out_df, full_matrices=False)
-SVD_out = pd.DataFrame(U, index=out_df.index)
-#SVD_out = out_df + in_df
-
-
-words_to_plot = ["has", "had", "have", "does", "did", "do",
-                 "run", "ran", "runs", "running",
-                 "read", "reading",
-                 "speaking", "spoke", "speak",
-                 "he", "she", "her", "his"]
-
-#in_df[""]
-
-vals = SVD_out.loc[words_to_plot, [0,1]]
-
-fig, ax = plt.subplots()
-ax.scatter(vals[0],vals[1], c="#319fe5", s=100, alpha=0.7, linewidths=0)
-
-for label in vals.index:
-    ax.annotate(label, (vals.loc[label][0],vals.loc[label][1]))
-
+if __name__ == "__main__":
+    import sys
+    import matplotlib.pyplot as plt
+
+    file = sys.argv[1] if len(sys.argv) > 1 else "/tmp/corpus"
+    model = SoftmaxCBOW(vec_size=100, window=[4, 4], alpha=0.025, seed=234)
+    model.fit(file)
+    print("DOne training word vectors")
+
+    model.plot_cost()
+    words_to_plot = ["has", "had", "have", "does", "did", "do",
+                     "run", "ran", "runs", "running",
+                     "read", "reading",
+                     "speaking", "spoke", "speak",
+                     "he", "she", "her", "his"]
+    model.plot_words([w for w in words_to_plot if w in model.word_index])
+    plt.show()
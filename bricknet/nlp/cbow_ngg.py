@@ -6,8 +6,20 @@
 __author__ = 'ronny'
 
 
-import pandas as pd
-np = pd.np
+import numpy as np
+
+from .. import config
+from ..callbacks import Monitor, PhaseTimer
+from ..activations import sigmoid_and_log
+from .corpus import window_sizes, iter_windows, subsample_corpus, \
+    count_words, get_window_masks
+from .huffman import hierarchical_softmax
+from .sampling import AliasSampler
+from .producer import BatchProducer
+
+# The most updates' worth of gradients that one row of the word matrices can
+# get from a single batch by default (see apply_row_gradients())
+MAX_UPDATES = 50
 
 
 # ==============================================================================
@@ -92,17 +104,74 @@ def get_sampling_distribution(c, power=3/4.0):
     # ==========================================================================
 
     # Typecast to a numpy array if it is not already an array or a pandas series
-    if not isinstance(c, (np.ndarray, pd.Series)):
+    if not isinstance(c, np.ndarray) and not hasattr(c, "index"):
         c = np.array(c)
 
     p = c**float(power)  # Raise unigram counts to the 3/4
     return  p/p.sum()    # Normalize to make values add up to 1
 
 
+# ==============================================================================
+#                                                         GET_KEEP_PROBABILITIES
+# ==============================================================================
+def get_keep_probabilities(c, sample=1e-3, total=None):
+    """
+    Takes an array of unigram counts for each word in the vocabulary, and
+    returns the probability of keeping each occurrence of those words when
+    subsampling the frequent words, as in Mikolov et al 2013.
+
+    Words with a frequency well below `sample` are always kept, while very
+    frequent words (eg, "the") get most of their occurrences discarded.
+
+    :param c: {array-like}
+
+        The unigram counts for the words in the vocabulary (in the same order
+        as the words in the vocabulary)
+
+    :param sample: {float}(default = 1e-3)
+
+        The subsampling threshold. Smaller values discard more. Useful values
+        are in the range 1e-5 to 1e-3.
+
+    :param total: {number}(optional)
+
+        The total number of words that the frequencies are relative to.
+        Defaults to the sum of c. Use it to leave out counts that are not
+        real words of the corpus, eg, the "START" and "END" padding.
+
+    :return:
+
+        An array of the same length as c, calculated as in the original
+        word2vec implementation:
+
+            (sqrt(f / sample) + 1) * sample / f
+
+        where f is the relative frequency of each word, capped at 1.
+
+    :references:
+
+        - Mikolov, T., Sutskever, I., Chen, K., Corrado, G. S., and Dean, J.
+          (2013b). Distributed representations of words and phrases and their
+          compositionality. In Advances in Neural Information Processing
+          Systems, pages 3111-3119
+    """
+    # ==========================================================================
+    # Typecast to a numpy array if it is not already an array or a pandas series
+    if not isinstance(c, np.ndarray) and not hasattr(c, "index"):
+        c = np.array(c)
+
+    if total is None:
+        total = c.sum()
+    f = c / float(total)
+    with np.errstate(divide="ignore"):
+        keep = (np.sqrt(f / sample) + 1) * (sample / f)
+    return np.minimum(keep, 1.0)
+
+
 # ==============================================================================
 #                                                             GET_UNIGRAM_COUNTS
 # ==============================================================================
-def get_unigram_counts(sentences, window=8):
+def get_unigram_counts(sentences, window=8, workers=1):
     """
     Takes an iterable of iterables containing individual words, and returns a
     pandas Series contianing the words as indices, and the number of times
@@ -111,7 +180,9 @@ def get_unigram_counts(sentences, window=8):
     :param sentences: {iterable of iterables of strings}
 
         Can be something like an outer list encapsulating all sentences. Each
-        sentence is a list of strings representing each word.
+        sentence is a list of strings representing each word. The sentences
+        are consumed lazily, so this can also be a generator, or a
+        corpus.CorpusReader that streams the sentences from a file.
 
     :param window {list, or int}
 
@@ -123,47 +194,28 @@ def get_unigram_counts(sentences, window=8):
 
         default = 8
 
+    :param workers: {int}(default = 1)
+
+        number of processes to count with, when the sentences come from a
+        file (a path or a corpus.CorpusReader). See corpus.count_words()
+
     :return: {pandas.Series}
 
         returns a pandas Series of the unigram word counts.
     """
     # ==========================================================================
-    unigram = {}        # Tallies the unigram counts of words in corpus
-
-    # --------------------------------------------------------------------------
-    #                                                         handle window size
-    # --------------------------------------------------------------------------
-    if isinstance(window, (int, long)):
-        c_left  = window / 2
-        c_right = c_left
-    elif (isinstance(window, list)
-    and (len(window) > 1)
-    and isinstance(window[0], (int, long))
-    and isinstance(window[1], (int, long))):
-        c_left  = window[0]
-        c_right = window[1]
-    else:
-        msg = "\n  get_unigram_counts() expects the `window` argument to be an"\
-              "\n  integer, or a list of two integers."
-        raise ValueError(msg)
-
-    # --------------------------------------------------------------------------
-    #                                                     Loop through sentences
-    # --------------------------------------------------------------------------
-    for sentence in sentences:
-        sentence = pad_sentence_list(sentence, c_left, c_right)
-        for word in sentence:
-            # create a tally of the words. If word does not already exist in the
-            # dictionary, then create a new element, and assign it the value of 1.
-            unigram[word] = unigram.get(word, 0) + 1
-
+    import pandas as pd
+    # The START and END padding is counted arithmetically, from the number of
+    # sentences, rather than by padding each sentence.
+    unigram = count_words(sentences, window=window, workers=workers)
     return pd.Series(unigram)
 
 
 # ==============================================================================
 #                                                                CREATE_VOCAB_DF
 # ==============================================================================
-def create_vocab_df(sentences, window=8, p_power=(3/4.0)):
+def create_vocab_df(sentences, window=8, p_power=(3/4.0), sample=1e-3,
+                    workers=1):
     """
 
     :param sentences: {iterable of iterables of strings}
@@ -184,6 +236,16 @@ def create_vocab_df(sentences, window=8, p_power=(3/4.0)):
 
         default value is (3/4.0)
 
+    :param sample: {float}(default = 1e-3)
+
+        subsampling threshold used for the `keep` column, see the sample
+        argument in get_keep_probabilities() function.
+
+    :param workers: {int}(default = 1)
+
+        number of processes to count the words with, see
+        get_unigram_counts()
+
 
     :return: {pandas.DataFrame}
 
@@ -197,12 +259,22 @@ def create_vocab_df(sentences, window=8, p_power=(3/4.0)):
 
                      - Used for negative sampling.
 
+            keep   : the probability of keeping each occurence of the word
+                     when subsampling the frequent words.
+
             words  : An intuitive way to retreive the words in the vocabulary.
     """
     # ==========================================================================
-    u = get_unigram_counts(sentences, window=window)
+    import pandas as pd
+    u = get_unigram_counts(sentences, window=window, workers=workers)
     p = get_sampling_distribution(u)
-    vocab = pd.DataFrame({"counts":u, "p":p, "i":range(len(u))})
+
+    # The frequencies for subsampling are relative to the real words only,
+    # and the padding is never subsampled
+    padding = u.index.isin(["START", "END"])
+    keep = get_keep_probabilities(u, sample=sample, total=u[~padding].sum())
+    keep[padding] = 1.0
+    vocab = pd.DataFrame({"counts":u, "p":p, "keep":keep, "i":range(len(u))})
     vocab["words"] = vocab.index  # technically redundant, but intuitively more
                                   # sensical to retreive the words using
                                   # vocab.words (or vocab["words"] than using
@@ -213,16 +285,28 @@ def create_vocab_df(sentences, window=8, p_power=(3/4.0)):
 # ==============================================================================
 #                                                             GET_SAMPLE_INDICES
 # ==============================================================================
-def get_sample_indices(vocab, k):
+def get_sample_indices(vocab, k, sampler=None):
     """
     Takes a vocabulary dataframe and returns the indices of k randomly sampled
     words.
 
     :param vocab:
-    :param k:
+    :param k: {int, or tuple of ints}
+
+        number of samples (or shape of the array of samples) to return.
+
+    :param sampler: {AliasSampler}(optional)
+
+        A sampler built once from the vocabulary, eg using
+        AliasSampler.from_vocab(vocab). If provided, then samples are drawn
+        in O(1) time per sample (WITH replacement) from it, instead of the
+        O(vocab_size) time per call of np.random.choice().
+
     :return:
     """
     # ==========================================================================
+    if sampler is not None:
+        return sampler.sample(k)
     return np.random.choice(vocab.i, size=k, p=vocab.p, replace=False)
 
 
@@ -234,9 +318,9 @@ def get_word_indices(vocab, words):
     takes a word string, or a list of strings,  and returns the index(es) of the
     word(s).
 
-    :param vocab: {DataFrame}
+    :param vocab: {DataFrame, or vocab.Vocab}
 
-        Vacabulary dataframe
+        Vacabulary dataframe, or Vocab object
 
     :param words: {string, or list of strings}
 
@@ -253,7 +337,8 @@ def get_word_indices(vocab, words):
 # ==============================================================================
 #                                                                   WORDS_MATRIX
 # ==============================================================================
-def words_matrix(vocab_size, vec_size = 20, orientation="cols", scale=1):
+def words_matrix(vocab_size, vec_size = 20, orientation="cols", scale=1,
+                 dtype=None):
     """
     Creates a matrix (array) for the word vectors.
 
@@ -276,16 +361,22 @@ def words_matrix(vocab_size, vec_size = 20, orientation="cols", scale=1):
         by default it returns weights as random values between 0 and 1. You
         can scale it to be random numbers between 0 and another number.
 
+    :param dtype: {numpy dtype}(optional)
+
+        Defaults to the global dtype in bricknet.config
 
     :return: {array}
 
     """
     # ==========================================================================
+    dtype = config.get_dtype(dtype)
     if orientation == "rows":
-        return (np.random.rand(vocab_size, vec_size)-0.5) * scale
+        W = (np.random.rand(vocab_size, vec_size)-0.5) * scale
+        return W.astype(dtype)
         #return pd.DataFrame(df, index=vocab)
     elif orientation == "cols":
-        return  (np.random.rand(vec_size, vocab_size) - 0.5) * scale
+        W = (np.random.rand(vec_size, vocab_size) - 0.5) * scale
+        return W.astype(dtype)
         #return pd.DataFrame(df, columns=vocab)
     else:
         msg = '\n  words_matrix() expects `orientation` argument to '\
@@ -304,15 +395,15 @@ def sigmoid(x):
     :return: {float}
     """
     # ==========================================================================
-    #TODO: Check out http://stackoverflow.com/a/25164452 for potential
-    #      optimisation of the sigmoid function.
+    # NOTE: The trainers use activations.sigmoid_and_log() instead, which
+    #       does not overflow for large values of x.
     return 1 / (1 + np.exp(-x))
 
 
 # ==============================================================================
 #                                                               TRAIN_ONE_WINDOW
 # ==============================================================================
-def train_one_window(input_words, y, k=5, alpha=0.01):
+def train_one_window(input_words, y, k=5, alpha=0.01, sigmoid_fn=None):
     """
 
     :param input_words: {list, or array-like of strings}
@@ -331,9 +422,15 @@ def train_one_window(input_words, y, k=5, alpha=0.01):
 
         learning rate.
 
+    :param sigmoid_fn: {function}(default = activations.sigmoid_and_log)
+
+        Function that returns (sigmoid(z), log(sigmoid(z))).
+
     :return:
     """
     global W_in, W_out, vocab
+    if sigmoid_fn is None:
+        sigmoid_fn = sigmoid_and_log
     correct_word = y
 
     # ==========================================================================
@@ -367,15 +464,18 @@ def train_one_window(input_words, y, k=5, alpha=0.01):
     # --------------------------------------------------------------------------
     #                                                             Calculate Cost
     # --------------------------------------------------------------------------
-    # TODO: optimise this by vetcorising and caching sigmoid(z) and taking
-    #       advantage of the property sigmoid(-z) = 1 - sigmoid(z)
-    J = -np.log(sigmoid(z[0])) - np.log(sigmoid(-z[1:])).sum()
+    # Flip the sign of the negative samples, so that, using
+    # sigmoid(-z) = 1 - sigmoid(z), the cost and the gradients both come from
+    # a single evaluation of the sigmoid.
+    z[1:] *= -1
+    s, log_s = sigmoid_fn(z)
+    J = -log_s.sum()
 
     # --------------------------------------------------------------------------
     #                                                                  Gradients
     # --------------------------------------------------------------------------
-    G_z = sigmoid(z)    # Gradient at the output layer
-    G_z[0] += -1        # Update gradient for correct word
+    G_z = 1 - s         # Gradient at the output layer for negative samples
+    G_z[0] *= -1        # Update gradient for correct word
 
     G_W_out = np.outer(G_z, a)                     # Gradient of output word vectors
     G_a = output_word_vectors.transpose().dot(G_z) # Gradient of hidden layer a
@@ -394,3 +494,543 @@ def train_one_window(input_words, y, k=5, alpha=0.01):
 
     return J
 
+
+# ==============================================================================
+#                                                            APPLY_ROW_GRADIENTS
+# ==============================================================================
+def apply_row_gradients(W, rows, grads, alpha=0.01, optimizer=None,
+                        max_updates=None, updates=None):
+    """
+    Applies sparse gradients to some of the rows of a word matrix, in place.
+
+    Without an optimizer, this is a plain SGD step done as a scatter-add
+    (np.add.at), so rows that appear several times get all of their updates.
+    With an optimizer, the gradients of repeated rows are summed, and the
+    optimizer's update_rows() is used instead (and alpha is ignored).
+
+    All the gradients of a batch are calculated from the same (stale) values
+    of the rows, so a row that appears many times in a batch (eg, "START",
+    "END", the frequent words, or the root of a Huffman tree) would take one
+    huge step, where one example at a time would have taken many small ones
+    that level off. max_updates caps how many updates' worth of gradients any
+    one row gets from a batch: the gradients of a row with more than that are
+    scaled down, so that the row moves by max_updates times their average.
+
+    :param W: {2D array} word matrix, one word per row. Updated in place.
+    :param rows: {array of ints} the rows that have gradients (any shape).
+    :param grads: {array}
+
+        the gradients for those rows, of shape rows.shape + (vec_size,), or
+        anything that broadcasts to it.
+
+    :param alpha: {float} learning rate (for plain SGD).
+    :param optimizer: {Optimizer}(optional) eg, optimizers.AdaGrad()
+    :param max_updates: {float}(optional)
+
+        The most updates a row can get from one call. None for no limit.
+
+    :param updates: {array}(optional)
+
+        The number of updates that each of the gradients stands for, with
+        the same shape as rows (or anything that broadcasts to it). eg, for
+        a gradient that is the sum over several (center, context) pairs.
+        Defaults to 1 each.
+    """
+    # ==========================================================================
+    if max_updates is not None:
+        grads = grads * _update_scales(rows, max_updates, updates,
+                                       dtype=W.dtype)[..., np.newaxis]
+    if optimizer is None:
+        np.add.at(W, rows, (-alpha) * grads)
+    else:
+        shape = np.shape(rows) + (W.shape[1],)
+        grads = np.broadcast_to(grads, shape).reshape(-1, W.shape[1])
+        optimizer.update_rows(W, np.ravel(rows), grads)
+
+
+def _update_scales(rows, max_updates, updates=None, dtype=None):
+    """
+    How much to scale the gradient of each element of rows by, so that no
+    row gets more than max_updates updates in total. See
+    apply_row_gradients()
+    """
+    rows = np.asarray(rows)
+    if updates is None:
+        updates = np.ones(rows.shape)
+    updates = np.broadcast_to(updates, rows.shape).ravel()
+    totals = np.bincount(rows.ravel(), weights=updates)
+    scales = max_updates / np.maximum(totals, max_updates)
+    return scales[rows].astype(dtype)
+
+
+# ==============================================================================
+#                                                              CONTEXT_GRADIENTS
+# ==============================================================================
+def context_gradients(context_indices, G_a, mask=None):
+    """
+    Spreads the gradients WRT the hidden layer (the mean of the context word
+    vectors) evenly over the context words of each window.
+
+    :param context_indices: {2D array of ints} shape (batch, num_context_words)
+    :param G_a: {array} gradients WRT the hidden layer, shape (batch, vec_size)
+                or (batch, 1, vec_size)
+    :param mask: {2D boolean array}(optional)
+
+        Same shape as context_indices. The context words where it is False
+        are left out.
+
+    :return: {tuple}
+
+        (rows, grads) to pass to apply_row_gradients()
+    """
+    # ==========================================================================
+    G_a = G_a.reshape(len(G_a), 1, -1)
+    if mask is None:
+        return context_indices, G_a / context_indices.shape[1]
+    # (Keeps the dtype of G_a, as the scatter-add of mismatched dtypes is slow)
+    num_words = mask.sum(axis=1).astype(G_a.dtype)
+    grads = np.broadcast_to(G_a / num_words[:, np.newaxis, np.newaxis],
+                            context_indices.shape + G_a.shape[2:])
+    return context_indices[mask], grads[mask]
+
+
+# ==============================================================================
+#                                                                    TRAIN_BATCH
+# ==============================================================================
+def train_batch(context_indices, target_indices, W_in, W_out, vocab, k=5,
+                alpha=0.01, sampler=None, tree=None, optimizer=None,
+                sigmoid_fn=None, timer=None, negatives=None, mask=None,
+                max_updates=MAX_UPDATES):
+    """
+    Vectorised version of train_one_window() that trains on many context
+    windows in one go, using integer word indices instead of word strings.
+
+    The context and sample vectors for every window are gathered in one go,
+    the sigmoid gradients for all of them are calculated in a single pass,
+    and the updates are applied to the word matrices with scatter-adds
+    (np.add.at), so that words that appear several times in the batch get
+    all of their updates accumulated.
+
+    NOTE: Unlike train_one_window(), both word matrices are expected to have
+          one word vector per row (ie, created with orientation="rows"). If
+          W_in is stored with one word per column, then pass in W_in.T
+
+    :param context_indices: {2D array of ints}
+
+        Array of shape (batch, num_context_words), where each row contains the
+        indices of the words in the context of one window.
+
+    :param target_indices: {array of ints}
+
+        Array of shape (batch,) with the index of the correct output word for
+        each window.
+
+    :param W_in: {2D array}
+
+        The input word matrix, of shape (vocab_size, vec_size). Updated in
+        place.
+
+    :param W_out: {2D array}
+
+        The output word matrix, of shape (vocab_size, vec_size). Updated in
+        place.
+
+    :param vocab: {DataFrame}
+
+        Vocabulary dataframe, as created by create_vocab_df(). Used for drawing
+        the negative samples.
+
+    :param k: {int}
+
+        The number of negative samples to use for each window.
+
+    :param alpha: {float}
+
+        learning rate.
+
+    :param sampler: {AliasSampler}(optional)
+
+        Sampler to draw the negative samples from. Strongly recommended for
+        large vocabularies. If None, then np.random.choice() is used with the
+        sampling distribution in vocab.
+
+    :param tree: {HuffmanTree}(optional)
+
+        If provided, then a hierarchical softmax output layer is used instead
+        of negative sampling (and k and sampler are ignored). In that case,
+        the rows of W_out are the weights of the inner nodes of the tree.
+
+    :param optimizer: {Optimizer}(optional)
+
+        If provided, then the updates to the word matrices are done with this
+        optimizer (eg, optimizers.AdaGrad()), instead of plain SGD with alpha.
+
+    :param sigmoid_fn: {function}(default = activations.sigmoid_and_log)
+
+        Function that returns (sigmoid(z), log(sigmoid(z))) for the negative
+        sampling scores.
+
+    :param timer: {PhaseTimer}(optional)
+
+        If provided, the time spent on the "sampling", "forward", "backward"
+        and "update" phases is added to it.
+
+    :param negatives: {2D array of ints}(optional)
+
+        Negative samples that were drawn ahead of time (eg, by a
+        producer.BatchProducer), of shape (batch, k). If None, then they are
+        drawn from the sampler.
+
+    :param mask: {2D boolean array}(optional)
+
+        Same shape as context_indices. If provided, then only the context
+        words where the mask is True are used (eg, for the randomly shrunk
+        windows of corpus.get_window_masks()). Each window needs at least
+        one context word.
+
+    :param max_updates: {float}(default = MAX_UPDATES)
+
+        The most updates' worth of gradients that any one row of the word
+        matrices can get from the batch (see apply_row_gradients()). Keeps
+        the rows that appear many times in a batch from diverging with large
+        batches. None for no limit.
+
+    :return: {array}
+
+        The cost for each of the windows in the batch.
+    """
+    # ==========================================================================
+    if timer is None:
+        timer = PhaseTimer()
+    context_indices = np.asarray(context_indices)
+    target_indices = np.asarray(target_indices)
+    batch_size = len(context_indices)
+
+    # --------------------------------------------------------------------------
+    #                                                     Calculate Hidden layer
+    # --------------------------------------------------------------------------
+    if mask is None:
+        a = W_in[context_indices].mean(axis=1)      # shape [batch, vec_size]
+    else:
+        # Mean of only the context words that are not masked out
+        mask = np.asarray(mask, dtype=bool)
+        a = np.matmul(mask[:, np.newaxis, :].astype(W_in.dtype),
+                      W_in[context_indices])[:, 0, :]
+        a /= mask.sum(axis=1)[:, np.newaxis]
+    timer.lap("forward")
+
+    # --------------------------------------------------------------------------
+    #                                                Hierarchical Softmax Output
+    # --------------------------------------------------------------------------
+    if tree is not None:
+        J, G_a, rows, G_rows = hierarchical_softmax(a, target_indices, W_out,
+                                                    tree)
+        timer.lap("backward")   # (forward and backward through the tree)
+        in_rows, G_in = context_gradients(context_indices, G_a, mask)
+        apply_row_gradients(W_in, in_rows, G_in, alpha=alpha,
+                            optimizer=optimizer, max_updates=max_updates)
+        apply_row_gradients(W_out, rows, G_rows, alpha=alpha,
+                            optimizer=optimizer, max_updates=max_updates)
+        timer.lap("update")
+        return J
+
+    # --------------------------------------------------------------------------
+    #                                         Calculate Subset of Weights to Use
+    # --------------------------------------------------------------------------
+    # The correct word will be in column 0, and all others will be the
+    # negative samples for that window.
+    sample_indices = np.empty([batch_size, k + 1], dtype=np.intp)
+    sample_indices[:, 0] = target_indices
+    if negatives is not None:
+        sample_indices[:, 1:] = negatives
+    elif sampler is None:
+        sample_indices[:, 1:] = np.random.choice(vocab.i, size=[batch_size, k],
+                                                 p=vocab.p)
+    else:
+        sample_indices[:, 1:] = sampler.sample((batch_size, k))
+    output_word_vectors = W_out[sample_indices]   # shape [batch, k+1, vec_size]
+    timer.lap("sampling")
+
+    # --------------------------------------------------------------------------
+    #                                                     Calculate Output layer
+    # --------------------------------------------------------------------------
+    z = np.matmul(output_word_vectors, a[:, :, np.newaxis])[:, :, 0]
+
+    # --------------------------------------------------------------------------
+    #                                                  Calculate Cost, Gradients
+    # --------------------------------------------------------------------------
+    # Flip the sign of the negative samples, so that sigmoid(z) is the
+    # probability of the correct label for every sample. Then, making use of
+    # sigmoid(-z) = 1 - sigmoid(z), both the cost and the gradients come from
+    # a single evaluation of the sigmoid.
+    z[:, 1:] *= -1
+    s, log_s = (sigmoid_fn or sigmoid_and_log)(z)
+    J = -log_s.sum(axis=1)
+    timer.lap("forward")
+
+    G_z = 1 - s             # Gradient at the output layer for negative samples
+    G_z[:, 0] *= -1         # Update gradient for correct word
+
+    G_W_out = G_z[:, :, np.newaxis] * a[:, np.newaxis, :]
+    G_a = np.matmul(G_z[:, np.newaxis, :], output_word_vectors)  # [batch,1,vec]
+    timer.lap("backward")
+
+    # --------------------------------------------------------------------------
+    #                                                          Update Parameters
+    # --------------------------------------------------------------------------
+    in_rows, G_in = context_gradients(context_indices, G_a, mask)
+    apply_row_gradients(W_in, in_rows, G_in, alpha=alpha, optimizer=optimizer,
+                        max_updates=max_updates)
+    apply_row_gradients(W_out, sample_indices, G_W_out, alpha=alpha,
+                        optimizer=optimizer, max_updates=max_updates)
+    timer.lap("update")
+
+    return J
+
+
+# ==============================================================================
+#                                                                   TRAIN_CORPUS
+# ==============================================================================
+def train_corpus(tokens, offsets, W_in, W_out, vocab, window=8, k=5,
+                 alpha=0.01, batch_size=1024, sampler=None, shuffle=True,
+                 seed=None, store=None, checkpoint_every=1000, start_batch=0,
+                 min_alpha=None, verbose=False, name="", batch_trainer=None,
+                 tree=None, optimizer=None, sigmoid_fn=None, callbacks=None,
+                 sample=None, prefetch=0, negatives_per_context=False,
+                 dynamic_window=False, max_updates=MAX_UPDATES):
+    """
+    Trains the word matrices for one pass over an integer encoded corpus (as
+    created by corpus.encode_sentences()), using train_batch() on batches of
+    context windows.
+
+    The start and end of sentence padding is done by index arithmetic, using
+    the indices of the "START" and "END" words in the vocabulary.
+
+    :param tokens: {array of ints}
+
+        word indices for the whole corpus.
+
+    :param offsets: {array of ints}
+
+        sentence offsets into the tokens array.
+
+    :param W_in: {2D array} input word matrix, one word per row.
+    :param W_out: {2D array} output word matrix, one word per row.
+    :param vocab: {DataFrame} Vocabulary dataframe.
+    :param window: {int or list of two ints} context window size.
+    :param dynamic_window: {boolean}(default = False)
+
+        Randomly shrink each window, as in word2vec, so that the context
+        words closer to the center word get used more often (see
+        corpus.get_window_masks()). The masks of each batch are seeded from
+        the seed and the batch number, so they are the same when resuming
+        from a checkpoint.
+
+    :param k: {int} The number of negative samples to use.
+    :param alpha: {float} learning rate.
+    :param max_updates: {float}(default = MAX_UPDATES)
+
+        The most updates' worth of gradients that any one row of the word
+        matrices can get from a batch (see apply_row_gradients()). None for
+        no limit, which can diverge for large batches.
+    :param batch_size: {int} number of windows per call to train_batch()
+    :param sampler: {AliasSampler}(optional) for drawing negative samples.
+    :param tree: {HuffmanTree}(optional)
+
+        Use a hierarchical softmax output layer built on this tree, instead
+        of negative sampling. W_out then holds the weights of the inner nodes
+        of the tree.
+    :param shuffle: {boolean} visit the windows in random order?
+    :param seed: {int}(optional) seed for the order of the windows.
+    :param store: {EmbeddingStore}(optional)
+
+        If provided, then training is checkpointed to this store every
+        checkpoint_every batches, and at the end of the pass. W_in and W_out
+        would normally be store.W_in and store.W_out in this case.
+
+    :param checkpoint_every: {int} number of batches between checkpoints.
+    :param start_batch: {int}(default = 0)
+
+        Number of batches to skip at the start. To resume training from the
+        last checkpoint of a store, use:
+
+            train_corpus(tokens, offsets, store.W_in, store.W_out, vocab,
+                         store=store, seed=store.state["seed"],
+                         start_batch=store.state["batch"], ...)
+
+    :param min_alpha: {float}(optional)
+
+        If provided, then the learning rate decays linearly from alpha (at the
+        start of the pass) down to min_alpha (at the end of the pass), as in
+        word2vec. Otherwise the learning rate stays fixed at alpha.
+
+    :param optimizer: {Optimizer}(optional)
+
+        Optimizer used to update the word matrices, eg, optimizers.AdaGrad(),
+        or optimizers.SGD(optimizers.LinearDecay(0.025, num_steps=...)). When
+        given, alpha and min_alpha are ignored, and the optimizer's own
+        learning rate (or schedule) is used.
+
+    :param sigmoid_fn: {function}(optional)
+
+        Function that returns (sigmoid(z), log(sigmoid(z))) for the negative
+        sampling scores. Defaults to activations.sigmoid_and_log()
+
+    :param callbacks: {list of Callback objects}(optional)
+
+        Callbacks to report the progress, throughput, loss, learning rate,
+        and the time spent on each phase of training to, after every batch.
+        Eg, callbacks.JSONLinesLogger. See the bricknet.callbacks module.
+
+    :param sample: {float}(optional)
+
+        If provided, then the frequent words are subsampled with this
+        threshold (see get_keep_probabilities()) before the pass, using the
+        counts in the vocab dataframe. Which occurrences get discarded
+        depends on the seed, so use a different seed for each pass (as
+        Word2Vec.fit() does) to discard a different subset each time.
+
+    :param prefetch: {int}(default = 0)
+
+        If more than 0, then the windows and negative samples of up to this
+        many batches are prepared ahead of time, by a background thread (see
+        producer.BatchProducer), while the current batch is being trained on.
+        If no sampler is given, then one is created from the vocab (with
+        the same seed), for the background thread to draw the negative
+        samples from.
+
+    :param negatives_per_context: {boolean}(default = False)
+
+        Does batch_trainer use k negative samples for each context word (as
+        skip-gram does), rather than k for each window? Only used to draw
+        the negative samples ahead of time when prefetch > 0.
+
+    :param verbose: {boolean}
+
+        Print out the percentage completed as training progresses?
+
+    :param name: {str}
+
+        Prefix for the progress printouts, eg, to tell apart the printouts
+        from different worker processes.
+
+    :param batch_trainer: {function}(default = train_batch)
+
+        The function used to train on each batch of windows. Called as
+        batch_trainer(contexts, center_words, W_in, W_out, vocab, k=k,
+        alpha=alpha, sampler=sampler, tree=tree, optimizer=optimizer,
+        sigmoid_fn=sigmoid_fn, timer=timer, negatives=negatives,
+        mask=mask, max_updates=max_updates), and must return the cost of
+        each window. negatives is None unless prefetch > 0, and mask is None
+        unless dynamic_window.
+        Eg, skipgram.train_batch for training a skip-gram model with the
+        same training loop.
+
+    :return: {array}
+
+        The average cost of the windows in each batch.
+    """
+    # ==========================================================================
+    if batch_trainer is None:
+        batch_trainer = train_batch
+
+    c_left, c_right = window_sizes(window)
+    start_index = vocab.i["START"]
+    end_index = vocab.i["END"]
+
+    # The order of the windows needs to be reproducible to be able to resume
+    # from a checkpoint, so make sure there is always a seed to record.
+    if seed is None:
+        seed = np.random.randint(2**31 - 1)
+
+    # Subsample the frequent words (with the same seed, so that resuming from
+    # a checkpoint discards the same words). The frequencies are relative to
+    # the real words only, not the START and END padding.
+    num_words = len(tokens)
+    if sample is not None:
+        counts = np.zeros(len(vocab))
+        counts[np.asarray(vocab.i)] = np.asarray(vocab.counts)
+        padding = [start_index, end_index]
+        total = counts.sum() - counts[padding].sum()
+        keep = get_keep_probabilities(counts, sample=sample, total=total)
+        keep[padding] = 1.0
+        tokens, offsets = subsample_corpus(tokens, offsets, keep, seed=seed)
+
+    if prefetch > 0:
+        num_negatives = 0
+        if tree is None:
+            if sampler is None:
+                sampler = AliasSampler.from_vocab(vocab, seed=seed)
+            num_negatives = k * ((c_left + c_right) if negatives_per_context
+                                 else 1)
+        batches = BatchProducer(tokens, offsets, c_left, c_right, start_index,
+                                end_index, batch_size=batch_size,
+                                shuffle=shuffle, seed=seed,
+                                start_batch=start_batch, sampler=sampler,
+                                num_negatives=num_negatives,
+                                dynamic_window=dynamic_window,
+                                queue_size=prefetch)
+    else:
+        def get_masks(b, n):
+            if not dynamic_window:
+                return None
+            return get_window_masks(n, c_left, c_right,
+                                    random_state=[seed, b])
+        batches = ((contexts, targets, None, get_masks(b, len(targets)))
+                   for b, (contexts, targets) in enumerate(
+                       iter_windows(tokens, offsets, c_left, c_right,
+                                    start_index, end_index,
+                                    batch_size=batch_size, shuffle=shuffle,
+                                    seed=seed, start_batch=start_batch),
+                       start_batch))
+
+    num_batches = -(-len(tokens) // batch_size)     # ceiling division
+    percent_done = -1
+
+    monitor = Monitor(callbacks, name=name)
+    monitor.begin(total_batches=num_batches - start_batch,
+                  num_words=num_words, num_windows=len(tokens),
+                  batch_size=batch_size, k=k, window=[c_left, c_right],
+                  dynamic_window=dynamic_window, sample=sample)
+    timer = monitor.timer
+
+    cost = []
+    batch = start_batch
+    try:
+        for contexts, targets, negatives, masks in batches:
+            timer.lap("windows")
+            if optimizer is not None:
+                lr = optimizer.get_learning_rate(batch)
+            elif min_alpha is None:
+                lr = alpha
+            else:
+                lr = alpha - (alpha - min_alpha) * batch / float(num_batches)
+
+            J = batch_trainer(contexts, targets, W_in, W_out, vocab, k=k,
+                              alpha=lr, sampler=sampler, tree=tree,
+                              optimizer=optimizer, sigmoid_fn=sigmoid_fn,
+                              timer=timer, negatives=negatives, mask=masks,
+                              max_updates=max_updates)
+            cost.append(J.mean())
+            monitor.batch_end(cost[-1], examples=len(targets),
+                              words=len(targets), learning_rate=lr)
+
+            batch += 1
+            if verbose and (100 * batch) // num_batches > percent_done:
+                percent_done = (100 * batch) // num_batches
+                print("   {}{} % complete (alpha = {:0.6f})".format(name,
+                                                                   percent_done,
+                                                                   lr))
+            if store is not None and batch % checkpoint_every == 0:
+                store.checkpoint(seed=seed, batch=batch)
+                timer.lap("checkpoint")
+    finally:
+        if prefetch > 0:
+            batches.close()
+
+    if store is not None:
+        store.checkpoint(seed=seed, batch=batch, complete=True)
+        timer.lap("checkpoint")
+    monitor.end()
+
+    return np.array(cost)
@@ -0,0 +1,617 @@
+"""====================================================
+                    DESCRIPTION
+
+Tools for streaming a text corpus from disk, and for working with an integer
+encoded corpus.
+
+The whole corpus is stored as one contiguous array of word indices (tokens),
+along with an array of sentence offsets, such that the words of sentence i
+are:
+
+    tokens[offsets[i]: offsets[i+1]]
+
+The start and end of sentence padding is never stored. Instead it is handled
+by index arithmetic when the context windows are created.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import io
+import os
+import array
+import codecs
+import multiprocessing
+from collections import Counter
+import numpy as np
+
+try:
+    string_types = basestring
+except NameError:   # Python 3
+    string_types = str
+
+
+# Character mappings used to clean up raw text. Applied in one single pass
+# with unicode.translate() (after converting the text to lowercase).
+CLEANUP_MAPPINGS = {
+    ",": None,                  # remove commas
+    "!": None,                  # remove exclamation
+    "?": None,                  # remove qmark
+    ";": None,                  # remove semi colon
+    ":": None,                  # remove colon
+    ")": None,
+    "(": None,
+    "]": None,
+    "[": None,
+    "{": None,
+    "}": None,
+    "`": None,
+    '"': u" DOUBLE-QUOTE ",     # replace double quotes
+    "'": u" QUOTE ",            # replace single quotes
+    }
+CLEANUP_TABLE = {ord(char): val for char, val in CLEANUP_MAPPINGS.items()}
+
+
+# ==============================================================================
+#                                                                     CLEAN_TEXT
+# ==============================================================================
+def clean_text(text):
+    """
+    Converts a chunk of raw text to lowercase, and applies all the character
+    mappings in CLEANUP_MAPPINGS in a single pass.
+
+    :param text: {unicode string}
+    :return: {unicode string}
+    """
+    # ==========================================================================
+    return text.lower().translate(CLEANUP_TABLE)
+
+
+# ==============================================================================
+#                                                                 ITER_SENTENCES
+# ==============================================================================
+def iter_sentences(file, chunk_size=2**20, encoding="utf-8", start=0,
+                   end=None):
+    """
+    Generator that streams a text file, and yields one sentence at a time, as
+    a list of word strings.
+
+    The file is read in chunks of chunk_size bytes, so the memory used does
+    not depend on the size of the file. Each chunk is cleaned up with
+    clean_text(), and sentences are split on full stops (crude sentence
+    segmentation). Empty sentences are skipped.
+
+    :param file: {str} path to the text file
+    :param chunk_size: {int} number of bytes to read at a time
+    :param encoding: {str} text encoding of the file
+    :param start: {int}(default = 0) byte offset to start reading from.
+    :param end: {int}(optional)
+
+        byte offset to stop reading at. Defaults to the end of the file. Use
+        shard_file() to get (start, end) ranges that split the file on
+        sentence boundaries.
+
+    :return: {generator of lists of strings}
+    """
+    # ==========================================================================
+    decoder = codecs.getincrementaldecoder(encoding)()
+    remainder = u""     # unfinished sentence from the end of the last chunk
+    with io.open(file, "rb") as textFile:
+        textFile.seek(start)
+        position = start
+        while True:
+            size = chunk_size
+            if end is not None:
+                size = min(chunk_size, end - position)
+            raw = textFile.read(size) if size > 0 else b""
+            position += len(raw)
+            chunk = decoder.decode(raw, final=not raw)
+            if not raw and not chunk:
+                break
+
+            pieces = (remainder + clean_text(chunk)).split(".")
+            remainder = pieces.pop()
+            for piece in pieces:
+                words = piece.split()
+                if words:
+                    yield words
+
+    words = remainder.split()
+    if words:
+        yield words
+
+
+# ==============================================================================
+#                                                                     SHARD_FILE
+# ==============================================================================
+def shard_file(file, num_shards, start=0, end=None, search_size=2**16):
+    """
+    Splits a text file into num_shards byte ranges of roughly equal size,
+    with each boundary moved forward to just after the next full stop, so
+    that iter_sentences() over the ranges gives the same sentences as over
+    the whole file.
+
+    NOTE: Assumes an ASCII compatible encoding (eg, utf-8), where the byte of
+          a full stop can not be part of another character.
+
+    :param file: {str} path to the text file
+    :param num_shards: {int}
+    :param start: {int}(default = 0) byte offset of the start of the range to
+                  split up.
+    :param end: {int}(optional) byte offset of the end of the range to split
+                up. Defaults to the end of the file.
+    :param search_size: {int} bytes to read at a time when searching for the
+                        next full stop.
+    :return: {list of tuples}
+
+        (start, end) byte offsets of each shard. Can have fewer than
+        num_shards shards, for small files.
+    """
+    # ==========================================================================
+    if end is None:
+        end = os.path.getsize(file)
+    boundaries = [start]
+    with io.open(file, "rb") as f:
+        for i in range(1, num_shards):
+            position = max(start + (end - start) * i // num_shards,
+                           boundaries[-1])
+            f.seek(position)
+            while position < end:
+                block = f.read(search_size)
+                if not block:
+                    break
+                found = block.find(b".")
+                if found >= 0:
+                    position += found + 1
+                    break
+                position += len(block)
+            if position < end:
+                boundaries.append(position)
+    boundaries.append(end)
+    return [(a, b) for a, b in zip(boundaries[:-1], boundaries[1:]) if b > a]
+
+
+################################################################################
+#                                                            CORPUS READER CLASS
+################################################################################
+class CorpusReader(object):
+    """
+    An iterable over the sentences of a text file, that streams the file from
+    disk with iter_sentences() every time it is iterated over.
+
+    Unlike a generator, it can be iterated over multiple times, eg, once to
+    build the vocabulary, and then again to encode the corpus, without ever
+    holding the whole text in memory.
+    """
+    def __init__(self, file, chunk_size=2**20, encoding="utf-8", start=0,
+                 end=None):
+        """
+        :param file: {str} path to the text file
+        :param chunk_size: {int} number of bytes to read at a time
+        :param encoding: {str} text encoding of the file
+        :param start: {int}(default = 0) byte offset to start reading from.
+        :param end: {int}(optional) byte offset to stop reading at.
+        """
+        self.file = file
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.start = start
+        self.end = end
+
+    def __iter__(self):
+        return iter_sentences(self.file, chunk_size=self.chunk_size,
+                              encoding=self.encoding, start=self.start,
+                              end=self.end)
+
+    def shards(self, num_shards):
+        """
+        Splits the file into CorpusReaders over num_shards byte ranges, on
+        sentence boundaries (see shard_file()).
+
+        :param num_shards: {int}
+        :return: {list of CorpusReader}
+        """
+        ranges = shard_file(self.file, num_shards, start=self.start,
+                            end=self.end)
+        return [CorpusReader(self.file, chunk_size=self.chunk_size,
+                             encoding=self.encoding, start=a, end=b)
+                for a, b in ranges]
+
+
+# ==============================================================================
+#                                                                   AS_SENTENCES
+# ==============================================================================
+def as_sentences(corpus, **kwargs):
+    """
+    Lets the trainers accept either a path to a text file, or the sentences
+    themselves.
+
+    :param corpus: {str, or iterable of iterables of strings}
+
+        Path to a text file, or the sentences, each one a list of words. The
+        sentences need to be re-iterable (eg, a list, or a CorpusReader, but
+        not a generator) if they are going to be iterated over more than once.
+
+    :param kwargs: other arguments for CorpusReader()
+    :return: {iterable of iterables of strings}
+    """
+    # ==========================================================================
+    if isinstance(corpus, string_types):
+        return CorpusReader(corpus, **kwargs)
+    return corpus
+
+
+# ==============================================================================
+#                                                                   WINDOW_SIZES
+# ==============================================================================
+def window_sizes(window):
+    """
+    Takes a window size argument, as used by the word2vec functions, and
+    returns the number of context words to the left, and to the right of the
+    center word.
+
+    :param window: {int, or list of two ints}
+
+        window size to use for context. must be either an integer, for a
+        symetrical window (half the words on each side), or, for an
+        asymentrical window, a list of two integer elements.  The first element
+        is for the number of words to the left, and the second element is for
+        the number of words to the right.
+
+    :return: {tuple of two ints}
+
+        (c_left, c_right)
+    """
+    # ==========================================================================
+    if isinstance(window, (int, np.integer)):
+        c_left = window // 2
+        c_right = c_left
+    elif (isinstance(window, (list, tuple))
+    and (len(window) > 1)
+    and isinstance(window[0], (int, np.integer))
+    and isinstance(window[1], (int, np.integer))):
+        c_left = window[0]
+        c_right = window[1]
+    else:
+        msg = "\n  Expected the `window` argument to be an"\
+              "\n  integer, or a list of two integers."
+        raise ValueError(msg)
+    return c_left, c_right
+
+
+# ==============================================================================
+#                                                                    COUNT_WORDS
+# ==============================================================================
+def _count_shard(sentences):
+    """ Counts the words and sentences of one shard, in a worker process """
+    counts = Counter()
+    num_sentences = 0
+    for sentence in sentences:
+        counts.update(sentence)
+        num_sentences += 1
+    return counts, num_sentences
+
+
+def count_words(sentences, window=8, workers=1):
+    """
+    Counts the number of times each word appears in the sentences, plus the
+    "START" and "END" padding tokens that each sentence would get for the
+    given window size. The padding is counted arithmetically, (c_left and
+    c_right per sentence), rather than by padding each sentence.
+
+    If the sentences come from a file (a path, or a CorpusReader), and
+    workers > 1, then the file is split into shards on sentence boundaries,
+    which are counted in a pool of worker processes, and merged.
+
+    :param sentences: {str, CorpusReader, or iterable of iterables of strings}
+    :param window: {int or list of two ints} the context window size.
+    :param workers: {int}(default = 1)
+
+        number of worker processes. None uses the number of CPUs.
+
+    :return: {Counter} the count of each word.
+    """
+    # ==========================================================================
+    c_left, c_right = window_sizes(window)
+    sentences = as_sentences(sentences)
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    if workers > 1 and isinstance(sentences, CorpusReader):
+        pool = multiprocessing.Pool(workers)
+        try:
+            results = pool.map(_count_shard, sentences.shards(workers))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_count_shard(sentences)]
+
+    counts = Counter()
+    num_sentences = 0
+    for shard_counts, shard_sentences in results:
+        counts.update(shard_counts)
+        num_sentences += shard_sentences
+    counts["START"] += c_left * num_sentences
+    counts["END"] += c_right * num_sentences
+    return counts
+
+
+# ==============================================================================
+#                                                                 GET_WORD_INDEX
+# ==============================================================================
+def get_word_index(vocab):
+    """
+    Takes a vocabulary dataframe (as created by cbow_ngg.create_vocab_df())
+    and returns a plain dictionary that maps each word to its index.
+
+    :param vocab: {DataFrame}
+    :return: {dict}
+    """
+    # ==========================================================================
+    return dict(zip(vocab.index, np.asarray(vocab.i).tolist()))
+
+
+# ==============================================================================
+#                                                               ENCODE_SENTENCES
+# ==============================================================================
+def encode_sentences(sentences, word_index, unknown=None, dtype=np.int32):
+    """
+    Converts an iterable of sentences (each one an iterable of word strings)
+    into a contiguous array of word indices, plus an array of sentence
+    offsets.
+
+    The sentences are consumed lazily, one at a time, so it can be a
+    generator.
+
+    :param sentences: {iterable of iterables of strings}
+    :param word_index: {dict}
+
+        maps each word in the vocabulary to its index.
+
+    :param unknown: {int, or None}(default = None)
+
+        index to use for words that are not in word_index. If None, then
+        unknown words are dropped from the corpus.
+
+    :param dtype: {numpy dtype}(default = np.int32)
+
+        data type used for the tokens array.
+
+    :return: {tuple of two arrays}
+
+        (tokens, offsets)
+
+        tokens  : 1D array of word indices for the whole corpus.
+        offsets : 1D array of length num_sentences + 1. Sentence i spans
+                  tokens[offsets[i]: offsets[i+1]]
+    """
+    # ==========================================================================
+    # Grow compact typed arrays, rather than python lists of ints
+    tokens = array.array(np.dtype(dtype).char)
+    offsets = array.array(np.dtype(np.int64).char, [0])
+    for sentence in sentences:
+        if unknown is None:
+            tokens.extend(word_index[w] for w in sentence if w in word_index)
+        else:
+            tokens.extend(word_index.get(w, unknown) for w in sentence)
+        offsets.append(len(tokens))
+
+    return (np.frombuffer(tokens, dtype=dtype),
+            np.frombuffer(offsets, dtype=np.int64))
+
+
+# ==============================================================================
+#                                                               SUBSAMPLE_CORPUS
+# ==============================================================================
+def subsample_corpus(tokens, offsets, keep, seed=None):
+    """
+    Randomly discards occurrences of the frequent words from an integer
+    encoded corpus, keeping each occurrence of word i with probability
+    keep[i]. The sentence offsets are adjusted to match, so the discarded
+    words are simply skipped over when creating the context windows (which
+    widens the effective window around them, as in word2vec).
+
+    Done in one vectorised pass, with a single random draw per token.
+
+    :param tokens: {array} as returned by encode_sentences()
+    :param offsets: {array} as returned by encode_sentences()
+    :param keep: {array of floats}
+
+        probability of keeping each word, indexed by word index. eg, the
+        `keep` column of a vocabulary dataframe, ordered by its `i` column.
+
+    :param seed: {int}(optional) seed for the random draws.
+
+    :return: {tuple of two arrays}
+
+        (tokens, offsets) of the subsampled corpus.
+    """
+    # ==========================================================================
+    keep = np.asarray(keep)
+    mask = np.random.RandomState(seed).random_sample(len(tokens)) < keep[tokens]
+
+    # Number of kept tokens before each position gives the new offsets
+    kept_before = np.zeros(len(tokens) + 1, dtype=np.int64)
+    np.cumsum(mask, out=kept_before[1:])
+    return tokens[mask], kept_before[offsets]
+
+
+# ==============================================================================
+#                                                               GET_SENTENCE_IDS
+# ==============================================================================
+def get_sentence_ids(offsets, positions):
+    """
+    Returns the index of the sentence that each token position belongs to.
+
+    :param offsets: {array} sentence offsets, as returned by encode_sentences()
+    :param positions: {array of ints} positions in the tokens array
+    :return: {array of ints}
+    """
+    # ==========================================================================
+    return np.searchsorted(offsets, positions, side="right") - 1
+
+
+# ==============================================================================
+#                                                            GET_CONTEXT_WINDOWS
+# ==============================================================================
+def get_context_windows(tokens, offsets, positions, c_left, c_right,
+                        start_index, end_index, out=None):
+    """
+    Returns the context word indices for the center words at the given
+    positions of the corpus.
+
+    Context positions that fall before the start of the sentence of the
+    center word take the value of start_index, and those that fall after the
+    end of the sentence take the value of end_index. This is equivalent to
+    padding each sentence with c_left "START" tokens and c_right "END" tokens,
+    as done by cbow_ngg.pad_sentence_list().
+
+    :param tokens: {array} as returned by encode_sentences()
+    :param offsets: {array} as returned by encode_sentences()
+    :param positions: {array of ints}
+
+        positions in the tokens array of the center words.
+
+    :param c_left: {int} number of context words to the left
+    :param c_right: {int} number of context words to the right
+    :param start_index: {int} word index of the start of sentence token
+    :param end_index: {int} word index of the end of sentence token
+    :param out: {2D array}(optional)
+
+        array to put the result in, of the right shape, and the same dtype
+        as tokens. Eg, a reusable buffer.
+
+    :return: {2D array}
+
+        array of shape (len(positions), c_left + c_right) with the context
+        word indices for each center word (from left to right, excluding the
+        center word).
+    """
+    # ==========================================================================
+    positions = np.asarray(positions)
+    sentence_ids = get_sentence_ids(offsets, positions)
+    lo = offsets[sentence_ids][:, np.newaxis]
+    hi = offsets[sentence_ids + 1][:, np.newaxis]
+
+    relative = np.concatenate([np.arange(-c_left, 0), np.arange(1, c_right + 1)])
+    context_positions = positions[:, np.newaxis] + relative
+
+    contexts = np.take(tokens,
+                       np.clip(context_positions, 0, max(len(tokens) - 1, 0)),
+                       out=out)
+    contexts[context_positions < lo] = start_index
+    contexts[context_positions >= hi] = end_index
+    return contexts
+
+
+# ==============================================================================
+#                                                               GET_WINDOW_MASKS
+# ==============================================================================
+def get_window_masks(num_windows, c_left, c_right, random_state=None,
+                     out=None):
+    """
+    Creates the masks for randomly shrunk ("dynamic") context windows, as in
+    word2vec, where each window only uses the context words up to a random
+    distance from the center word, so that closer words get used more often.
+
+    Each window gets a uniform random draw u in [0, 1), and uses the nearest
+    c_left - floor(u * c_left) words on the left, and the nearest
+    c_right - floor(u * c_right) words on the right. For symmetric windows,
+    this is the same as word2vec's uniform shrink of 0 to c-1 words.
+
+    The masks line up with the columns of get_context_windows().
+
+    :param num_windows: {int}
+    :param c_left: {int} number of context words to the left
+    :param c_right: {int} number of context words to the right
+    :param random_state: {RandomState, int, or array of ints}(optional)
+
+        the random number generator, or a seed for one.
+
+    :param out: {2D boolean array}(optional) array to put the masks in.
+
+    :return: {2D boolean array}
+
+        array of shape (num_windows, c_left + c_right), which is True for
+        the context words that are used.
+    """
+    # ==========================================================================
+    if not isinstance(random_state, np.random.RandomState):
+        random_state = np.random.RandomState(random_state)
+    if out is None:
+        out = np.empty((num_windows, c_left + c_right), dtype=bool)
+
+    u = random_state.random_sample(num_windows)[:, np.newaxis]
+    left = c_left - (u * c_left).astype(np.intp)
+    right = c_right - (u * c_right).astype(np.intp)
+
+    # Distance of each context column from the center word
+    np.less_equal(np.arange(c_left, 0, -1), left, out=out[:, :c_left])
+    np.less_equal(np.arange(1, c_right + 1), right, out=out[:, c_left:])
+    return out
+
+
+# ==============================================================================
+#                                                                   ITER_WINDOWS
+# ==============================================================================
+def iter_windows(tokens, offsets, c_left, c_right, start_index, end_index,
+                 batch_size=1024, shuffle=False, seed=None, start_batch=0):
+    """
+    Generator that yields batches of (contexts, targets) for every word in the
+    corpus being used as the center word once.
+
+    :param tokens: {array} as returned by encode_sentences()
+    :param offsets: {array} as returned by encode_sentences()
+    :param c_left: {int} number of context words to the left
+    :param c_right: {int} number of context words to the right
+    :param start_index: {int} word index of the start of sentence token
+    :param end_index: {int} word index of the end of sentence token
+    :param batch_size: {int} number of center words per batch
+    :param shuffle: {boolean}
+
+        Visit the center words in a random order? Otherwise they are visited
+        in the order they appear in the corpus.
+
+    :param seed: {int}(optional)
+
+        seed for the random order of the center words when shuffle=True. The
+        same seed always gives the same sequence of batches.
+
+    :param start_batch: {int}(default = 0)
+
+        Skip this many batches at the start. Together with the seed, this
+        allows resuming part way through a pass over the corpus.
+
+    :return: {generator}
+
+        yields tuples (contexts, targets), where contexts is a 2D array of
+        shape (batch, c_left + c_right) and targets is an array of shape
+        (batch,) of the center word indices.
+    """
+    # ==========================================================================
+    for positions in iter_batch_positions(len(tokens), batch_size=batch_size,
+                                          shuffle=shuffle, seed=seed,
+                                          start_batch=start_batch):
+        contexts = get_context_windows(tokens, offsets, positions,
+                                       c_left, c_right, start_index, end_index)
+        yield contexts, tokens[positions]
+
+
+# ==============================================================================
+#                                                           ITER_BATCH_POSITIONS
+# ==============================================================================
+def iter_batch_positions(n, batch_size=1024, shuffle=False, seed=None,
+                         start_batch=0):
+    """
+    Generator that yields the positions of the center words of each batch,
+    for a corpus of n tokens. See iter_windows() for the arguments.
+
+    :return: {generator of arrays of ints}
+    """
+    # ==========================================================================
+    order = np.random.RandomState(seed).permutation(n) if shuffle else None
+    for i in range(start_batch * batch_size, n, batch_size):
+        if order is None:
+            yield np.arange(i, min(i + batch_size, n))
+        else:
+            yield order[i: i + batch_size]
@@ -0,0 +1,220 @@
+"""====================================================
+                    DESCRIPTION
+
+Parallel, lock-free (Hogwild) training of the word2vec models over multiple
+worker processes.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import multiprocessing
+import numpy as np
+
+from .. import config
+from . import cbow_ngg
+
+
+# ==============================================================================
+#                                                                   SHARED_ARRAY
+# ==============================================================================
+def shared_array(shape, dtype=None, raw=None):
+    """
+    Creates a numpy array backed by shared memory, that can be passed to
+    worker processes, and updated by all of them without any locks.
+
+    :param shape: {tuple of ints} shape of the array.
+    :param dtype: {numpy dtype}(optional)
+
+        Defaults to the global dtype in bricknet.config
+
+    :param raw: {multiprocessing.RawArray}(optional)
+
+        An existing block of shared memory to wrap with a numpy array, instead
+        of creating a new one. Used by the worker processes to get at the
+        memory created by the parent process.
+
+    :return: {tuple}
+
+        (array, raw), where raw is the underlying multiprocessing.RawArray
+        that should be passed on to the worker processes.
+    """
+    # ==========================================================================
+    dtype = config.get_dtype(dtype)
+    if raw is None:
+        raw = multiprocessing.RawArray("b", int(np.prod(shape)) * dtype.itemsize)
+    return np.frombuffer(raw, dtype=dtype).reshape(shape), raw
+
+
+# ==============================================================================
+#                                                                   SHARD_CORPUS
+# ==============================================================================
+def shard_corpus(tokens, offsets, num_shards):
+    """
+    Splits an integer encoded corpus into num_shards shards of whole
+    sentences, each with roughly the same number of words.
+
+    :param tokens: {array} as returned by corpus.encode_sentences()
+    :param offsets: {array} as returned by corpus.encode_sentences()
+    :param num_shards: {int}
+    :return: {list of tuples}
+
+        a (tokens, offsets) pair for each shard, in the same format as the
+        input. The shard tokens are views into the original tokens array.
+    """
+    # ==========================================================================
+    targets = np.linspace(0, len(tokens), num_shards + 1)
+    bounds = np.searchsorted(offsets, targets)
+    bounds[0] = 0
+    bounds[-1] = len(offsets) - 1
+
+    shards = []
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        shard_offsets = offsets[first: last + 1] - offsets[first]
+        shard_tokens = tokens[offsets[first]: offsets[last]]
+        shards.append((shard_tokens, shard_offsets))
+    return shards
+
+
+# ==============================================================================
+#                                                                        _WORKER
+# ==============================================================================
+def _worker(worker_id, trainer, tokens, offsets, W_in_raw, W_out_raw,
+            W_in_shape, W_out_shape, dtype, vocab, seed, kwargs, results):
+    """
+    Runs in each worker process. Trains on one shard of the corpus, updating
+    the shared word matrices in place, and puts the costs on the results
+    queue.
+    """
+    # ==========================================================================
+    W_in, _ = shared_array(W_in_shape, dtype, raw=W_in_raw)
+    W_out, _ = shared_array(W_out_shape, dtype, raw=W_out_raw)
+
+    # Each worker gets its own stream of random numbers
+    np.random.seed(seed + worker_id)
+    if kwargs.get("sampler") is not None:
+        kwargs["sampler"].reseed(seed + worker_id)
+
+    try:
+        cost = trainer(tokens, offsets, W_in, W_out, vocab,
+                       seed=seed + worker_id,
+                       name="[worker {}] ".format(worker_id),
+                       **kwargs)
+    except Exception as e:
+        # Let the parent process know, rather than leave it waiting forever
+        results.put((worker_id, e))
+        raise
+    results.put((worker_id, cost))
+
+
+# ==============================================================================
+#                                                                 TRAIN_PARALLEL
+# ==============================================================================
+def train_parallel(tokens, offsets, W_in, W_out, vocab, workers=None,
+                   trainer=cbow_ngg.train_corpus, seed=None, store=None,
+                   **kwargs):
+    """
+    Hogwild training. Shards the sentences of an integer encoded corpus
+    across several worker processes, which all update the same shared memory
+    copies of the word matrices at the same time, without any locking.
+
+    Each worker runs the trainer function on its own shard, so each one has
+    its own learning rate schedule (eg, pass alpha and min_alpha for a linear
+    decay over the shard), and its own progress printouts (with verbose=True).
+
+    W_in and W_out are copied into shared memory before training, and the
+    trained values are copied back into them (in place) at the end. So they
+    can be any arrays, including the memory mapped matrices of an
+    EmbeddingStore.
+
+    NOTE: A store is only checkpointed by the parent process, once all the
+          workers are done (the workers only see the shared memory copies,
+          and each one counts its own batches). So a parallel pass can not
+          be resumed part way through.
+
+    :param tokens: {array} as returned by corpus.encode_sentences()
+    :param offsets: {array} as returned by corpus.encode_sentences()
+    :param W_in: {2D array} input word matrix, one word per row.
+    :param W_out: {2D array} output word matrix, one word per row.
+    :param vocab: {DataFrame} Vocabulary dataframe.
+    :param workers: {int}(optional)
+
+        Number of worker processes. Defaults to the number of CPUs.
+
+    :param trainer: {function}(default = cbow_ngg.train_corpus)
+
+        The function that each worker uses to train on its shard. It is called
+        as trainer(tokens, offsets, W_in, W_out, vocab, seed=.., name=..,
+        **kwargs)
+
+    :param seed: {int}(optional)
+
+        Base seed. Worker i uses seed + i.
+
+    :param store: {EmbeddingStore}(optional)
+
+        If provided, then it is checkpointed (as complete) after the trained
+        values are copied back. W_in and W_out would normally be store.W_in
+        and store.W_out in this case.
+
+    :param kwargs: any other arguments to pass on to the trainer, eg, window,
+                   k, alpha, min_alpha, batch_size, sampler, verbose.
+
+        Any callbacks are copied to each worker, and report the stats of that
+        worker (with its name in the stats). Use a callbacks.JSONLinesLogger
+        to collect them from all the workers in one file.
+
+    :return: {list of arrays}
+
+        the costs returned by the trainer for each worker.
+    """
+    # ==========================================================================
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if seed is None:
+        seed = np.random.randint(2**31 - 1)
+    dtype = W_in.dtype
+
+    # --------------------------------------------------------------------------
+    #                                           Copy Word Matrices to Shared Mem
+    # --------------------------------------------------------------------------
+    shared_in, W_in_raw = shared_array(W_in.shape, dtype)
+    shared_out, W_out_raw = shared_array(W_out.shape, dtype)
+    shared_in[...] = W_in
+    shared_out[...] = W_out
+
+    # --------------------------------------------------------------------------
+    #                                                                Run Workers
+    # --------------------------------------------------------------------------
+    results = multiprocessing.Queue()
+    processes = []
+    for worker_id, (shard_tokens, shard_offsets) in enumerate(
+            shard_corpus(tokens, offsets, workers)):
+        p = multiprocessing.Process(target=_worker,
+                                    args=(worker_id, trainer, shard_tokens,
+                                          shard_offsets, W_in_raw, W_out_raw,
+                                          W_in.shape, W_out.shape, dtype, vocab,
+                                          seed, kwargs, results))
+        p.start()
+        processes.append(p)
+
+    # Collect the results before joining, so that no worker blocks on a
+    # full queue.
+    cost = [None] * len(processes)
+    for _ in processes:
+        worker_id, worker_cost = results.get()
+        if isinstance(worker_cost, Exception):
+            for p in processes:
+                p.terminate()
+            raise worker_cost
+        cost[worker_id] = worker_cost
+    for p in processes:
+        p.join()
+
+    # --------------------------------------------------------------------------
+    #                                                   Copy Back Trained Values
+    # --------------------------------------------------------------------------
+    W_in[...] = shared_in
+    W_out[...] = shared_out
+    if store is not None:
+        store.checkpoint(seed=seed, workers=len(processes), complete=True)
+    return cost
@@ -0,0 +1,216 @@
+"""====================================================
+                    DESCRIPTION
+
+Huffman tree and hierarchical softmax, for output layers over large
+vocabularies.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import heapq
+import numpy as np
+
+from ..activations import sigmoid_and_log
+
+
+################################################################################
+#                                                             HUFFMAN TREE CLASS
+################################################################################
+class HuffmanTree(object):
+    """
+    A binary Huffman tree built from the counts of each word (or class), as
+    used by hierarchical softmax. Frequent words end up close to the root, so
+    they get short codes.
+
+    The tree has num_classes leaves (one per word), and num_classes - 1 inner
+    nodes, numbered 0 to num_classes - 2, with the root being the last one.
+    The path of each word is stored in two padded arrays:
+
+        points : the inner nodes along the path, starting at the root.
+        codes  : the branch taken at each of those inner nodes (0 or 1).
+
+    Only the first lengths[w] elements of row w are used.
+
+    :references:
+
+        - Mikolov, T., Sutskever, I., Chen, K., Corrado, G. S., and Dean, J.
+          (2013b). Distributed representations of words and phrases and their
+          compositionality. In Advances in Neural Information Processing
+          Systems, pages 3111-3119
+    """
+    # ==========================================================================
+    #                                                                   __INIT__
+    # ==========================================================================
+    def __init__(self, counts):
+        """
+        :param counts: {array-like}
+
+            The unigram counts of each word, in the same order as the word
+            indices, eg, the `counts` column of a vocabulary dataframe sorted by
+            its `i` column, or the output of get_unigram_counts().
+        """
+        # ======================================================================
+        counts = np.asarray(counts)
+        n = len(counts)
+        self.num_classes = n
+        self.num_inner = max(n - 1, 1)
+
+        # ----------------------------------------------------------------------
+        #                                                         Build the tree
+        # ----------------------------------------------------------------------
+        # Nodes 0 to n-1 are the leaves, nodes n to 2n-2 are the inner nodes.
+        parent = np.zeros(2 * n - 1, dtype=np.intp)
+        branch = np.zeros(2 * n - 1, dtype=np.int8)
+
+        heap = [(counts[i], i) for i in range(n)]
+        heapq.heapify(heap)
+        for node in range(n, 2 * n - 1):
+            count_a, a = heapq.heappop(heap)
+            count_b, b = heapq.heappop(heap)
+            parent[a] = node
+            parent[b] = node
+            branch[b] = 1
+            heapq.heappush(heap, (count_a + count_b, node))
+        root = 2 * n - 2
+
+        # ----------------------------------------------------------------------
+        #                                                    Trace Paths to Root
+        # ----------------------------------------------------------------------
+        # Walk up the tree for all the words at the same time, one level per
+        # iteration, recording the path from the leaf up to the root.
+        up_codes = []
+        up_points = []
+        depth = np.zeros(n, dtype=np.intp)
+        node = np.arange(n)
+        active = node != root
+        while active.any():
+            up_codes.append(np.where(active, branch[node], 0))
+            node = np.where(active, parent[node], node)
+            up_points.append(np.where(active, node - n, 0))
+            depth += active
+            active = node != root
+        self.lengths = depth
+
+        # ----------------------------------------------------------------------
+        #                                                  Reverse to Root First
+        # ----------------------------------------------------------------------
+        max_len = max(len(up_codes), 1)
+        self.codes = np.zeros((n, max_len), dtype=np.int8)
+        self.points = np.zeros((n, max_len), dtype=np.intp)
+        if up_codes:
+            up_codes = np.array(up_codes, dtype=np.int8).T
+            up_points = np.array(up_points, dtype=np.intp).T
+
+            j = np.arange(max_len)
+            used = j[np.newaxis, :] < depth[:, np.newaxis]
+            source = np.where(used, depth[:, np.newaxis] - 1 - j, 0)
+            rows = np.arange(n)[:, np.newaxis]
+            self.codes[used] = up_codes[rows, source][used]
+            self.points[used] = up_points[rows, source][used]
+
+
+# ==============================================================================
+#                                                           HIERARCHICAL_SOFTMAX
+# ==============================================================================
+def hierarchical_softmax(h, targets, W_nodes, tree):
+    """
+    Calculates the cost and the gradients of the hierarchical softmax output
+    layer for a batch of hidden layer vectors and their correct output words,
+    only visiting the O(log(vocab_size)) inner nodes along the path of each
+    correct word.
+
+    The probability of word w given hidden vector h is the product, over the
+    inner nodes n along the path of w, of:
+
+        sigmoid(W_nodes[n].h)   if the path branches to 0 at node n
+        sigmoid(-W_nodes[n].h)  if the path branches to 1 at node n
+
+    :param h: {2D array}
+
+        Hidden layer values, of shape (batch, vec_size).
+
+    :param targets: {array of ints}
+
+        index of the correct output word for each row of h, shape (batch,)
+
+    :param W_nodes: {2D array}
+
+        Weights of the inner nodes of the tree, one node per row, shape
+        (tree.num_inner, vec_size).
+
+    :param tree: {HuffmanTree}
+
+    :return: {tuple}
+
+        (J, G_h, rows, G_rows)
+
+        J      : cost (negative log probability) for each row of h.
+        G_h    : gradients WRT h, shape (batch, vec_size)
+        rows   : the rows of W_nodes that have gradients, one for each node
+                 along the path of each row of h (without the padding past
+                 the end of the shorter paths).
+        G_rows : gradients for those rows of W_nodes. Rows can appear more
+                 than once, so apply them with a scatter-add, eg:
+                 np.add.at(W_nodes, rows, -alpha * G_rows)
+    """
+    # ==========================================================================
+    targets = np.asarray(targets)
+    batch_size, vec_size = h.shape
+    points = tree.points[targets]                           # [batch, max_len]
+    codes = tree.codes[targets]
+    used = np.arange(points.shape[1]) < tree.lengths[targets][:, np.newaxis]
+
+    u = W_nodes[points]                             # [batch, max_len, vec_size]
+    z = np.matmul(u, h[:, :, np.newaxis])[:, :, 0]
+
+    # Flip the sign for branches to 1, so that sigmoid(z) is the probability
+    # of taking the correct branch at every node.
+    sign = 1 - 2 * codes
+    s, log_s = sigmoid_and_log(sign * z)
+
+    # The padding past the end of each path is left out with np.where(),
+    # rather than multiplied by zero, since the log-sigmoid can be -inf
+    J = -np.where(used, log_s, 0).sum(axis=1)
+    G_z = np.where(used, -sign * (1 - s), 0)
+    G_h = np.matmul(G_z[:, np.newaxis, :], u)[:, 0, :]
+
+    # Only the nodes that are on the paths. The padding points to node 0,
+    # and would count as updates to it, eg, for the per-row update limits
+    # of cbow_ngg.apply_row_gradients()
+    G_rows = G_z[used][:, np.newaxis] * np.repeat(h, tree.lengths[targets],
+                                                  axis=0)
+    return J, G_h, points[used], G_rows
+
+
+# ==============================================================================
+#                                                     HIERARCHICAL_SOFTMAX_PROBS
+# ==============================================================================
+def hierarchical_softmax_probs(z, tree, out=None):
+    """
+    Calculates the full probability distribution over all the words from the
+    values of all the inner nodes. Costs O(vocab_size * log(vocab_size)) per
+    example, so it is meant for inference, not training.
+
+    :param z: {array}
+
+        values of every inner node, ie, h.dot(W_nodes.T). Shape
+        (tree.num_inner,), or (batch, tree.num_inner).
+
+    :param tree: {HuffmanTree}
+    :param out: {array}(optional)
+
+        Array to store the probabilities in, instead of allocating a new one.
+        It can share memory with z, since the values of z are gathered along
+        the paths before anything is written to it.
+
+    :return: {array}
+
+        probabilities of each word, shape (num_classes,) or
+        (batch, num_classes)
+    """
+    # ==========================================================================
+    used = np.arange(tree.points.shape[1]) < tree.lengths[:, np.newaxis]
+    sign = 1 - 2 * tree.codes
+    zz = z[..., tree.points] * sign          # [..., num_classes, max_len]
+    log_p = np.where(used, sigmoid_and_log(zz)[1], 0).sum(axis=-1)
+    return np.exp(log_p, out=out)
@@ -0,0 +1,212 @@
+"""====================================================
+                    DESCRIPTION
+
+Asynchronous preparation of the training batches. A background thread
+creates the context windows, targets and negative samples of the upcoming
+batches, while the training loop does the gradient math on the current one.
+
+    producer = BatchProducer(tokens, offsets, c_left, c_right, start_index,
+                             end_index, batch_size=1024, sampler=sampler,
+                             num_negatives=k)
+    for contexts, targets, negatives, masks in producer:
+        train_batch(contexts, targets, ..., negatives=negatives, mask=masks)
+=======================================================
+"""
+__author__ = 'ronny'
+
+import threading
+import numpy as np
+
+try:
+    import queue
+except ImportError:     # Python 2
+    import Queue as queue
+
+from .corpus import get_context_windows, get_window_masks, \
+    iter_batch_positions
+
+_DONE = object()        # Put on the queue when all the batches are done
+
+
+################################################################################
+#                                                           BATCH PRODUCER CLASS
+################################################################################
+class BatchProducer(object):
+    """
+    An iterable over the batches of (contexts, targets, negatives, masks)
+    for one pass over an integer encoded corpus (the same batches as
+    corpus.iter_windows(), plus the negative samples and the window masks),
+    which are prepared by a background thread, up to queue_size batches
+    ahead.
+
+    The batches are written into a fixed pool of queue_size + 1 preallocated
+    buffers, which get reused, so no new arrays are handed out per batch.
+
+    NOTE: The arrays of a batch are only valid until the next batch is
+          requested. Copy them if they need to be kept for longer.
+
+    NOTE: Only the producer thread draws from the sampler while iterating, so
+          the sampler should not be used by anything else at the same time.
+    """
+    # ==========================================================================
+    #                                                                   __INIT__
+    # ==========================================================================
+    def __init__(self, tokens, offsets, c_left, c_right, start_index,
+                 end_index, batch_size=1024, shuffle=False, seed=None,
+                 start_batch=0, sampler=None, num_negatives=0,
+                 dynamic_window=False, queue_size=4):
+        """
+        :param tokens: {array} as returned by corpus.encode_sentences()
+        :param offsets: {array} as returned by corpus.encode_sentences()
+        :param c_left: {int} number of context words to the left
+        :param c_right: {int} number of context words to the right
+        :param start_index: {int} word index of the start of sentence token
+        :param end_index: {int} word index of the end of sentence token
+        :param batch_size: {int} number of center words per batch
+        :param shuffle: {boolean} visit the center words in a random order?
+        :param seed: {int}(optional) seed for the random order.
+        :param start_batch: {int}(default = 0) batches to skip at the start.
+        :param sampler: {AliasSampler}(optional)
+
+            Sampler to draw the negative samples from. Needed if
+            num_negatives > 0.
+
+        :param num_negatives: {int}(default = 0)
+
+            number of negative samples to draw for each window. eg, k for
+            CBOW, or k * (c_left + c_right) for skip-gram. If 0, then the
+            negatives of each batch are None.
+
+        :param dynamic_window: {boolean}(default = False)
+
+            Create the masks for randomly shrunk windows (see
+            corpus.get_window_masks()), seeded from [seed, batch number]. If
+            False, then the masks of each batch are None.
+
+        :param queue_size: {int}(default = 4)
+
+            maximum number of batches to prepare ahead of the training loop.
+        """
+        # ======================================================================
+        if num_negatives and sampler is None:
+            raise ValueError("A sampler is needed to draw the negative samples")
+        if dynamic_window and seed is None:
+            # The masks are seeded from the seed and the batch number
+            seed = np.random.randint(2**31 - 1)
+        self.tokens = tokens
+        self.offsets = offsets
+        self.c_left = c_left
+        self.c_right = c_right
+        self.start_index = start_index
+        self.end_index = end_index
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.start_batch = start_batch
+        self.sampler = sampler
+        self.num_negatives = num_negatives
+        self.dynamic_window = dynamic_window
+        self.queue_size = queue_size
+
+        self._buffers = []
+        for _ in range(queue_size + 1):
+            contexts = np.empty((batch_size, c_left + c_right),
+                                dtype=tokens.dtype)
+            targets = np.empty(batch_size, dtype=tokens.dtype)
+            negatives = None
+            if num_negatives:
+                negatives = np.empty((batch_size, num_negatives),
+                                     dtype=np.intp)
+            masks = None
+            if dynamic_window:
+                masks = np.empty((batch_size, c_left + c_right), dtype=bool)
+            self._buffers.append((contexts, targets, negatives, masks))
+
+        self._free = queue.Queue()
+        self._full = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ==========================================================================
+    #                                                                   _PRODUCE
+    # ==========================================================================
+    def _produce(self):
+        """ Runs in the background thread, filling the free buffers """
+        try:
+            batches = iter_batch_positions(len(self.tokens),
+                                           batch_size=self.batch_size,
+                                           shuffle=self.shuffle,
+                                           seed=self.seed,
+                                           start_batch=self.start_batch)
+            for batch, positions in enumerate(batches, self.start_batch):
+                b = self._get_free_buffer()
+                if b is None:
+                    return
+                contexts, targets, negatives, masks = self._buffers[b]
+                n = len(positions)
+
+                get_context_windows(self.tokens, self.offsets, positions,
+                                    self.c_left, self.c_right,
+                                    self.start_index, self.end_index,
+                                    out=contexts[:n])
+                np.take(self.tokens, positions, out=targets[:n])
+                if negatives is not None:
+                    negatives[:n] = self.sampler.sample(
+                        (n, self.num_negatives))
+                if masks is not None:
+                    get_window_masks(n, self.c_left, self.c_right,
+                                     random_state=[self.seed, batch],
+                                     out=masks[:n])
+                self._full.put((b, n))
+            self._full.put(_DONE)
+        except Exception as e:
+            # Let the training loop know, rather than leave it waiting forever
+            self._full.put(e)
+
+    def _get_free_buffer(self):
+        """ Waits for a free buffer. Returns None if the producer is closed """
+        while not self._stop.is_set():
+            try:
+                return self._free.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+
+    # ==========================================================================
+    #                                                                   __ITER__
+    # ==========================================================================
+    def __iter__(self):
+        if self._thread is not None:
+            raise RuntimeError("A BatchProducer can only be iterated over once")
+        for b in range(len(self._buffers)):
+            self._free.put(b)
+        self._thread = threading.Thread(target=self._produce)
+        self._thread.daemon = True
+        self._thread.start()
+
+        held = None     # The buffer in use by the training loop
+        try:
+            while True:
+                if held is not None:
+                    self._free.put(held)
+                    held = None
+                item = self._full.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                held, n = item
+                yield tuple(None if x is None else x[:n]
+                            for x in self._buffers[held])
+        finally:
+            self.close()
+
+    # ==========================================================================
+    #                                                                      CLOSE
+    # ==========================================================================
+    def close(self):
+        """ Stops the background thread (if it is still running) """
+        self._stop.set()
+        if (self._thread is not None
+                and self._thread is not threading.current_thread()):
+            self._thread.join()
@@ -0,0 +1,168 @@
+"""====================================================
+                    DESCRIPTION
+
+Samplers for drawing word indices from a fixed distribution, such as the
+negative sampling distribution returned by
+cbow_ngg.get_sampling_distribution()
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+
+
+################################################################################
+#                                                            ALIAS SAMPLER CLASS
+################################################################################
+class AliasSampler(object):
+    """
+    Draws samples (with replacement) from a discrete distribution in O(1) time
+    per sample, using Vose's alias method.
+
+    The alias tables are built once, in O(n) time, when the object is created.
+    Samples are then drawn in bulk, and served from a large prefetched block
+    of samples, so that each call to sample() is mostly just a slice of an
+    existing array.
+
+    This is intended to replace calls such as:
+
+        np.random.choice(vocab.i, size=k, p=vocab.p, replace=False)
+
+    which take O(vocab_size) time per call.
+
+    NOTE: As in the original word2vec implementation, samples are drawn WITH
+          replacement.
+
+    :references:
+
+        - Vose, M. D. (1991). A linear algorithm for generating random numbers
+          with a given distribution. IEEE Transactions on Software
+          Engineering, 17(9), 972-975.
+    """
+    # ==========================================================================
+    #                                                                   __INIT__
+    # ==========================================================================
+    def __init__(self, p, block_size=1000000, seed=None):
+        """
+        :param p: {array-like}
+
+            The probabilities of each of the outcomes 0, 1, ..., n-1. Does not
+            need to be exactly normalised.
+
+        :param block_size: {int}(default = 1000000)
+
+            Number of samples to prefetch in one go.
+
+        :param seed: {int}(optional)
+
+            Seed for the random number generator used by this sampler.
+        """
+        # ======================================================================
+        p = np.asarray(p, dtype=np.float64)
+        n = len(p)
+        self.n = n
+        self.block_size = block_size
+        self.random = np.random.RandomState(seed)
+
+        # ----------------------------------------------------------------------
+        #                                                     Build Alias Tables
+        # ----------------------------------------------------------------------
+        scaled = p * (n / p.sum())
+        self.prob = np.ones(n)
+        self.alias = np.arange(n)
+
+        small = list(np.flatnonzero(scaled < 1))
+        large = list(np.flatnonzero(scaled >= 1))
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1
+            if scaled[l] < 1:
+                small.append(l)
+            else:
+                large.append(l)
+        # Anything left over is (up to rounding errors) exactly 1, which
+        # is what self.prob was initialised to.
+
+        # Prefetched samples
+        self._block = np.empty(0, dtype=np.intp)
+        self._pos = 0
+
+    # ==========================================================================
+    #                                                                 FROM_VOCAB
+    # ==========================================================================
+    @classmethod
+    def from_vocab(cls, vocab, **kwargs):
+        """
+        Creates a sampler for the sampling distribution in a vocabulary
+        dataframe, as created by cbow_ngg.create_vocab_df(). The samples drawn
+        are the values in the `i` column of the vocabulary.
+
+        :param vocab: {DataFrame}
+        :param kwargs: other arguments to pass to AliasSampler()
+        :return: {AliasSampler}
+        """
+        # ======================================================================
+        p = np.empty(len(vocab))
+        p[np.asarray(vocab.i)] = np.asarray(vocab.p)
+        return cls(p, **kwargs)
+
+    # ==========================================================================
+    #                                                                     RESEED
+    # ==========================================================================
+    def reseed(self, seed=None):
+        """
+        Resets the random number generator of the sampler, and discards any
+        prefetched samples. Eg, for giving each worker process its own stream
+        of samples from a copy of the same sampler.
+
+        :param seed: {int}(optional)
+        """
+        # ======================================================================
+        self.random = np.random.RandomState(seed)
+        self._block = np.empty(0, dtype=np.intp)
+        self._pos = 0
+
+    # ==========================================================================
+    #                                                                       DRAW
+    # ==========================================================================
+    def draw(self, n):
+        """
+        Draws n new samples straight from the alias tables (bypassing the
+        prefetched block).
+
+        :param n: {int}
+        :return: {array of ints}
+        """
+        # ======================================================================
+        columns = self.random.randint(0, self.n, size=n)
+        coin_tosses = self.random.random_sample(n)
+        return np.where(coin_tosses < self.prob[columns],
+                        columns,
+                        self.alias[columns])
+
+    # ==========================================================================
+    #                                                                     SAMPLE
+    # ==========================================================================
+    def sample(self, size):
+        """
+        Returns samples from the prefetched block of samples, fetching a new
+        block when the current one runs out.
+
+        :param size: {int, or tuple of ints}
+
+            shape of the array of samples to return.
+
+        :return: {array of ints}
+        """
+        # ======================================================================
+        n = int(np.prod(size))
+        if self._pos + n > len(self._block):
+            self._block = self.draw(max(n, self.block_size))
+            self._pos = 0
+
+        samples = self._block[self._pos: self._pos + n]
+        self._pos += n
+        return samples.reshape(size)
@@ -0,0 +1,289 @@
+"""====================================================
+                    DESCRIPTION
+
+Cosine similarity queries over trained word vectors. Exact (brute force, but
+blocked and batched) and approximate (random projection LSH) lookups.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+
+from .. import config
+
+
+# ==============================================================================
+#                                                                 NORMALIZE_ROWS
+# ==============================================================================
+def normalize_rows(W, dtype=None, block_size=65536):
+    """
+    Returns a copy of W with every row scaled to have an L2 norm of 1, so that
+    the cosine similarity between rows is simply their dot product. Rows that
+    are all zeros are left as zeros.
+
+    The rows are processed in blocks, so W can be a memory mapped array that
+    does not fit in memory all at once.
+
+    :param W: {2D array} one vector per row.
+    :param dtype: {numpy dtype}(optional)
+
+        Defaults to the global dtype in bricknet.config
+
+    :param block_size: {int} number of rows to process at a time.
+    :return: {2D array}
+    """
+    # ==========================================================================
+    dtype = config.get_dtype(dtype)
+    out = np.empty(W.shape, dtype=dtype)
+    for i in range(0, W.shape[0], block_size):
+        block = np.asarray(W[i: i + block_size], dtype=dtype)
+        norms = np.sqrt((block * block).sum(axis=1, keepdims=True))
+        norms[norms == 0] = 1
+        np.divide(block, norms, out=out[i: i + block_size])
+    return out
+
+
+# ==============================================================================
+#                                                                          TOP_K
+# ==============================================================================
+def top_k(scores, k):
+    """
+    Finds the k highest scores in each row, using np.argpartition (O(n)),
+    rather than sorting the whole row (O(n log n)).
+
+    :param scores: {2D array}
+    :param k: {int}
+    :return: {tuple}
+
+        (indices, values) each of shape (rows, k), sorted from highest to
+        lowest score.
+    """
+    # ==========================================================================
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        indices = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    values = np.take_along_axis(scores, indices, axis=1)
+
+    order = np.argsort(-values, axis=1)
+    return (np.take_along_axis(indices, order, axis=1),
+            np.take_along_axis(values, order, axis=1))
+
+
+################################################################################
+#                                                     NEAREST NEIGHBOURS CLASS
+################################################################################
+class NearestNeighbours(object):
+    """
+    Exact top-k cosine similarity lookups over a matrix of word vectors.
+
+    The vectors are normalised once, when the object is created. Queries are
+    answered in batches, with one matrix product per block of the vocabulary,
+    keeping only the top-k candidates of each block (using np.argpartition)
+    before merging them.
+
+    Example:
+
+        nn = NearestNeighbours(W_in, words)
+        nn.most_similar(["king", "queen"], k=10)
+    """
+    # ==========================================================================
+    #                                                                   __INIT__
+    # ==========================================================================
+    def __init__(self, W, words=None, block_size=65536, dtype=None):
+        """
+        :param W: {2D array} word vectors, one word per row.
+        :param words: {list of strings}(optional)
+
+            The words for each row of W. Needed for looking up words by their
+            strings with most_similar().
+
+        :param block_size: {int}
+
+            number of vocabulary rows to score per matrix product. Limits the
+            temporary memory used to (num_queries, block_size) scores.
+
+        :param dtype: {numpy dtype}(optional) data type for the normalised
+                      vectors. Defaults to the global dtype in bricknet.config
+        """
+        # ======================================================================
+        self.vectors = normalize_rows(W, dtype=dtype)
+        self.block_size = block_size
+        self.words = words
+        if words is not None:
+            self.word_index = {word: i for i, word in enumerate(words)}
+
+    # ==========================================================================
+    #                                                                      QUERY
+    # ==========================================================================
+    def query(self, Q, k=10):
+        """
+        Finds the k most similar vectors for each of the query vectors.
+
+        :param Q: {array}
+
+            the query vectors, one per row (or a single vector). They do not
+            need to be normalised.
+
+        :param k: {int} number of neighbours to return per query.
+
+        :return: {tuple}
+
+            (indices, similarities), each of shape (num_queries, k), sorted
+            from most to least similar.
+        """
+        # ======================================================================
+        Q = normalize_rows(np.atleast_2d(Q), dtype=self.vectors.dtype)
+        best_indices = []
+        best_scores = []
+        for i in range(0, self.vectors.shape[0], self.block_size):
+            scores = Q.dot(self.vectors[i: i + self.block_size].T)
+            indices, scores = top_k(scores, k)
+            best_indices.append(indices + i)
+            best_scores.append(scores)
+
+        # Merge the top candidates from every block
+        candidates = np.concatenate(best_indices, axis=1)
+        indices, scores = top_k(np.concatenate(best_scores, axis=1), k)
+        return np.take_along_axis(candidates, indices, axis=1), scores
+
+    # ==========================================================================
+    #                                                               MOST_SIMILAR
+    # ==========================================================================
+    def most_similar(self, words, k=10):
+        """
+        Returns the k most similar words to each of the given words (excluding
+        the word itself).
+
+        :param words: {string, or list of strings}
+        :param k: {int}
+        :return: {list}
+
+            For a single word, a list of (word, similarity) tuples. For a list
+            of words, a list of such lists. A list can be shorter than k if
+            fewer neighbours were found (eg, by an LSHIndex).
+        """
+        # ======================================================================
+        single = isinstance(words, str)
+        if single:
+            words = [words]
+
+        word_indices = [self.word_index[word] for word in words]
+        indices, scores = self.query(self.vectors[word_indices], k=k + 1)
+
+        # Leave out the -1 padding of queries with fewer than k + 1 results
+        results = []
+        for word_i, row_indices, row_scores in zip(word_indices, indices,
+                                                   scores):
+            results.append([(self.words[i], float(score))
+                            for i, score in zip(row_indices, row_scores)
+                            if i >= 0 and i != word_i and np.isfinite(score)
+                            ][:k])
+        return results[0] if single else results
+
+
+################################################################################
+#                                                               LSH INDEX CLASS
+################################################################################
+class LSHIndex(NearestNeighbours):
+    """
+    Approximate top-k cosine similarity lookups, using random projection
+    locality sensitive hashing.
+
+    Each of num_tables hash tables hashes a vector to num_bits bits, one bit
+    for which side of a random hyperplane it falls on. Vectors with a high
+    cosine similarity are likely to share a bucket in at least one table.
+    A query only scores the vectors in its buckets (exactly), instead of the
+    whole vocabulary.
+
+    More tables gives better recall, more bits gives smaller buckets (faster
+    queries, lower recall).
+
+    :references:
+
+        - Charikar, M. S. (2002). Similarity estimation techniques from
+          rounding algorithms. In Proceedings of the 34th Annual ACM Symposium
+          on Theory of Computing, pages 380-388.
+    """
+    # ==========================================================================
+    #                                                                   __INIT__
+    # ==========================================================================
+    def __init__(self, W, words=None, num_bits=16, num_tables=8, seed=None,
+                 dtype=None):
+        """
+        :param W: {2D array} word vectors, one word per row.
+        :param words: {list of strings}(optional)
+        :param num_bits: {int}(default = 16) bits per hash (up to 62)
+        :param num_tables: {int}(default = 8) number of hash tables
+        :param seed: {int}(optional) seed for the random hyperplanes
+        :param dtype: {numpy dtype}(optional) data type for the normalised
+                      vectors. Defaults to the global dtype in bricknet.config
+        """
+        # ======================================================================
+        NearestNeighbours.__init__(self, W, words=words, dtype=dtype)
+        random = np.random.RandomState(seed)
+        self.hyperplanes = random.randn(num_tables, num_bits,
+                                        W.shape[1]).astype(self.vectors.dtype)
+        self.bit_values = 2 ** np.arange(num_bits, dtype=np.int64)
+
+        # For each table, the hash of every vector, sorted, along with the
+        # order that sorts them, so that a bucket is a contiguous range.
+        self.sorted_hashes = []
+        self.sorted_rows = []
+        for table in range(num_tables):
+            hashes = self._hash(self.vectors, table)
+            order = np.argsort(hashes, kind="mergesort")
+            self.sorted_hashes.append(hashes[order])
+            self.sorted_rows.append(order)
+
+    def _hash(self, vectors, table):
+        bits = vectors.dot(self.hyperplanes[table].T) > 0
+        return bits.dot(self.bit_values)
+
+    # ==========================================================================
+    #                                                                      QUERY
+    # ==========================================================================
+    def query(self, Q, k=10):
+        """
+        Finds (approximately) the k most similar vectors for each of the query
+        vectors. If fewer than k candidates are found for a query, the
+        remaining indices are -1 and their similarities are -inf.
+
+        :param Q: {array} the query vectors, one per row (or a single vector).
+        :param k: {int} number of neighbours to return per query.
+
+        :return: {tuple}
+
+            (indices, similarities), each of shape (num_queries, k), sorted
+            from most to least similar.
+        """
+        # ======================================================================
+        Q = normalize_rows(np.atleast_2d(Q), dtype=self.vectors.dtype)
+        num_queries = Q.shape[0]
+
+        # Bucket ranges for all queries in each table, found in one go.
+        starts = []
+        ends = []
+        for table in range(len(self.sorted_hashes)):
+            hashes = self._hash(Q, table)
+            starts.append(np.searchsorted(self.sorted_hashes[table], hashes,
+                                          side="left"))
+            ends.append(np.searchsorted(self.sorted_hashes[table], hashes,
+                                        side="right"))
+
+        indices = np.full((num_queries, k), -1, dtype=np.intp)
+        scores = np.full((num_queries, k), -np.inf, dtype=self.vectors.dtype)
+        for q in range(num_queries):
+            candidates = np.unique(np.concatenate(
+                [rows[start[q]: end[q]] for rows, start, end
+                 in zip(self.sorted_rows, starts, ends)]))
+            if len(candidates) == 0:
+                continue
+
+            candidate_scores = self.vectors[candidates].dot(Q[q])
+            best, best_scores = top_k(candidate_scores[np.newaxis, :], k)
+            indices[q, :best.shape[1]] = candidates[best[0]]
+            scores[q, :best.shape[1]] = best_scores[0]
+
+        return indices, scores
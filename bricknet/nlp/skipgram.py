@@ -4,10 +4,13 @@
 __author__ = 'ronny'
 
 
-#TODO: maybe have pandas load from root module.
-import pandas as pd
-np = pd.np
-#from .. import np
+import numpy as np
+
+from .. import config
+from ..callbacks import PhaseTimer
+from . import cbow_ngg
+from .huffman import hierarchical_softmax
+from ..activations import softmax, softmax_cross_entropy, sigmoid_and_log
 
 
 # ==============================================================================
@@ -27,7 +30,8 @@ def grad_input_vectors(in_vec, out_vec, in_df, out_df, expinout=None):
     :param expinout: {}(defualt= None)
 
         cached calculation of exponent of dot product of all output vectors with
-        input vector
+        input vector (or anything proportional to it, eg, the softmax
+        probabilities, which do not overflow)
 
     :return:
     """
@@ -38,7 +42,7 @@ def grad_input_vectors(in_vec, out_vec, in_df, out_df, expinout=None):
     # The exponent of the dot product of all the output vectors with the input vector.
     # $e^(U_j \cdot V_c)$  for all j in vocabulary
     if expinout is None:
-        expinout = np.exp(out_df.dot(in_vec))
+        expinout = softmax(out_df.dot(in_vec))
 
     return (out_vec - (out_df.multiply(expinout/expinout.sum(), axis=0)).sum())
 
@@ -63,7 +67,8 @@ def grad_output_vectors(in_vec, out_vec, in_df, out_df, expinout=None):
     :param expinout: {}(defualt= None)
 
         cached calculation of exponent of dot product of all output vectors with
-        input vector
+        input vector (or anything proportional to it, eg, the softmax
+        probabilities, which do not overflow)
 
     :return:
     """
@@ -74,7 +79,7 @@ def grad_output_vectors(in_vec, out_vec, in_df, out_df, expinout=None):
     # The exponent of the dot product of all the output vectors with the input vector.
     # $e^(U_j \cdot V_c)$  for all j in vocabulary
     if expinout is None:
-        expinout = np.exp(out_df.dot(in_vec))
+        expinout = softmax(out_df.dot(in_vec))
     return (in_vec - np.outer((expinout / expinout.sum()), in_vec).sum(0))
 
 
@@ -107,12 +112,14 @@ def prob_word_pair(in_word, out_word, in_df, out_df, cached_denominator=None):
     in_vec = in_df.loc[in_word]
     out_vec = out_df.loc[out_word]
 
-    numerator = np.exp(out_vec.dot(in_vec))
-
     if cached_denominator is None:
-        denominator = (np.exp(out_df.dot(in_vec))).sum()
-        return numerator / denominator
+        # log probability from the stable softmax cost, so that large dot
+        # products do not overflow.
+        cost, _ = softmax_cross_entropy(np.asarray(out_df.dot(in_vec)),
+                                        out_df.index.get_loc(out_word))
+        return np.exp(-cost)
     else:
+        numerator = np.exp(out_vec.dot(in_vec))
         return numerator / cached_denominator
 
 
@@ -136,13 +143,20 @@ def most_likely_output_words(in_word, in_df, out_df, n=10):
 
         dataframe of the output word
     :param n:
-    :return:
+    :return: {Series}
+
+        probabilities of the n most likely output words, indexed by word, from
+        most to least likely.
+
+    NOTE: For cosine similarity lookups over the trained word vectors, use
+          similarity.NearestNeighbours (or similarity.LSHIndex), which scores
+          batches of queries without going through pandas.
     """
+    import pandas as pd
     in_vec = in_df.loc[in_word]
-    dot_products = np.exp(out_df.dot(in_vec))
-    out_probabilities = dot_products / dot_products.sum()
-    out_probabilities.sort(ascending=False)
-    out_probabilities.head(n)
+    out_probabilities = pd.Series(softmax(out_df.dot(in_vec)),
+                                  index=out_df.index)
+    return out_probabilities.nlargest(n)
 
 
 # ==============================================================================
@@ -169,11 +183,11 @@ def deltas(sentence, c, in_df, out_df):
         center_word = words[w]
         in_vec = in_df.loc[center_word]
 
-        # Cache the calculation of exponent of dot product of all output vectors
+        # Cache the (stable) softmax of the dot products of all output vectors
         # with input vector since it is shared between all output words within
         # a window around a given center word. Avoids calculating the same
         # expensive calculations over and over.
-        expinout = np.exp(out_df.dot(in_vec))
+        expinout = softmax(out_df.dot(in_vec))
 
         for out_index in window_indexes:
             out_word = words[out_index]
@@ -218,7 +232,7 @@ def get_vocab_from_string(s):
 # ==============================================================================
 #                                                                 WORD_VECTOR_DF
 # ==============================================================================
-def word_vector_df(vocab, vec_size = 20):
+def word_vector_df(vocab, vec_size = 20, dtype=None):
     """
     Creates a dataframe of word vectors from a list or set of words as the vocab.
 
@@ -230,16 +244,22 @@ def word_vector_df(vocab, vec_size = 20):
 
         The size of the vector to use as the word vectors.
 
+    :param dtype: {numpy dtype}(optional)
+
+        Defaults to the global dtype in bricknet.config
+
     :return: {datagrame}
 
     """
+    import pandas as pd
     # TODO: check the datatype of vocab, typecaset to set to be safe.
     # initialise the word vectors to random values
-    df = np.random.rand(len(vocab), vec_size)
+    df = np.random.rand(len(vocab), vec_size).astype(config.get_dtype(dtype))
     df = pd.DataFrame(df, index=vocab)
     return df
 
 def trainB(iterations, alpha=0.01):
+    import pandas as pd
     window_dims = [4,4]  # Number of words on either side of the center word
     c_left  = window_dims[0]    # Number of context words to the left of center word
     c_right = window_dims[1]    # Number of context words to the right of center word
@@ -276,11 +296,11 @@ def trainB(iterations, alpha=0.01):
         # The input word for the current window
         in_vec = in_df.loc[center_word]
 
-        # Cache the calculation of exponent of dot product of all output vectors
+        # Cache the (stable) softmax of the dot products of all output vectors
         # with input vector since it is shared between all output words within
         # a window around a given center word. Avoids calculating the same
         # expensive calculations over and over.
-        expinout = np.exp(out_df.dot(in_vec))
+        expinout = softmax(out_df.dot(in_vec))
 
         for out_word in context:
             out_vec = out_df.loc[out_word] # vector for current output word
@@ -299,3 +319,300 @@ def trainB(iterations, alpha=0.01):
         out_df.loc[window_words] += alpha * G_out
         in_df.loc[center_word] +=  alpha * G_in
 
+
+# ##############################################################################
+#                                                              NEGATIVE SAMPLING
+# ##############################################################################
+# Skip-gram with negative sampling, working on plain numpy arrays of word
+# indices. Instead of normalising over the whole vocabulary, each
+# (center, context) word pair is trained against k negative samples drawn from
+# the same sampling distribution as in cbow_ngg.get_sampling_distribution(),
+# so the cost per pair is O(k * vec_size) rather than O(vocab_size * vec_size)
+
+# ==============================================================================
+#                                                                    TRAIN_BATCH
+# ==============================================================================
+def train_batch(context_indices, center_indices, W_in, W_out, vocab, k=5,
+                alpha=0.01, sampler=None, tree=None, optimizer=None,
+                sigmoid_fn=None, timer=None, negatives=None, mask=None,
+                max_updates=cbow_ngg.MAX_UPDATES):
+    """
+    Trains a skip-gram model with negative sampling on a batch of windows.
+
+    The center word of each window is the input word, and every one of the
+    context words of that window is a correct output word. All the context
+    words and negative samples for all the windows are gathered in one go,
+    the sigmoid gradients for all of them are calculated in a single pass, and
+    the updates are applied with scatter-adds (np.add.at).
+
+    :param context_indices: {2D array of ints}
+
+        Array of shape (batch, num_context_words) with the indices of the
+        context (output) words of each window.
+
+    :param center_indices: {array of ints}
+
+        Array of shape (batch,) with the index of the center (input) word of
+        each window.
+
+    :param W_in: {2D array}
+
+        The input word matrix, of shape (vocab_size, vec_size), one word per
+        row. Updated in place.
+
+    :param W_out: {2D array}
+
+        The output word matrix, of shape (vocab_size, vec_size), one word per
+        row. Updated in place.
+
+    :param vocab: {DataFrame}
+
+        Vocabulary dataframe, as created by cbow_ngg.create_vocab_df(). Used
+        for drawing the negative samples when no sampler is given.
+
+    :param k: {int}
+
+        The number of negative samples to use for each (center, context) pair.
+        If None, then a full softmax over the whole vocabulary is used instead
+        (O(vocab_size) per pair, so only for small vocabularies, or as a
+        reference to compare against).
+
+    :param alpha: {float}
+
+        learning rate.
+
+    :param sampler: {AliasSampler}(optional)
+
+        Sampler to draw the negative samples from.
+
+    :param tree: {HuffmanTree}(optional)
+
+        If provided, then a hierarchical softmax output layer is used instead
+        of negative sampling (and k and sampler are ignored). In that case,
+        the rows of W_out are the weights of the inner nodes of the tree.
+
+    :param optimizer: {Optimizer}(optional)
+
+        If provided, then the updates to the word matrices are done with this
+        optimizer (eg, optimizers.AdaGrad()), instead of plain SGD with alpha.
+
+    :param sigmoid_fn: {function}(default = activations.sigmoid_and_log)
+
+        Function that returns (sigmoid(z), log(sigmoid(z))) for the negative
+        sampling scores.
+
+    :param timer: {PhaseTimer}(optional)
+
+        If provided, the time spent on the "sampling", "forward", "backward"
+        and "update" phases is added to it.
+
+    :param negatives: {array of ints}(optional)
+
+        Negative samples that were drawn ahead of time (eg, by a
+        producer.BatchProducer), with batch * num_context_words * k elements.
+        If None, then they are drawn from the sampler.
+
+    :param mask: {2D boolean array}(optional)
+
+        Same shape as context_indices. If provided, then only the (center,
+        context) pairs where the mask is True are trained on (eg, for the
+        randomly shrunk windows of corpus.get_window_masks()).
+
+    :param max_updates: {float}(default = cbow_ngg.MAX_UPDATES)
+
+        The most updates' worth of gradients that any one row of the word
+        matrices can get from the batch, see cbow_ngg.apply_row_gradients().
+        The gradient of a center word counts as one update for each of its
+        (center, context) pairs. None for no limit, which can diverge for
+        large batches.
+
+    :return: {array}
+
+        The cost for each of the windows in the batch (summed over the
+        context words of the window).
+    """
+    # ==========================================================================
+    if timer is None:
+        timer = PhaseTimer()
+    context_indices = np.asarray(context_indices)
+    batch_size, num_context_words = context_indices.shape
+    if mask is None:
+        num_pairs = num_context_words
+    else:
+        mask = np.asarray(mask, dtype=bool)
+        num_pairs = mask.sum(axis=1)
+
+    # Input vectors of the center words
+    v = W_in[center_indices]                            # shape [batch, vec_size]
+    timer.lap("forward")
+
+    # --------------------------------------------------------------------------
+    #                                                Hierarchical Softmax Output
+    # --------------------------------------------------------------------------
+    if tree is not None:
+        # One row per (center, context) pair
+        v_pairs, targets = _pairs(v, context_indices, mask)
+        J, G_v, rows, G_rows = hierarchical_softmax(v_pairs, targets, W_out,
+                                                    tree)
+        G_v = _window_sums(G_v, context_indices.shape, mask)
+        timer.lap("backward")   # (forward and backward through the tree)
+        cbow_ngg.apply_row_gradients(W_in, center_indices, G_v, alpha=alpha,
+                                     optimizer=optimizer,
+                                     max_updates=max_updates,
+                                     updates=num_pairs)
+        cbow_ngg.apply_row_gradients(W_out, rows, G_rows, alpha=alpha,
+                                     optimizer=optimizer,
+                                     max_updates=max_updates)
+        timer.lap("update")
+        return _window_sums(J, context_indices.shape, mask)
+
+    # --------------------------------------------------------------------------
+    #                                                        Full Softmax Output
+    # --------------------------------------------------------------------------
+    if k is None:
+        v_pairs, targets = _pairs(v, context_indices, mask)
+        z = v_pairs.dot(W_out.T)                      # [pairs, vocab_size]
+
+        # Cost and gradients WRT z, in place in the buffer of z
+        J, G_z = softmax_cross_entropy(z, targets, out=z)
+        timer.lap("forward")
+        G_v = _window_sums(G_z.dot(W_out), context_indices.shape, mask)
+        G_W_out = G_z.T.dot(v_pairs)
+        timer.lap("backward")
+
+        if optimizer is None:
+            W_out -= alpha * G_W_out
+        else:
+            optimizer.update(W_out, G_W_out)
+        cbow_ngg.apply_row_gradients(W_in, center_indices, G_v, alpha=alpha,
+                                     optimizer=optimizer,
+                                     max_updates=max_updates,
+                                     updates=num_pairs)
+        timer.lap("update")
+        return _window_sums(J, context_indices.shape, mask)
+
+    # --------------------------------------------------------------------------
+    #                                         Calculate Subset of Weights to Use
+    # --------------------------------------------------------------------------
+    # For each (center, context) pair, the context word is in position 0 along
+    # the last axis, and all others are the negative samples for that pair.
+    sample_indices = np.empty([batch_size, num_context_words, k + 1],
+                              dtype=np.intp)
+    sample_indices[:, :, 0] = context_indices
+    if negatives is not None:
+        sample_indices[:, :, 1:] = np.reshape(
+            negatives, (batch_size, num_context_words, k))
+    elif sampler is None:
+        sample_indices[:, :, 1:] = np.random.choice(
+            vocab.i, size=[batch_size, num_context_words, k], p=vocab.p)
+    else:
+        sample_indices[:, :, 1:] = sampler.sample(
+            (batch_size, num_context_words, k))
+
+    # All the output vectors of a window in one flat block per window
+    num_samples = num_context_words * (k + 1)
+    u = W_out[sample_indices.reshape(batch_size, num_samples)]
+    # shape [batch, num_samples, vec_size]
+    timer.lap("sampling")
+
+    # --------------------------------------------------------------------------
+    #                                                     Calculate Output layer
+    # --------------------------------------------------------------------------
+    z = np.matmul(u, v[:, :, np.newaxis])[:, :, 0]
+    z = z.reshape(batch_size, num_context_words, k + 1)
+
+    # --------------------------------------------------------------------------
+    #                                                  Calculate Cost, Gradients
+    # --------------------------------------------------------------------------
+    # Flip the sign for the negative samples, so that sigmoid(z) is the
+    # probability of the correct label for every sample.
+    z[:, :, 1:] *= -1
+    s, log_s = (sigmoid_fn or sigmoid_and_log)(z)
+    if mask is not None:
+        log_s *= mask[:, :, np.newaxis]
+    J = -log_s.sum(axis=(1, 2))
+    timer.lap("forward")
+
+    G_z = 1 - s             # Gradient at the output layer for negative samples
+    G_z[:, :, 0] *= -1      # Update gradient for the correct context words
+    if mask is not None:
+        G_z *= mask[:, :, np.newaxis]     # No gradients for masked out pairs
+    G_z = G_z.reshape(batch_size, num_samples)
+
+    G_W_out = G_z[:, :, np.newaxis] * v[:, np.newaxis, :]
+    G_v = np.matmul(G_z[:, np.newaxis, :], u)[:, 0, :]
+    timer.lap("backward")
+
+    # --------------------------------------------------------------------------
+    #                                                          Update Parameters
+    # --------------------------------------------------------------------------
+    cbow_ngg.apply_row_gradients(W_in, center_indices, G_v, alpha=alpha,
+                                 optimizer=optimizer, max_updates=max_updates,
+                                 updates=num_pairs)
+    out_rows = sample_indices.reshape(batch_size, num_samples)
+    if mask is not None:
+        # Only update the output vectors of the pairs that are used
+        out_rows = sample_indices[mask]
+        G_W_out = G_W_out.reshape(batch_size, num_context_words, k + 1,
+                                  -1)[mask]
+    cbow_ngg.apply_row_gradients(W_out, out_rows, G_W_out, alpha=alpha,
+                                 optimizer=optimizer, max_updates=max_updates)
+    timer.lap("update")
+
+    return J
+
+
+def _pairs(v, context_indices, mask=None):
+    """
+    The center word vector, and the context word index, of each (center,
+    context) pair in a batch, leaving out the pairs that are masked out.
+    """
+    v_pairs = np.repeat(v, context_indices.shape[1], axis=0)
+    targets = context_indices.ravel()
+    if mask is not None:
+        pairs = mask.ravel()
+        v_pairs, targets = v_pairs[pairs], targets[pairs]
+    return v_pairs, targets
+
+
+def _window_sums(x, shape, mask=None):
+    """
+    Sums the values of the (center, context) pairs from _pairs() over the
+    pairs of each window.
+    """
+    if mask is not None:
+        full = np.zeros((mask.size,) + x.shape[1:], dtype=x.dtype)
+        full[mask.ravel()] = x
+        x = full
+    return x.reshape(shape + x.shape[1:]).sum(axis=1)
+
+
+# ==============================================================================
+#                                                                   TRAIN_CORPUS
+# ==============================================================================
+def train_corpus(tokens, offsets, W_in, W_out, vocab, **kwargs):
+    """
+    Trains a skip-gram model with negative sampling, for one pass over an
+    integer encoded corpus (as created by corpus.encode_sentences()).
+
+    Uses the same training loop as cbow_ngg.train_corpus(), with
+    skipgram.train_batch() to train on each batch of windows. So it accepts
+    all the same arguments (window, k, alpha, min_alpha, batch_size, sample,
+    prefetch, sampler, optimizer, sigmoid_fn, callbacks, shuffle, seed, store,
+    ...), and can also be used as the trainer for hogwild.train_parallel().
+
+    :param tokens: {array of ints} word indices for the whole corpus.
+    :param offsets: {array of ints} sentence offsets into the tokens array.
+    :param W_in: {2D array} input word matrix, one word per row.
+    :param W_out: {2D array} output word matrix, one word per row.
+    :param vocab: {DataFrame} Vocabulary dataframe.
+    :param kwargs: other arguments for cbow_ngg.train_corpus()
+
+    :return: {array}
+
+        The average cost of the windows in each batch.
+    """
+    # ==========================================================================
+    return cbow_ngg.train_corpus(tokens, offsets, W_in, W_out, vocab,
+                                 batch_trainer=train_batch,
+                                 negatives_per_context=True, **kwargs)
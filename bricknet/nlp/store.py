@@ -0,0 +1,204 @@
+"""====================================================
+                    DESCRIPTION
+
+Disk backed storage for word embedding matrices.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import io
+import os
+import json
+import numpy as np
+
+from .. import config
+
+
+################################################################################
+#                                                          EMBEDDING STORE CLASS
+################################################################################
+class EmbeddingStore(object):
+    """
+    Stores the input and output word matrices (W_in and W_out) of a word2vec
+    model as memory mapped files on disk, along with a header that holds the
+    vocabulary, the hyperparameters used, and the training state.
+
+    A store is a directory containing:
+
+        header.json : the vocabulary, hyperparameters and training state.
+        W_in.npy    : input word matrix, one word vector per row.
+        W_out.npy   : output word matrix, one word vector per row.
+
+    The matrices are np.memmap arrays, so they can be used directly by the
+    trainers (eg cbow_ngg.train_corpus()), and they can be larger than the
+    available RAM. Any updates made to them are written back to disk by the
+    operating system, and are forced to disk by flush() and checkpoint().
+
+    Example of creating a store, and later resuming training from the last
+    checkpoint:
+
+        store = EmbeddingStore.create(path, words, vec_size=100,
+                                      hyperparameters={"window": 8, "k": 5})
+        ...
+        store = EmbeddingStore(path)
+        state = store.state
+    """
+    HEADER_FILE = "header.json"
+    W_IN_FILE = "W_in.npy"
+    W_OUT_FILE = "W_out.npy"
+
+    # ==========================================================================
+    #                                                                   __INIT__
+    # ==========================================================================
+    def __init__(self, path, mode="r+"):
+        """
+        Opens an existing store.
+
+        :param path: {str} directory of the store.
+        :param mode: {str}(default = "r+")
+
+            mode to memory map the matrices with. "r+" to allow updates, or "r"
+            for read only access.
+        """
+        # ======================================================================
+        self.path = path
+        self.mode = mode
+
+        with io.open(os.path.join(path, self.HEADER_FILE), "r",
+                     encoding="utf-8") as f:
+            self.header = json.load(f)
+
+        self.W_in = np.load(os.path.join(path, self.W_IN_FILE), mmap_mode=mode)
+        self.W_out = np.load(os.path.join(path, self.W_OUT_FILE), mmap_mode=mode)
+        self.word_index = {word: i for i, word in enumerate(self.words)}
+
+    # ==========================================================================
+    #                                                                     CREATE
+    # ==========================================================================
+    @classmethod
+    def create(cls, path, words, vec_size, hyperparameters=None,
+               dtype=None, scale=1, seed=None, chunk_size=2**16):
+        """
+        Creates a new store on disk, with the word matrices initialised to
+        random values between -scale/2 and scale/2 (as in
+        cbow_ngg.words_matrix()), and returns it opened for updates.
+
+        :param path: {str} directory to create the store in.
+        :param words: {list of strings}
+
+            The words in the vocabulary, in the order of their indices.
+
+        :param vec_size: {int} size of the word vectors.
+        :param hyperparameters: {dict}(optional)
+
+            Any json serialisable settings to keep with the word vectors, such
+            as the window size, number of negative samples, learning rate.
+
+        :param dtype: {numpy dtype}(optional)
+
+            Defaults to the global dtype in bricknet.config
+
+        :param scale: {number}(default = 1)
+        :param seed: {int}(optional) seed for initialising the word vectors.
+        :param chunk_size: {int}
+
+            Number of rows to initialise at a time, so that the matrices never
+            need to be held in memory all at once.
+
+        :return: {EmbeddingStore}
+        """
+        # ======================================================================
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        dtype = config.get_dtype(dtype)
+        vocab_size = len(words)
+        random = np.random.RandomState(seed)
+        for file in [cls.W_IN_FILE, cls.W_OUT_FILE]:
+            W = np.lib.format.open_memmap(os.path.join(path, file), mode="w+",
+                                          dtype=dtype,
+                                          shape=(vocab_size, vec_size))
+            for i in range(0, vocab_size, chunk_size):
+                rows = min(chunk_size, vocab_size - i)
+                W[i: i + rows] = (random.rand(rows, vec_size) - 0.5) * scale
+            W.flush()
+            del W
+
+        header = {"words": list(words),
+                  "vec_size": vec_size,
+                  "dtype": np.dtype(dtype).name,
+                  "hyperparameters": hyperparameters or {},
+                  "state": {},
+                  }
+        cls._write_header(path, header)
+        return cls(path, mode="r+")
+
+    # ==========================================================================
+    #                                                                 PROPERTIES
+    # ==========================================================================
+    @property
+    def words(self):
+        """ The words in the vocabulary, in the order of their indices """
+        return self.header["words"]
+
+    @property
+    def vec_size(self):
+        return self.header["vec_size"]
+
+    @property
+    def hyperparameters(self):
+        return self.header["hyperparameters"]
+
+    @property
+    def state(self):
+        """
+        The training state saved by the last call to checkpoint(), eg, how
+        many batches had been trained on. An empty dict for a store that has
+        never been checkpointed.
+        """
+        return self.header["state"]
+
+    # ==========================================================================
+    #                                                                      FLUSH
+    # ==========================================================================
+    def flush(self):
+        """
+        Forces any changes made to the word matrices to be written to disk.
+        """
+        # ======================================================================
+        for W in [self.W_in, self.W_out]:
+            if isinstance(W, np.memmap):
+                W.flush()
+
+    # ==========================================================================
+    #                                                                 CHECKPOINT
+    # ==========================================================================
+    def checkpoint(self, **state):
+        """
+        Flushes the word matrices to disk, and then saves the training state
+        in the header, so that training can later be resumed from this point.
+
+        The header is replaced atomically, so a crash part way through a
+        checkpoint leaves the previous header intact.
+
+        :param state: json serialisable values describing the training state,
+                      eg, checkpoint(epoch=2, batch=1000)
+        """
+        # ======================================================================
+        self.flush()
+        self.header["state"] = state
+        self._write_header(self.path, self.header)
+
+    # ==========================================================================
+    #                                                              _WRITE_HEADER
+    # ==========================================================================
+    @classmethod
+    def _write_header(cls, path, header):
+        file = os.path.join(path, cls.HEADER_FILE)
+        tmp_file = file + ".tmp"
+        with io.open(tmp_file, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        # os.replace() overwrites on all platforms, but only exists in python 3
+        getattr(os, "replace", os.rename)(tmp_file, file)
@@ -0,0 +1,266 @@
+"""====================================================
+                    DESCRIPTION
+
+A compact vocabulary for the word2vec models, with pruning of the rare words
+(min_count, and max_size), and an unknown word bucket for the words that get
+pruned.
+
+The vocabulary is stored as a list of the words, a plain dictionary from each
+word to its index, and NumPy arrays of the counts, negative sampling
+probabilities and subsampling keep probabilities, so it can be saved and
+loaded in one go with np.savez / np.load.
+
+It can be used anywhere a vocabulary dataframe (from
+cbow_ngg.create_vocab_df()) is expected, since it has the same `i`, `p`,
+`counts`, `keep` and `index` attributes.
+
+    vocab = Vocab.build(CorpusReader("/tmp/corpus"), min_count=5)
+    tokens, offsets = vocab.encode(CorpusReader("/tmp/corpus"))
+    vocab.save("/tmp/vocab.npz")
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+
+from .corpus import count_words, encode_sentences, string_types
+from .cbow_ngg import get_sampling_distribution, get_keep_probabilities
+
+
+# Padding tokens, which are always kept in the vocabulary
+START = "START"
+END = "END"
+
+
+################################################################################
+#                                                             WORD INDICES CLASS
+################################################################################
+class WordIndices(object):
+    """
+    The `i` attribute of a Vocab. Looks up the index of a word (or a list of
+    words) with vocab.i[word], and converts to the array of all the indices
+    with np.asarray(vocab.i), the same as the `i` column of a vocabulary
+    dataframe.
+    """
+    def __init__(self, word_index):
+        self.word_index = word_index
+
+    def __getitem__(self, words):
+        if isinstance(words, string_types):
+            return self.word_index[words]
+        return np.array([self.word_index[word] for word in words],
+                        dtype=np.int64)
+
+    def __len__(self):
+        return len(self.word_index)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.arange(len(self.word_index), dtype=dtype)
+
+
+################################################################################
+#                                                                    VOCAB CLASS
+################################################################################
+class Vocab(object):
+    """
+    A vocabulary, with words numbered from 0 in order of decreasing count.
+
+    Attributes:
+
+        words       : {list of strings} the word of each index.
+        word_index  : {dict} maps each word to its index.
+        counts      : {array of ints} the count of each word.
+        p           : {array of floats} negative sampling distribution.
+        keep        : {array of floats} subsampling keep probabilities.
+        unknown     : {str, or None} the unknown word bucket.
+    """
+    # ==========================================================================
+    #                                                                   __INIT__
+    # ==========================================================================
+    def __init__(self, words, counts, unknown=None, p_power=(3/4.0),
+                 sample=1e-3):
+        """
+        :param words: {list of strings} the words, in order of their indices.
+        :param counts: {array-like of ints} the count of each word.
+        :param unknown: {str}(optional)
+
+            The word used for the unknown words (must be one of the words).
+
+        :param p_power: {float}(default = 3/4.0)
+
+            power to use for the negative sampling distribution, see
+            cbow_ngg.get_sampling_distribution()
+
+        :param sample: {float}(default = 1e-3)
+
+            subsampling threshold for the keep probabilities, see
+            cbow_ngg.get_keep_probabilities(). None keeps every word.
+        """
+        # ======================================================================
+        self.words = list(words)
+        self.word_index = {word: i for i, word in enumerate(self.words)}
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.unknown = unknown
+        self.p_power = p_power
+        self.sample = sample
+
+        self.p = get_sampling_distribution(self.counts.astype(np.float64),
+                                           power=p_power)
+        self.keep = np.ones(len(self.counts))
+        if sample is not None:
+            # Frequencies relative to the real words only, and the padding is
+            # never subsampled
+            padding = [self.word_index[word] for word in [START, END]
+                       if word in self.word_index]
+            counts = self.counts.astype(np.float64)
+            total = counts.sum() - counts[padding].sum()
+            self.keep = get_keep_probabilities(counts, sample=sample,
+                                               total=total)
+            self.keep[padding] = 1.0
+        self.i = WordIndices(self.word_index)
+
+    # ==========================================================================
+    #                                                                FROM_COUNTS
+    # ==========================================================================
+    @classmethod
+    def from_counts(cls, counts, min_count=1, max_size=None, unknown="UNK",
+                    **kwargs):
+        """
+        Creates a vocabulary from the word counts, keeping only the words that
+        appear at least min_count times, and at most max_size words (the most
+        frequent ones). The counts of the pruned words go to the unknown word.
+
+        :param counts: {dict} the count of each word, eg from
+                       corpus.count_words().
+        :param min_count: {int}(default = 1)
+
+            words with fewer occurrences than this are pruned.
+
+        :param max_size: {int}(optional)
+
+            maximum number of words in the vocabulary, including the
+            "START", "END" and unknown tokens, which are always kept.
+
+        :param unknown: {str, or None}(default = "UNK")
+
+            word to use for the pruned words. If None, then the pruned words
+            are dropped altogether.
+
+        :param kwargs: other arguments to pass to Vocab()
+        :return: {Vocab}
+        """
+        # ======================================================================
+        special = [START, END] + ([] if unknown is None else [unknown])
+
+        # Most frequent first, and alphabetical for ties, so that the order is
+        # the same every time
+        candidates = sorted(((c, w) for w, c in counts.items()
+                             if c >= min_count and w not in special),
+                            key=lambda x: (-x[0], x[1]))
+        if max_size is not None:
+            candidates = candidates[:max(max_size - len(special), 0)]
+
+        kept = dict((w, c) for c, w in candidates)
+        for word in special:
+            kept[word] = counts.get(word, 0)
+        if unknown is not None:
+            kept[unknown] += (sum(counts.values())
+                              - sum(counts.get(word, 0) for word in kept))
+
+        words = sorted(kept, key=lambda w: (-kept[w], w))
+        return cls(words, [kept[w] for w in words], unknown=unknown, **kwargs)
+
+    # ==========================================================================
+    #                                                                      BUILD
+    # ==========================================================================
+    @classmethod
+    def build(cls, sentences, window=8, min_count=1, max_size=None,
+              unknown="UNK", workers=1, **kwargs):
+        """
+        Counts the words in the sentences, and creates a pruned vocabulary
+        from them. See from_counts() for the arguments.
+
+        :param sentences: {str, CorpusReader, or iterable of iterables of
+                          strings}
+        :param window: {int or list of two ints} the context window size, for
+                       the counts of the "START" and "END" tokens.
+        :param workers: {int}(default = 1)
+
+            number of processes to count a file with, see
+            corpus.count_words()
+
+        :return: {Vocab}
+        """
+        # ======================================================================
+        counts = count_words(sentences, window=window, workers=workers)
+        return cls.from_counts(counts, min_count=min_count, max_size=max_size,
+                               unknown=unknown, **kwargs)
+
+    # ==========================================================================
+    #                                                                     ENCODE
+    # ==========================================================================
+    def encode(self, sentences, dtype=np.int32):
+        """
+        Integer encodes the sentences, with corpus.encode_sentences(),
+        mapping the words that are not in the vocabulary to the unknown word
+        (or dropping them if there is no unknown word).
+
+        :param sentences: {iterable of iterables of strings}
+        :return: {tuple of two arrays} (tokens, offsets)
+        """
+        # ======================================================================
+        unknown = None
+        if self.unknown is not None:
+            unknown = self.word_index[self.unknown]
+        return encode_sentences(sentences, self.word_index, unknown=unknown,
+                                dtype=dtype)
+
+    # ==========================================================================
+    #                                                                  SAVE/LOAD
+    # ==========================================================================
+    def save(self, file):
+        """
+        Saves the vocabulary to a .npz file.
+
+        :param file: {str, or file object}
+        """
+        # ======================================================================
+        np.savez(file, words=np.array(self.words, dtype=np.str_),
+                 counts=self.counts,
+                 unknown=np.array("" if self.unknown is None else self.unknown),
+                 p_power=self.p_power,
+                 sample=np.nan if self.sample is None else self.sample)
+
+    @classmethod
+    def load(cls, file):
+        """
+        Loads a vocabulary saved with save().
+
+        :param file: {str, or file object}
+        :return: {Vocab}
+        """
+        # ======================================================================
+        data = np.load(file, allow_pickle=False)
+        unknown = str(data["unknown"]) or None
+        sample = float(data["sample"])
+        return cls(data["words"].tolist(), data["counts"], unknown=unknown,
+                   p_power=float(data["p_power"]),
+                   sample=None if np.isnan(sample) else sample)
+
+    # ==========================================================================
+    #                                                          DATAFRAME METHODS
+    # ==========================================================================
+    @property
+    def index(self):
+        """ The words, in order of their indices (as in a vocab dataframe) """
+        return self.words
+
+    def __getitem__(self, column):
+        """ vocab["i"], vocab["p"], etc, as for a vocabulary dataframe """
+        return getattr(self, column)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.word_index
@@ -0,0 +1,307 @@
+"""====================================================
+                    DESCRIPTION
+
+Trainer classes for the word2vec models, that wrap up the vocabulary, the
+word matrices, and the training loops of cbow_ngg, skipgram and hogwild
+behind a single fit(corpus) method.
+
+    model = CBOW(vec_size=100, window=10, k=5, epochs=5, workers=4)
+    model.fit("/tmp/corpus")
+    model.most_similar("king")
+
+Nothing is trained (or read from disk) until fit() is called.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+
+from .. import config
+from . import cbow_ngg
+from . import skipgram
+from . import hogwild
+from .corpus import as_sentences
+from .vocab import Vocab
+from .huffman import HuffmanTree
+from .sampling import AliasSampler
+from .similarity import NearestNeighbours
+
+
+################################################################################
+#                                                                 WORD2VEC CLASS
+################################################################################
+class Word2Vec(object):
+    """
+    A template for the word2vec trainers. Subclasses set `trainer` to the
+    function that trains on one pass over an integer encoded corpus (eg,
+    cbow_ngg.train_corpus).
+
+    After fitting, the model has:
+
+        vocab : {Vocab} the vocabulary, see the vocab module.
+        words : {list of strings} the word of each row of the word matrices.
+        W_in  : {2D array} input word vectors, one word per row.
+        W_out : {2D array} output word vectors, one word per row (or the
+                weights of the inner nodes of the Huffman tree, when using
+                hierarchical softmax).
+        cost_ : {array} the average cost of each batch, over all the epochs.
+    """
+    trainer = None
+
+    # ==========================================================================
+    #                                                                   __INIT__
+    # ==========================================================================
+    def __init__(self, vec_size=100, window=10, dynamic_window=True, k=5,
+                 alpha=0.025, min_alpha=0.0001, epochs=1, batch_size=1024,
+                 max_updates=cbow_ngg.MAX_UPDATES, sample=1e-3, min_count=5,
+                 max_vocab=None, hierarchical_softmax=False, optimizer=None,
+                 sigmoid_fn=None, workers=1, prefetch=4, seed=None,
+                 dtype=None):
+        """
+        :param vec_size: {int}(default = 100) size of the word vectors.
+        :param window: {int or list of two ints}(default = 10)
+
+            number of context words, half on either side of the center word,
+            or [num_left, num_right] for an asymmetric window. See
+            corpus.window_sizes()
+
+        :param dynamic_window: {boolean}(default = True)
+
+            randomly shrink each window, as in word2vec, so that the closer
+            context words get used more often.
+
+        :param k: {int}(default = 5) number of negative samples.
+        :param alpha: {float}(default = 0.025) starting learning rate.
+        :param min_alpha: {float}(default = 0.0001)
+
+            The learning rate decays linearly from alpha down to min_alpha
+            over all the epochs. Use None to keep it fixed at alpha.
+
+        :param epochs: {int}(default = 1) number of passes over the corpus.
+        :param batch_size: {int}(default = 1024) windows per batch.
+        :param max_updates: {float}(default = cbow_ngg.MAX_UPDATES)
+
+            The most updates' worth of gradients that one row of the word
+            matrices can get from a single batch (see
+            cbow_ngg.apply_row_gradients()). The gradients of a batch are all
+            calculated from the same weights, so without this limit the
+            frequent words take steps that grow with the batch size, and
+            training diverges at the default batch_size and alpha. Use None
+            for no limit, with small batches only.
+
+        :param sample: {float}(default = 1e-3)
+
+            Threshold for subsampling the frequent words, see
+            cbow_ngg.get_keep_probabilities(). Use None to train on every
+            word.
+        :param min_count: {int}(default = 5)
+
+            words that appear fewer times than this in the corpus are
+            replaced by the unknown word "UNK".
+
+        :param max_vocab: {int}(optional)
+
+            maximum number of words in the vocabulary. Only the most frequent
+            ones are kept, and the rest are replaced by "UNK".
+
+        :param hierarchical_softmax: {boolean}(default = False)
+
+            Use a hierarchical softmax output layer (built on a Huffman tree
+            of the word counts), instead of negative sampling.
+
+        :param optimizer: {Optimizer}(optional)
+
+            Optimizer to update the word matrices with. When given, alpha and
+            min_alpha are ignored.
+
+        :param sigmoid_fn: {function}(optional)
+
+            Function that returns (sigmoid(z), log(sigmoid(z))) for the
+            negative sampling scores. Defaults to
+            activations.sigmoid_and_log()
+
+        :param workers: {int}(default = 1)
+
+            Number of processes to count the words and train with. More than
+            one trains with hogwild.train_parallel()
+
+        :param prefetch: {int}(default = 4)
+
+            number of batches to prepare ahead of time in a background
+            thread (see producer.BatchProducer). 0 prepares them inline.
+
+        :param seed: {int}(optional)
+
+            seed for the initial word vectors, the negative samples, and the
+            order of the windows.
+
+        :param dtype: {numpy dtype}(optional)
+
+            Defaults to the global dtype in bricknet.config
+        """
+        # ======================================================================
+        self.vec_size = vec_size
+        self.window = window
+        self.dynamic_window = dynamic_window
+        self.k = k
+        self.alpha = alpha
+        self.min_alpha = min_alpha
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.max_updates = max_updates
+        self.sample = sample
+        self.min_count = min_count
+        self.max_vocab = max_vocab
+        self.hierarchical_softmax = hierarchical_softmax
+        self.optimizer = optimizer
+        self.sigmoid_fn = sigmoid_fn
+        self.workers = workers
+        self.prefetch = prefetch
+        self.seed = seed
+        self.dtype = config.get_dtype(dtype)
+
+        self.vocab = None
+        self.words = None
+        self.word_index = None
+        self.sampler = None
+        self.tree = None
+        self.W_in = None
+        self.W_out = None
+        self.cost_ = None
+        self._nn = None
+
+    # ==========================================================================
+    #                                                                BUILD_VOCAB
+    # ==========================================================================
+    def build_vocab(self, sentences):
+        """
+        Creates the vocabulary from the sentences (pruned to min_count and
+        max_vocab), the negative sampler (or the Huffman tree), and
+        initialises the word matrices.
+
+        :param sentences: {iterable of iterables of strings}
+        """
+        # ======================================================================
+        self.vocab = Vocab.build(sentences, window=self.window,
+                                 min_count=self.min_count,
+                                 max_size=self.max_vocab, sample=self.sample,
+                                 workers=self.workers)
+        self.word_index = self.vocab.word_index
+        self.words = self.vocab.words
+
+        vocab_size = len(self.words)
+        random = np.random.RandomState(self.seed)
+        if self.hierarchical_softmax:
+            self.tree = HuffmanTree(self.vocab.counts)
+            self.sampler = None
+            num_out = self.tree.num_inner
+        else:
+            self.tree = None
+            self.sampler = AliasSampler.from_vocab(self.vocab, seed=self.seed)
+            num_out = vocab_size
+
+        # Small random input vectors, and zero output vectors, as in word2vec
+        self.W_in = ((random.rand(vocab_size, self.vec_size) - 0.5)
+                     / self.vec_size).astype(self.dtype)
+        self.W_out = np.zeros((num_out, self.vec_size), dtype=self.dtype)
+        self._nn = None
+
+    # ==========================================================================
+    #                                                                        FIT
+    # ==========================================================================
+    def fit(self, corpus, callbacks=None):
+        """
+        Trains the word vectors for self.epochs passes over the corpus.
+
+        :param corpus: {str, or iterable of iterables of strings}
+
+            Path to a text file, or the sentences (each one a list of words).
+            The vocabulary is built from the corpus the first time the model
+            is fit, so the sentences need to be re-iterable (eg, a list, or a
+            corpus.CorpusReader).
+
+        :param callbacks: {list of Callback objects}(optional)
+
+            Passed on to the trainer for each epoch (see the
+            bricknet.callbacks module).
+
+        :return: {Word2Vec} self
+        """
+        # ======================================================================
+        sentences = as_sentences(corpus)
+        if self.vocab is None:
+            self.build_vocab(sentences)
+        tokens, offsets = self.vocab.encode(sentences)
+
+        kwargs = dict(window=self.window, dynamic_window=self.dynamic_window,
+                      k=self.k, batch_size=self.batch_size,
+                      max_updates=self.max_updates, sample=self.sample,
+                      prefetch=self.prefetch, sampler=self.sampler,
+                      tree=self.tree, optimizer=self.optimizer,
+                      sigmoid_fn=self.sigmoid_fn, callbacks=callbacks)
+
+        cost = []
+        for epoch in range(self.epochs):
+            # Split the linear decay of the learning rate across the epochs
+            if self.min_alpha is None:
+                kwargs.update(alpha=self.alpha, min_alpha=None)
+            else:
+                step = (self.alpha - self.min_alpha) / float(self.epochs)
+                kwargs.update(alpha=self.alpha - step * epoch,
+                              min_alpha=self.alpha - step * (epoch + 1))
+            seed = None if self.seed is None else self.seed + epoch
+
+            if self.workers > 1:
+                worker_costs = hogwild.train_parallel(
+                    tokens, offsets, self.W_in, self.W_out, self.vocab,
+                    workers=self.workers, trainer=self.trainer, seed=seed,
+                    **kwargs)
+                cost.extend(worker_costs)
+            else:
+                cost.append(self.trainer(tokens, offsets, self.W_in,
+                                         self.W_out, self.vocab, seed=seed,
+                                         **kwargs))
+
+        self.cost_ = np.concatenate(cost) if cost else np.array([])
+        self._nn = None
+        return self
+
+    # ==========================================================================
+    #                                                               MOST_SIMILAR
+    # ==========================================================================
+    def most_similar(self, words, k=10):
+        """
+        Returns the k most similar words to each of the given words, by the
+        cosine similarity of their input word vectors.
+
+        :param words: {string, or list of strings}
+        :param k: {int}
+        :return: {list} see similarity.NearestNeighbours.most_similar()
+        """
+        # ======================================================================
+        if self._nn is None:
+            self._nn = NearestNeighbours(self.W_in, self.words,
+                                         dtype=self.dtype)
+        return self._nn.most_similar(words, k=k)
+
+
+################################################################################
+#                                                                     CBOW CLASS
+################################################################################
+class CBOW(Word2Vec):
+    """
+    Continuous bag of words model. Predicts the center word from the average
+    of the context word vectors. See Word2Vec for the arguments.
+    """
+    trainer = staticmethod(cbow_ngg.train_corpus)
+
+
+################################################################################
+#                                                                SKIP GRAM CLASS
+################################################################################
+class SkipGram(Word2Vec):
+    """
+    Skip-gram model. Predicts each of the context words from the center word.
+    See Word2Vec for the arguments.
+    """
+    trainer = staticmethod(skipgram.train_corpus)
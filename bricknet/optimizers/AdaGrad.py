@@ -0,0 +1,51 @@
+"""====================================================
+                    DESCRIPTION
+
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+from .Optimizer import Optimizer
+
+
+class AdaGrad(Optimizer):
+    """
+    AdaGrad. Each parameter gets its own learning rate, which shrinks with the
+    sum of its squared gradients so far:
+
+        cache = cache + grad**2
+        param = param - learning_rate * grad / (sqrt(cache) + epsilon)
+
+    Works well for sparse updates, eg, rare words in an embedding matrix keep
+    larger step sizes than frequent ones.
+
+    :references:
+
+        - Duchi, J., Hazan, E., and Singer, Y. (2011). Adaptive subgradient
+          methods for online learning and stochastic optimization. Journal of
+          Machine Learning Research, 12, 2121-2159.
+    """
+    slot_names = ("cache",)
+
+    def __init__(self, learning_rate=0.01, epsilon=1e-8):
+        """
+        :param learning_rate: {float, or schedule}(default = 0.01)
+        :param epsilon: {float}(default = 1e-8) avoids division by zero.
+        """
+        Optimizer.__init__(self, learning_rate)
+        self.epsilon = epsilon
+
+    def _step(self, param, grad, slots, lr, t, scratch):
+        if scratch is None:
+            scratch = np.empty_like(param)
+        cache = slots["cache"]
+
+        np.square(grad, out=scratch)
+        cache += scratch
+
+        np.sqrt(cache, out=scratch)
+        scratch += self.epsilon
+        np.divide(grad, scratch, out=scratch)
+        scratch *= lr
+        param -= scratch
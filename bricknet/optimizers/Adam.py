@@ -0,0 +1,67 @@
+"""====================================================
+                    DESCRIPTION
+
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+from .Optimizer import Optimizer
+
+
+class Adam(Optimizer):
+    """
+    Adam. Keeps exponentially decaying averages of the gradients (m) and of
+    the squared gradients (v), and steps along m / sqrt(v), with a correction
+    for the bias of both averages towards zero during the first updates:
+
+        m     = beta1 * m + (1 - beta1) * grad
+        v     = beta2 * v + (1 - beta2) * grad**2
+        lr_t  = learning_rate * sqrt(1 - beta2**t) / (1 - beta1**t)
+        param = param - lr_t * m / (sqrt(v) + epsilon)
+
+    NOTE: For sparse row updates, the averages of the rows that are not in
+          the batch are left as they are (rather than decayed), as in "lazy"
+          Adam, so that each update only costs O(rows in the batch).
+
+    :references:
+
+        - Kingma, D. P., and Ba, J. (2014). Adam: A method for stochastic
+          optimization. arXiv preprint arXiv:1412.6980.
+    """
+    slot_names = ("m", "v")
+
+    def __init__(self, learning_rate=0.001, beta1=0.9, beta2=0.999,
+                 epsilon=1e-8):
+        """
+        :param learning_rate: {float, or schedule}(default = 0.001)
+        :param beta1: {float}(default = 0.9) decay rate of m.
+        :param beta2: {float}(default = 0.999) decay rate of v.
+        :param epsilon: {float}(default = 1e-8) avoids division by zero.
+        """
+        Optimizer.__init__(self, learning_rate)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+
+    def _step(self, param, grad, slots, lr, t, scratch):
+        if scratch is None:
+            scratch = np.empty_like(param)
+        m = slots["m"]
+        v = slots["v"]
+
+        m *= self.beta1
+        np.multiply(grad, 1 - self.beta1, out=scratch)
+        m += scratch
+
+        v *= self.beta2
+        np.square(grad, out=scratch)
+        scratch *= 1 - self.beta2
+        v += scratch
+
+        lr_t = lr * np.sqrt(1 - self.beta2 ** t) / (1 - self.beta1 ** t)
+        np.sqrt(v, out=scratch)
+        scratch += self.epsilon
+        np.divide(m, scratch, out=scratch)
+        scratch *= lr_t
+        param -= scratch
@@ -0,0 +1,161 @@
+"""====================================================
+                    DESCRIPTION
+
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+
+
+################################################################################
+#                                                                OPTIMIZER CLASS
+################################################################################
+class Optimizer(object):
+    """
+    A template for optimizer objects, which update parameter arrays in place,
+    given the gradients of the cost WRT those parameters.
+
+    Subclasses list the names of the per-parameter arrays they need (eg,
+    moving averages of the gradients) in `slot_names`, and implement
+    `_step()`, which updates a parameter array and its slot arrays in place.
+    The same `_step()` is used for dense updates of a whole array, and for
+    sparse updates of only some rows of an array (eg, the rows of the words
+    in a batch, for an embedding matrix).
+
+    One optimizer object can be shared by many parameter arrays. The slots,
+    and the number of updates so far, are kept separately for each array.
+
+    :references:
+
+        - Ruder, S. (2016). An overview of gradient descent optimization
+          algorithms. arXiv preprint arXiv:1609.04747.
+    """
+    slot_names = ()
+
+    # ==========================================================================
+    #                                                                   __INIT__
+    # ==========================================================================
+    def __init__(self, learning_rate=0.01):
+        """
+        :param learning_rate: {float, or schedule}(default = 0.01)
+
+            The step size. Either a fixed float, or a schedule, (any function
+            that takes the number of updates made so far to the parameter,
+            and returns the learning rate), eg, a LinearDecay object.
+        """
+        # ======================================================================
+        self.learning_rate = learning_rate
+        self.state = {}
+
+    # ==========================================================================
+    #                                                          GET_LEARNING_RATE
+    # ==========================================================================
+    def get_learning_rate(self, t=0):
+        """
+        Returns the learning rate to use for update number t (starting at 0).
+
+        :param t: {int}
+        :return: {float}
+        """
+        # ======================================================================
+        if callable(self.learning_rate):
+            return self.learning_rate(t)
+        return self.learning_rate
+
+    def _get_state(self, param):
+        """
+        The state for a parameter array, with its slots (zeros to start with),
+        a scratch buffer for dense updates, and its number of updates so far.
+
+        The state is keyed on the memory and layout of the array, rather than
+        the array object, so that a fresh view of the same parameters (eg,
+        W.T) gets the same state every time.
+        """
+        key = (param.__array_interface__["data"][0], param.shape,
+               param.strides)
+        state = self.state.get(key)
+        if state is None:
+            # Holding on to param keeps its memory from being reused by some
+            # other array with the same key.
+            state = {"param": param, "t": 0, "scratch": None,
+                     "slots": {name: np.zeros(param.shape, dtype=param.dtype)
+                               for name in self.slot_names}}
+            self.state[key] = state
+        return state
+
+    # ==========================================================================
+    #                                                                     UPDATE
+    # ==========================================================================
+    def update(self, param, grad):
+        """
+        Updates the whole of param in place, given its gradients.
+
+        :param param: {array} the parameters (eg, weights). Updated in place.
+        :param grad: {array} gradients of the cost WRT param, same shape.
+        """
+        # ======================================================================
+        state = self._get_state(param)
+        if state["scratch"] is None:
+            state["scratch"] = np.empty_like(param)
+
+        lr = self.get_learning_rate(state["t"])
+        state["t"] += 1
+        self._step(param, grad, state["slots"], lr, state["t"],
+                   state["scratch"])
+
+    # ==========================================================================
+    #                                                                UPDATE_ROWS
+    # ==========================================================================
+    def update_rows(self, param, rows, grads):
+        """
+        Sparse update of only some of the rows of param, in place. Eg, for an
+        embedding matrix where only the rows of the words in the current
+        batch have gradients.
+
+        Rows can appear more than once. Their gradients get summed first, so
+        that each row is only updated once (which matters for the optimizers
+        that keep running averages).
+
+        :param param: {2D array} the parameters. Updated in place.
+        :param rows: {array of ints} the rows that have gradients.
+        :param grads: {2D array} gradients for each of those rows, of shape
+                      (len(rows), param.shape[1])
+        """
+        # ======================================================================
+        state = self._get_state(param)
+        lr = self.get_learning_rate(state["t"])
+        state["t"] += 1
+
+        # Sum the gradients of repeated rows
+        unique_rows, inverse = np.unique(np.ravel(rows), return_inverse=True)
+        summed = np.zeros((len(unique_rows),) + param.shape[1:],
+                          dtype=param.dtype)
+        np.add.at(summed, np.ravel(inverse), grads)
+
+        # Work on copies of the rows, and write them back
+        values = param[unique_rows]
+        slots = {name: slot[unique_rows]
+                 for name, slot in state["slots"].items()}
+        self._step(values, summed, slots, lr, state["t"], None)
+
+        param[unique_rows] = values
+        for name, slot in slots.items():
+            state["slots"][name][unique_rows] = slot
+
+    def _step(self, param, grad, slots, lr, t, scratch):
+        """
+        Updates param (and the slots) in place. To be implemented by the
+        subclasses.
+
+        :param param: {array} the parameters to update in place.
+        :param grad: {array} the gradients, same shape as param.
+        :param slots: {dict of arrays} the slots for param, same shape.
+        :param lr: {float} the learning rate for this update.
+        :param t: {int} the number of this update (starting at 1).
+        :param scratch: {array, or None}
+
+            a buffer the same shape as param that can be used for temporary
+            values (None if there is no buffer, eg for sparse updates).
+        """
+        raise NotImplementedError
@@ -0,0 +1,41 @@
+"""====================================================
+                    DESCRIPTION
+
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+from .Optimizer import Optimizer
+
+
+class SGD(Optimizer):
+    """
+    Stochastic gradient descent, with optional (classical) momentum:
+
+        velocity = momentum * velocity - learning_rate * grad
+        param    = param + velocity
+
+    With momentum = 0 this is plain gradient descent, and it keeps no slots.
+    """
+    def __init__(self, learning_rate=0.01, momentum=0.0):
+        """
+        :param learning_rate: {float, or schedule}(default = 0.01)
+        :param momentum: {float}(default = 0.0)
+        """
+        Optimizer.__init__(self, learning_rate)
+        self.momentum = momentum
+        self.slot_names = ("velocity",) if momentum else ()
+
+    def _step(self, param, grad, slots, lr, t, scratch):
+        if scratch is None:
+            scratch = np.empty_like(param)
+        np.multiply(grad, lr, out=scratch)
+
+        if self.momentum:
+            velocity = slots["velocity"]
+            velocity *= self.momentum
+            velocity -= scratch
+            param += velocity
+        else:
+            param -= scratch
@@ -0,0 +1,12 @@
+"""====================================================
+                    DESCRIPTION
+
+=======================================================
+"""
+__author__ = 'ronny'
+
+from .Optimizer import Optimizer
+from .SGD import SGD
+from .AdaGrad import AdaGrad
+from .Adam import Adam
+from .schedules import LinearDecay
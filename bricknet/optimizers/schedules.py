@@ -0,0 +1,47 @@
+"""====================================================
+                    DESCRIPTION
+
+Learning rate schedules. Can be used as the learning_rate of any optimizer.
+=======================================================
+"""
+__author__ = 'ronny'
+
+
+################################################################################
+#                                                             LINEAR DECAY CLASS
+################################################################################
+class LinearDecay(object):
+    """
+    Learning rate that decays linearly from `start` down to `end` over
+    num_steps updates, and then stays at `end`. This is the schedule used by
+    word2vec, where the learning rate drops to 0.0001 times its starting
+    value by the end of training.
+
+    Example:
+
+        optimizer = SGD(LinearDecay(0.025, num_steps=num_batches))
+    """
+    # ==========================================================================
+    #                                                                   __INIT__
+    # ==========================================================================
+    def __init__(self, start=0.025, end=None, num_steps=1):
+        """
+        :param start: {float}(default = 0.025) the starting learning rate.
+        :param end: {float}(optional)
+
+            the final learning rate. Defaults to start * 0.0001.
+
+        :param num_steps: {int} number of updates to decay over.
+        """
+        # ======================================================================
+        self.start = start
+        self.end = start * 0.0001 if end is None else end
+        self.num_steps = num_steps
+
+    def __call__(self, t):
+        """
+        :param t: {int} the number of updates made so far.
+        :return: {float} the learning rate for the next update.
+        """
+        progress = min(t / float(self.num_steps), 1.0)
+        return self.start - (self.start - self.end) * progress
@@ -76,7 +76,8 @@ setup(
 
     # You can just specify the packages manually here if your project is
     # simple. Or you can use find_packages().
-    packages=find_packages(exclude=['contrib', 'docs', 'tests*']),
+    packages=find_packages(exclude=['contrib', 'docs', 'tests*',
+                                    'benchmarks*']),
 
     # DEPENDENCIES
     # List run-time dependencies here.  These will be installed by pip when
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""====================================================
+                    DESCRIPTION
+
+Tests for streaming, sharding and counting the words of a text corpus.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import io
+
+from bricknet.nlp.corpus import clean_text, CorpusReader, count_words
+
+TEXT = (u"The cat (sat) on the mat. \"Hello,\" said the dog! Isn't it? "
+        u"A café naïve résumé. The end.\n") * 50
+
+
+def write_corpus(tmpdir, text=TEXT):
+    path = str(tmpdir.join("corpus.txt"))
+    with io.open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+def test_clean_text():
+    assert (clean_text(u"Isn't (it), \"Fine\"!")
+            == u"isn QUOTE t it  DOUBLE-QUOTE fine DOUBLE-QUOTE ")
+
+
+def test_corpus_reader_small_chunks(tmpdir):
+    path = write_corpus(tmpdir)
+    expected = list(CorpusReader(path))
+    assert expected[0] == ["the", "cat", "sat", "on", "the", "mat"]
+    assert list(CorpusReader(path, chunk_size=7)) == expected
+
+
+def test_shards_give_the_same_sentences(tmpdir):
+    path = write_corpus(tmpdir)
+    reader = CorpusReader(path, chunk_size=64)
+    sentences = []
+    for shard in reader.shards(4):
+        sentences.extend(shard)
+    assert sentences == list(reader)
+
+
+def test_count_words_in_parallel(tmpdir):
+    path = write_corpus(tmpdir)
+    serial = count_words(path, window=[2, 3])
+    assert count_words(path, window=[2, 3], workers=3) == serial
+    num_sentences = len(list(CorpusReader(path)))
+    assert serial["START"] == 2 * num_sentences
+    assert serial["END"] == 3 * num_sentences
+    assert serial[u"café"] == 50
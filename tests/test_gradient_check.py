@@ -0,0 +1,103 @@
+"""====================================================
+                    DESCRIPTION
+
+Finite difference checks of the input and weight gradients of the layers,
+using the batched checkers in bricknet.eval. Every layer is float64, since
+float32 is too coarse for the differences to get close to zero.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+
+from bricknet import Neural_Network, CSoftmax, LSigmoid
+from bricknet.classifiers import CHSoftmax
+from bricknet.eval import gradient_check, weight_gradient_check
+
+EPSILON = 1e-5
+TOLERANCE = 1e-6
+
+
+def one_hot(i, n):
+    y = np.zeros(n, dtype=bool)
+    y[i] = True
+    return y
+
+
+# ==============================================================================
+#                                                                       CSOFTMAX
+# ==============================================================================
+def test_csoftmax_gradients():
+    np.random.seed(0)
+    layer = CSoftmax(6, 4, dtype=np.float64)
+    x = np.random.rand(6)
+    y = one_hot(2, 4)
+    assert np.abs(gradient_check(layer, y, EPSILON, verbose=False,
+                                 x=x)).max() < TOLERANCE
+    assert np.abs(weight_gradient_check(layer, y, EPSILON, verbose=False,
+                                        x=x)).max() < TOLERANCE
+
+
+def test_csoftmax_gradients_memory_activated():
+    np.random.seed(1)
+    layer = CSoftmax(6, 4, memory="activated", dtype=np.float64)
+    x = np.random.rand(6)
+    y = one_hot(0, 4)
+    assert np.abs(gradient_check(layer, y, EPSILON, verbose=False,
+                                 x=x)).max() < TOLERANCE
+    assert np.abs(weight_gradient_check(layer, y, EPSILON, verbose=False,
+                                        x=x)).max() < TOLERANCE
+
+
+def test_weight_gradient_check_random_subset():
+    np.random.seed(2)
+    layer = CSoftmax(50, 20, dtype=np.float64)
+    y = one_hot(3, 20)
+    diff = weight_gradient_check(layer, y, EPSILON, verbose=False,
+                                 num_samples=100, seed=0)
+    assert diff.shape == layer.weights.shape
+    assert np.isnan(diff).sum() == diff.size - 100
+    assert np.nanmax(np.abs(diff)) < TOLERANCE
+
+
+# ==============================================================================
+#                                                                      CHSOFTMAX
+# ==============================================================================
+def test_chsoftmax_gradients():
+    np.random.seed(3)
+    x = np.random.rand(5)
+    for memory in ["both", "activated"]:
+        layer = CHSoftmax(5, counts=[10, 5, 3, 2, 1, 1], memory=memory,
+                          dtype=np.float64)
+        for target in [0, 4]:
+            y = one_hot(target, 6)
+            assert np.abs(gradient_check(layer, y, EPSILON, verbose=False,
+                                         x=x)).max() < TOLERANCE
+            assert np.abs(weight_gradient_check(layer, y, EPSILON,
+                                                verbose=False,
+                                                x=x)).max() < TOLERANCE
+
+
+# ==============================================================================
+#                                                                 NEURAL_NETWORK
+# ==============================================================================
+def test_neural_network_gradients():
+    np.random.seed(4)
+    x = np.random.randn(4)
+    y = one_hot(1, 3)
+    for memory in ["both", "activated"]:
+        net = Neural_Network([4, 8, 5, 3], memory=memory, dtype=np.float64)
+        assert np.abs(gradient_check(net, y, EPSILON, verbose=False,
+                                     x=x)).max() < TOLERANCE
+
+
+def test_neural_network_gradients_from_layers():
+    np.random.seed(5)
+    layers = [LSigmoid(30, 40, dtype=np.float64),
+              CSoftmax(40, 10, dtype=np.float64)]
+    net = Neural_Network(layers, memory="activated")
+    y = one_hot(7, 10)
+    diff = gradient_check(net, y, EPSILON, verbose=False, num_samples=10,
+                          seed=0)
+    assert np.isnan(diff).sum() == 20
+    assert np.nanmax(np.abs(diff)) < TOLERANCE
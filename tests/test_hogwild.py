@@ -0,0 +1,53 @@
+"""====================================================
+                    DESCRIPTION
+
+Tests for the multi-process Hogwild training.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+
+from bricknet.nlp import cbow_ngg
+from bricknet.nlp.vocab import Vocab
+from bricknet.nlp.store import EmbeddingStore
+from bricknet.nlp.hogwild import train_parallel, shard_corpus
+
+
+def make_corpus(num_sentences=300, vocab_size=50, seed=0):
+    random = np.random.RandomState(seed)
+    return [["w{}".format(i) for i in random.randint(vocab_size, size=n)]
+            for n in random.randint(3, 12, size=num_sentences)]
+
+
+def test_shard_corpus_keeps_every_sentence():
+    sentences = make_corpus()
+    vocab = Vocab.build(sentences, window=4)
+    tokens, offsets = vocab.encode(sentences)
+    shards = shard_corpus(tokens, offsets, 3)
+    assert sum(len(t) for t, _ in shards) == len(tokens)
+    assert sum(len(o) - 1 for _, o in shards) == len(offsets) - 1
+    assert np.array_equal(np.concatenate([t for t, _ in shards]), tokens)
+
+
+def test_train_parallel_checkpoints_store(tmpdir):
+    sentences = make_corpus()
+    vocab = Vocab.build(sentences, window=4)
+    tokens, offsets = vocab.encode(sentences)
+    path = str(tmpdir.join("store"))
+    store = EmbeddingStore.create(path, vocab.words, vec_size=8, seed=0,
+                                  scale=0.1)
+    initial = np.array(store.W_in)
+
+    cost = train_parallel(tokens, offsets, store.W_in, store.W_out, vocab,
+                          workers=2, trainer=cbow_ngg.train_corpus, seed=3,
+                          store=store, window=4, k=3, alpha=0.05,
+                          batch_size=64, checkpoint_every=2)
+    assert len(cost) == 2
+    assert all(np.isfinite(c).all() for c in cost)
+
+    # The store on disk has the trained values, and a single final state
+    reopened = EmbeddingStore(path, mode="r")
+    assert reopened.state == {"seed": 3, "workers": 2, "complete": True}
+    assert np.array_equal(reopened.W_in, store.W_in)
+    assert not np.allclose(reopened.W_in, initial)
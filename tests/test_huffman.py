@@ -0,0 +1,58 @@
+"""====================================================
+                    DESCRIPTION
+
+Tests for the Huffman tree and the hierarchical softmax output layer.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+
+from bricknet.nlp import cbow_ngg
+from bricknet.nlp.huffman import (HuffmanTree, hierarchical_softmax,
+                                  hierarchical_softmax_probs)
+
+COUNTS = np.array([1000, 500, 200, 100, 50, 20, 10, 5])
+
+
+def test_probs_sum_to_one():
+    tree = HuffmanTree(COUNTS)
+    z = np.random.RandomState(0).randn(4, tree.num_inner)
+    probs = hierarchical_softmax_probs(z, tree)
+    assert probs.shape == (4, len(COUNTS))
+    assert np.allclose(probs.sum(axis=1), 1)
+
+
+def test_saturated_nodes_stay_finite():
+    # Huge node values saturate the sigmoid, and the paths of different
+    # lengths leave padding past the end of the shorter ones
+    tree = HuffmanTree(COUNTS)
+    random = np.random.RandomState(0)
+    h = random.randn(len(COUNTS), 4).astype(np.float32)
+    W_nodes = 1e4 * random.randn(tree.num_inner, 4).astype(np.float32)
+    assert tree.lengths.min() < tree.lengths.max()
+
+    J, G_h, rows, G_rows = hierarchical_softmax(h, np.arange(len(COUNTS)),
+                                                W_nodes, tree)
+    assert np.isfinite(J).all() and (J >= 0).all()
+    assert np.isfinite(G_h).all() and np.isfinite(G_rows).all()
+
+    probs = hierarchical_softmax_probs(h.dot(W_nodes.T), tree)
+    assert np.isfinite(probs).all()
+    assert np.allclose(probs.sum(axis=1), 1)
+
+
+def test_padding_does_not_count_as_updates():
+    # Node 0 is at the bottom of the tree, on the paths of the two rarest
+    # classes only. Every other path is padded with it.
+    tree = HuffmanTree(COUNTS)
+    targets = np.array([0] * 1000 + [7])
+    assert tree.points[7, tree.lengths[7] - 1] == 0
+    h = np.random.RandomState(0).randn(len(targets), 4)
+    W_nodes = np.random.RandomState(1).randn(tree.num_inner, 4)
+    _, _, rows, G_rows = hierarchical_softmax(h, targets, W_nodes, tree)
+
+    assert len(rows) == len(G_rows) == tree.lengths[targets].sum()
+    assert (rows == 0).sum() == 1
+    scales = cbow_ngg._update_scales(rows, max_updates=50)
+    assert scales[rows == 0] == 1
@@ -0,0 +1,84 @@
+"""====================================================
+                    DESCRIPTION
+
+Tests for the memory modes of the output layers, and the forms of the
+labels they accept in each mode.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+import pytest
+
+from bricknet import Neural_Network, CSoftmax, LSigmoid
+from bricknet.classifiers import CHSoftmax
+
+MEMORY_MODES = ["both", "activated"]
+
+
+@pytest.mark.parametrize("memory", MEMORY_MODES)
+def test_csoftmax_labels(memory):
+    random = np.random.RandomState(0)
+    x = random.rand(4, 3)
+    weights = random.randn(2, 3)
+    labels = np.array([0, 1, 0, 1])
+    reference = CSoftmax(weights=weights, dtype=np.float64)
+    reference.forward(x)
+    expected = reference.back(x, np.eye(2, dtype=bool)[labels],
+                              update_weights=False)
+
+    layer = CSoftmax(weights=weights, memory=memory, dtype=np.float64)
+    for y in [labels, np.eye(2, dtype=bool)[labels], np.eye(2)[labels]]:
+        layer.forward(x)
+        assert np.allclose(layer.back(x, y, update_weights=False), expected)
+
+    # The gradient goes into the same buffer on every call
+    buffer = layer._buffers["errors_preactivation"]
+    layer.forward(x)
+    layer.back(x, labels, update_weights=False)
+    assert layer._buffers["errors_preactivation"] is buffer
+
+
+@pytest.mark.parametrize("memory", MEMORY_MODES + ["none"])
+def test_chsoftmax_memory_modes(memory):
+    random = np.random.RandomState(1)
+    x = random.rand(8, 5)
+    counts = [10, 5, 3, 2, 1, 1]
+    weights = random.randn(len(counts) - 1, 5)
+    labels = random.randint(len(counts), size=8)
+    reference = CHSoftmax(counts=counts, weights=weights, dtype=np.float64)
+    expected = reference.forward(x).copy()
+    probs = reference.activated_vals.copy()
+    assert np.allclose(probs.sum(axis=1), 1)
+
+    layer = CHSoftmax(counts=counts, weights=weights, memory=memory,
+                      dtype=np.float64)
+    out = layer.forward(x)
+    assert np.array_equal(out, expected)
+    assert np.allclose(layer.activated_vals, probs)
+    assert (layer.preactivated_vals is None) == (memory != "both")
+
+    # The outputs are written into the same buffers on every call
+    activated = layer.activated_vals
+    assert layer.forward(x) is out
+    assert layer.activated_vals is activated
+    if memory == "activated":
+        assert len(layer._buffers) == 2     # probabilities, classification
+
+    if memory == "none":
+        with pytest.raises(ValueError):
+            layer.back(x, labels)
+    else:
+        assert np.allclose(layer.back(x, labels, update_weights=False),
+                           reference.back(x, labels, update_weights=False))
+
+
+def test_neural_network_with_chsoftmax_inference():
+    random = np.random.RandomState(2)
+    x = random.rand(16, 4)
+    net = Neural_Network([LSigmoid(4, 6), CHSoftmax(6, counts=[5, 3, 2, 1])],
+                         memory="none")
+    out = net.forward(x)
+    assert out.shape == (16, 4) and (out.sum(axis=1) == 1).all()
+    assert net.forward(x) is out
+    assert net.layers[-1].preactivated_vals is None
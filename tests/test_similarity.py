@@ -0,0 +1,49 @@
+"""====================================================
+                    DESCRIPTION
+
+Tests for the exact and LSH nearest neighbour lookups.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+
+from bricknet.nlp.similarity import NearestNeighbours, LSHIndex
+
+
+def make_vectors(n=200, vec_size=16, seed=0):
+    random = np.random.RandomState(seed)
+    W = random.randn(n, vec_size)
+    words = ["w{}".format(i) for i in range(n)]
+    return W, words
+
+
+def test_nearest_neighbours_matches_brute_force():
+    W, words = make_vectors()
+    nn = NearestNeighbours(W, words, block_size=64, dtype=np.float64)
+    unit = W / np.linalg.norm(W, axis=1, keepdims=True)
+    expected = np.argsort(-unit.dot(unit[5]))[1:6]
+    result = nn.most_similar("w5", k=5)
+    assert [word for word, _ in result] == [words[i] for i in expected]
+
+
+def test_lsh_most_similar_with_few_candidates():
+    W, words = make_vectors(n=2000)
+    # Many bits and one table leaves a handful of candidates per bucket
+    lsh = LSHIndex(W, words, num_bits=20, num_tables=1, seed=0)
+    indices, scores = lsh.query(lsh.vectors[:50], k=10)
+    assert (indices == -1).any()
+
+    for word, row_indices in zip(words[:50], indices):
+        result = lsh.most_similar(word, k=10)
+        num_found = (row_indices >= 0).sum() - 1    # (excluding the word)
+        assert len(result) == num_found
+        assert all(np.isfinite(score) for _, score in result)
+        assert word not in [w for w, _ in result]
+
+
+def test_lsh_finds_near_duplicates():
+    W, words = make_vectors(n=500)
+    W[1] = W[0] + 0.01 * np.random.RandomState(1).randn(W.shape[1])
+    lsh = LSHIndex(W, words, num_bits=8, num_tables=8, seed=0)
+    assert lsh.most_similar("w0", k=1)[0][0] == "w1"
@@ -0,0 +1,78 @@
+"""====================================================
+                    DESCRIPTION
+
+Tests for the fused softmax cross-entropy, and the forms of the labels that
+CSoftmax accepts.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+
+from bricknet import CSoftmax
+from bricknet.activations import softmax, log_softmax, \
+    softmax_cross_entropy
+
+
+def reference(z, labels):
+    p = softmax(z)
+    cost = -np.log(p[np.arange(len(z)), labels])
+    grad = p - np.eye(z.shape[1])[labels]
+    return cost, grad
+
+
+def test_softmax_cross_entropy_label_forms():
+    random = np.random.RandomState(0)
+    z = random.randn(5, 3)
+    labels = np.array([0, 2, 1, 1, 0])
+    ref_cost, ref_grad = reference(z, labels)
+    for y in [labels, np.eye(3, dtype=bool)[labels], np.eye(3)[labels],
+              np.eye(3, dtype=int)[labels]]:
+        cost, grad = softmax_cross_entropy(z, y)
+        assert np.allclose(cost, ref_cost)
+        assert np.allclose(grad, ref_grad)
+
+
+def test_softmax_cross_entropy_single_example():
+    z = np.array([1.0, -2.0, 0.5])
+    ref_cost, ref_grad = reference(z[np.newaxis], np.array([2]))
+    for y in [2, np.array([0, 0, 1]), np.array([0.0, 0.0, 1.0])]:
+        cost, grad = softmax_cross_entropy(z, y)
+        assert np.allclose(cost, ref_cost[0])
+        assert np.allclose(grad, ref_grad[0])
+
+
+def test_softmax_cross_entropy_large_values():
+    z = np.array([[1000.0, 0.0, -1000.0]])
+    cost, grad = softmax_cross_entropy(z, [2])
+    assert np.allclose(cost, 2000.0)
+    assert np.isfinite(grad).all()
+
+
+def test_integer_inputs():
+    z = np.array([1.0, 2.0, 3.0])
+    for zi in [[1, 2, 3], np.array([1, 2, 3], dtype=np.int8)]:
+        assert np.allclose(softmax(zi), softmax(z))
+        assert np.allclose(log_softmax(zi), log_softmax(z))
+        cost, grad = softmax_cross_entropy(zi, 0)
+        ref_cost, ref_grad = softmax_cross_entropy(z, 0)
+        assert np.allclose(cost, ref_cost) and np.allclose(grad, ref_grad)
+
+    # Floats keep their own dtype
+    assert softmax(z.astype(np.float32)).dtype == np.float32
+
+
+def test_csoftmax_accepts_numeric_one_hot():
+    random = np.random.RandomState(1)
+    x = random.rand(5, 4)
+    labels = np.array([0, 2, 1, 1, 0])
+    layer = CSoftmax(4, 3, dtype=np.float64)
+    layer.forward(x)
+    ref_cost = layer.cost(np.eye(3, dtype=bool)[labels])
+    ref_errors = layer.back(x, np.eye(3, dtype=bool)[labels],
+                            update_weights=False)
+    for y in [np.eye(3)[labels], np.eye(3, dtype=int)[labels]]:
+        layer.forward(x)
+        assert np.allclose(layer.cost(y), ref_cost)
+        assert np.allclose(layer.back(x, y, update_weights=False),
+                           ref_errors)
@@ -0,0 +1,81 @@
+"""====================================================
+                    DESCRIPTION
+
+Tests for the vocabulary, and the subsampling of the frequent words.
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+
+from bricknet.nlp import cbow_ngg
+from bricknet.nlp.vocab import Vocab
+from bricknet.nlp.corpus import subsample_corpus
+
+SENTENCES = [["the", "cat", "sat", "on", "the", "mat"],
+             ["the", "dog", "sat"],
+             ["a", "cat", "and", "a", "dog"]] * 20
+
+
+def test_vocab_pruning():
+    vocab = Vocab.build(SENTENCES, window=4, min_count=40, unknown="UNK")
+    assert set(vocab.words[:2]) == {"START", "END"}
+    assert set(vocab.words) == {"START", "END", "UNK", "the", "cat", "sat",
+                                "dog", "a"}
+    assert vocab.counts[vocab.i["UNK"]] == 60      # on, mat, and
+    assert vocab.counts.sum() == 4 * 60 + 14 * 20
+    tokens, offsets = vocab.encode(SENTENCES[:2])
+    assert [vocab.words[i] for i in tokens] == ["the", "cat", "sat", "UNK",
+                                                "the", "UNK", "the", "dog",
+                                                "sat"]
+    assert list(offsets) == [0, 6, 9]
+
+
+def test_vocab_save_and_load(tmpdir):
+    path = str(tmpdir.join("vocab.npz"))
+    for sample in [1e-3, None]:
+        vocab = Vocab.build(SENTENCES, window=4, max_size=6, sample=sample)
+        vocab.save(path)
+        loaded = Vocab.load(path)
+        assert loaded.words == vocab.words
+        assert loaded.sample == vocab.sample
+        assert np.array_equal(loaded.counts, vocab.counts)
+        assert np.allclose(loaded.keep, vocab.keep)
+
+
+def test_keep_probabilities_ignore_padding():
+    sample = 0.05
+    vocab = Vocab.build(SENTENCES, window=8, sample=sample)
+    df = cbow_ngg.create_vocab_df(SENTENCES, window=8, sample=sample)
+
+    # Relative to the 14 * 20 real words, not the padding
+    f = 60 / 280.0
+    expected = (np.sqrt(f / sample) + 1) * sample / f
+    assert np.isclose(vocab.keep[vocab.i["the"]], expected)
+    assert np.isclose(df.keep["the"], expected)
+    for word in ["START", "END"]:
+        assert vocab.keep[vocab.i[word]] == 1.0
+        assert df.keep[word] == 1.0
+
+    # The same probabilities, whichever form the vocabulary is in
+    words = list(df.index)
+    assert np.allclose(df.keep[words], vocab.keep[vocab.i[words]])
+
+
+def test_subsample_corpus_rates():
+    random = np.random.RandomState(0)
+    tokens = random.randint(3, size=100000).astype(np.int32)
+    offsets = np.arange(0, 100001, 10)
+    keep = np.array([1.0, 0.5, 0.1])
+    new_tokens, new_offsets = subsample_corpus(tokens, offsets, keep, seed=0)
+    assert new_offsets[-1] == len(new_tokens)
+    assert np.all(np.diff(new_offsets) >= 0)
+    rates = (np.bincount(new_tokens, minlength=3)
+             / np.bincount(tokens, minlength=3).astype(float))
+    assert np.allclose(rates, keep, atol=0.01)
+
+    # The seed decides which occurrences are discarded
+    again, _ = subsample_corpus(tokens, offsets, keep, seed=0)
+    other, _ = subsample_corpus(tokens, offsets, keep, seed=1)
+    assert np.array_equal(again, new_tokens)
+    assert not np.array_equal(other, new_tokens)
@@ -0,0 +1,84 @@
+"""====================================================
+                    DESCRIPTION
+
+Convergence tests for the word2vec trainers, at the default settings of the
+Word2Vec classes (batches of 1024 windows, alpha = 0.025).
+=======================================================
+"""
+__author__ = 'ronny'
+
+import numpy as np
+import pytest
+
+from bricknet.nlp import skipgram
+from bricknet.nlp.word2vec import CBOW, SkipGram
+from bricknet.nlp.vocab import Vocab
+
+
+def topic_corpus(num_sentences=2000, num_topics=10, words_per_topic=10,
+                 seed=0):
+    """
+    Random sentences, each drawn from the words of one topic, with Zipf
+    distributed frequencies. With a small vocabulary, every row of the word
+    matrices appears many times per batch.
+    """
+    random = np.random.RandomState(seed)
+    p = 1.0 / np.arange(1, words_per_topic + 1)
+    p /= p.sum()
+    sentences = []
+    for topic in random.randint(num_topics, size=num_sentences):
+        words = random.choice(words_per_topic, size=random.randint(5, 15), p=p)
+        sentences.append(["t{}w{}".format(topic, w) for w in words])
+    return sentences
+
+
+def assert_converges(model):
+    cost = model.cost_
+    tenth = len(cost) // 10
+    assert np.isfinite(cost).all()
+    assert cost[-tenth:].mean() < cost[:tenth].mean()
+    assert np.isfinite(model.W_in).all() and np.isfinite(model.W_out).all()
+    assert np.abs(model.W_in).max() < 10
+
+
+@pytest.mark.parametrize("hierarchical_softmax", [False, True])
+@pytest.mark.parametrize("model_class", [CBOW, SkipGram])
+def test_converges_at_defaults(model_class, hierarchical_softmax):
+    model = model_class(epochs=5, seed=0,
+                        hierarchical_softmax=hierarchical_softmax)
+    assert model.batch_size == 1024
+    assert model.alpha == 0.025
+    assert_converges(model.fit(topic_corpus()))
+
+
+def test_skipgram_train_batch_limits_repeated_rows():
+    # One batch where the same center word, and the same context words,
+    # appear in every window
+    vocab = Vocab.build([["a", "b", "c"]], window=2, sample=None)
+    random = np.random.RandomState(0)
+    W_in = random.randn(len(vocab), 10)
+    W_out = random.randn(len(vocab), 10)
+    contexts = np.tile(vocab.i[["a", "c"]], (1000, 1))
+    centers = np.full(1000, vocab.i["b"])
+    negatives = np.tile(vocab.i[["START", "END"]], (1000, 1))
+
+    before, W_out_before = W_in.copy(), W_out.copy()
+    skipgram.train_batch(contexts, centers, W_in, W_out, vocab, k=1,
+                         alpha=0.025, negatives=negatives, max_updates=50)
+    limited = np.abs(W_in - before).max()
+
+    W_in[...] = before
+    W_out[...] = W_out_before
+    skipgram.train_batch(contexts, centers, W_in, W_out, vocab, k=1,
+                         alpha=0.025, negatives=negatives, max_updates=None)
+    unlimited = np.abs(W_in - before).max()
+
+    # Capped at 50 of the 2000 (center, context) pair updates
+    assert np.isclose(limited, unlimited * 50 / 2000.0)
+
+
+def test_max_updates_reaches_the_trainer():
+    sentences = topic_corpus(200)
+    limited = CBOW(epochs=1, seed=0, max_updates=1).fit(sentences)
+    default = CBOW(epochs=1, seed=0).fit(sentences)
+    assert not np.allclose(limited.W_out, default.W_out)